@@ -115,6 +115,8 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
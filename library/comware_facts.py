@@ -20,6 +20,33 @@ return_data:
     - config (name of running config)
     - interface_list
 options:
+    gather_subset:
+        description:
+            - Fact subsets to collect. Subsets are inventory, base and
+              interfaces, or all. Prefix a subset with ! to skip it,
+              e.g. ['all', '!interfaces'] on large chassis.
+        required: false
+        default: ['all']
+        choices: []
+        aliases: []
+    cache_ttl:
+        description:
+            - Seconds facts are served from the cache instead of the
+              device. 0 disables the cache.
+        required: false
+        default: 0
+        choices: []
+        aliases: []
+    cache_dir:
+        description:
+            - Directory used to share cached facts between tasks and
+              forks. Without it facts are only cached in memory. Facts
+              on disk only expire after cache_ttl, so they are served
+              even if other modules have changed the device since.
+        required: false
+        default: null
+        choices: []
+        aliases: []
     port:
         description:
             - NETCONF port number
@@ -63,12 +90,21 @@ EXAMPLES = """
 # get facts
 - comware_facts: username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# skip the interface list and reuse facts collected in the last 5 minutes
+- comware_facts:
+    gather_subset: ['all', '!interfaces']
+    cache_ttl: 300
+    cache_dir: /tmp/comware_facts
+    username: "{{ username }}"
+    password: "{{ password }}"
+    hostname: "{{ inventory_hostname }}"
+
 """
 
 import socket
 try:
     HAS_PYHP = True
-    from pyhpecw7.features.facts import Facts
+    from pyhpecw7.features.facts import Facts, FactsCache, parse_gather_subset
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.errors import *
     from pyhpecw7.errors import *
@@ -85,12 +121,17 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
+            gather_subset=dict(default=['all'], type='list'),
+            cache_ttl=dict(default=0, type='int'),
+            cache_dir=dict(required=False, type='path'),
             port=dict(default=830, type='int'),
             hostname=dict(required=True),
             username=dict(required=True),
@@ -114,6 +155,19 @@ def main():
 
     device = HPCOM7(**device_args)
 
+    try:
+        subsets = parse_gather_subset(module.params['gather_subset'])
+    except ValueError as e:
+        safe_fail(module, msg=str(e))
+
+    cache = None
+    if module.params['cache_ttl'] > 0:
+        cache = FactsCache(ttl=module.params['cache_ttl'],
+                           cache_dir=module.params['cache_dir'])
+        hpfacts = cache.get(hostname, port, subsets)
+        if hpfacts is not None:
+            safe_exit(module, ansible_facts=hpfacts, cached=True)
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -122,14 +176,13 @@ def main():
                   descr='error opening connection to device')
 
     try:
-        facts = Facts(device)
+        facts = Facts(device, gather_subset=subsets, cache=cache)
+        hpfacts = facts.facts
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='error collecting facts')
 
-    hpfacts = facts.facts
-
-    safe_exit(module, device, ansible_facts=hpfacts)
+    safe_exit(module, device, ansible_facts=hpfacts, cached=False)
 
 from ansible.module_utils.basic import *
 main()
@@ -18,8 +18,21 @@ notes:
 options:
     name:
         description:
-            - Full name of the interface
-        required: True
+            - Full name of the interface. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -112,6 +125,9 @@ EXAMPLE = """
 
 # Interface stp full configuration
 - comware_iface_stp:  name=HundredGigE1/0/25 edgedport=true root=true tc_restriction=true transimit_limit=200   username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
+# Edge ports on a range of access ports
+- comware_iface_stp:  interfaces="Ten-GigabitEthernet1/0/1 to 1/0/48" edgedport=true username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 """
 
 import socket
@@ -120,7 +136,9 @@ try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.iface_stp import Stp
-    from pyhpecw7.features.errors import InterfaceError
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
+    from pyhpecw7.features.errors import InterfaceError, InterfaceRangeError
     from pyhpecw7.errors import *
 except ImportError as ie:
     HAS_PYHP = False
@@ -134,12 +152,15 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
+            interfaces=dict(type='list'),
             edgedport=dict(required=False,choices=['true', 'false',]),
             loop=dict(required=False, choices=['true', 'false', ]),
             root=dict(required=False, choices=['true', 'false', ]),
@@ -153,6 +174,8 @@ def main():
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
 
@@ -161,7 +184,8 @@ def main():
                   + 'module.', error=str(ie))
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     hostname = socket.gethostbyname(module.params['hostname'])
     username = module.params['username']
@@ -185,6 +209,11 @@ def main():
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -193,29 +222,30 @@ def main():
                   descr='Error opening connection to device.')
 
     try:
-        stp = Stp(device,name)
+        stps = InterfaceRange(device, Stp, names)
     except PYHPError as e:
         safe_fail(module,device,descr='there is problem in setting stp config',
                   msg=str(e))
 
     try:
-        existing = stp.get_config()
+        existing = stps.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error getting existing config.')
 
-    if state == 'present':
-        delta = dict(set(proposed.items()).difference(
-            existing.items()))
-        if delta:
-            stp.build(stage=True, **delta)
+    for each, stp in stps.each():
+        if state == 'present':
+            delta = dict(set(proposed.items()).difference(
+                existing[each].items()))
+            if delta:
+                stp.build(stage=True, **delta)
 
-    elif state == 'default' or 'absent':
-        defaults = stp.get_default_config()
-        delta = dict(set(existing.items()).difference(
-            defaults.items()))
-        if delta:
-            stp.default(stage=True)
+        elif state == 'default' or 'absent':
+            defaults = stp.get_default_config()
+            delta = dict(set(existing[each].items()).difference(
+                defaults.items()))
+            if delta:
+                stp.default(stage=True)
 
     commands = None
     end_state = existing
@@ -228,12 +258,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = stp.get_config()
+                end_state = stps.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='Error on device execution.')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
@@ -107,6 +107,39 @@ options:
         default: False
         choices: []
         aliases: []
+    seed:
+        description:
+            - Address of a switch that already has the file(s), e.g. the
+              first switch of a site, that this switch fetches them from
+              over SCP instead of from the controller. Combined with a
+              first play that stages one switch per site, each image
+              crosses the WAN once per site.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    seed_username:
+        description:
+            - Username used to login to the seed switch. Defaults to username.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    seed_password:
+        description:
+            - Password used to login to the seed switch. Defaults to password.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    irf_members:
+        description:
+            - File systems of IRF members the file(s) are also copied to
+              from the master's flash, e.g. ['slot2#flash:/']
+        required: false
+        default: []
+        choices: []
+        aliases: []
 
 """
 EXAMPLE = """
@@ -117,6 +150,9 @@ EXAMPLE = """
 # Basic Install OS Boot/Sys
 - comware_install_os: reboot=yes boot=/usr/5930-cmw710-boot-e2415.bin system=/usr/5930-cmw710-system-e2415.bin username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# Install OS IPE fetched from the site's first switch, and copied to IRF member 2
+- comware_install_os: ipe_package=/usr/5900_5920_5930-CMW710-E2415.ipe reboot=false seed={{ site_seed }} irf_members=slot2#flash:/ username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -126,7 +162,7 @@ import re
 try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
-    from pyhpecw7.features.file_copy import FileCopy
+    from pyhpecw7.features.file_copy import FileCopy, TransferSession
     from pyhpecw7.features.install_os import InstallOs
     from pyhpecw7.features.reboot import Reboot
     from pyhpecw7.errors import *
@@ -143,9 +179,38 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
+def stage_file(module, device, file_copy, session, stats, descr):
+    """Copy a file to the device, from the controller or from the seed
+    switch, and to the IRF members. Return whether anything was copied.
+    """
+    seed = module.params.get('seed')
+    transfered = False
+    try:
+        if not file_copy.file_already_exists():
+            if seed:
+                file_copy.pull_file(
+                    seed,
+                    module.params['seed_username'] or module.params['username'],
+                    module.params['seed_password'] or module.params['password'])
+            else:
+                file_copy.transfer_file(session=session)
+                stats[file_copy.src] = file_copy.stats
+            transfered = True
+
+        for member_dir in module.params['irf_members']:
+            if file_copy.copy_to(member_dir):
+                transfered = True
+    except PYHPError as fe:
+        safe_fail(module, device, msg=str(fe), descr=descr)
+
+    return transfered
+
+
 def main():
     module = AnsibleModule(
         argument_spec=dict(
@@ -165,6 +230,10 @@ def main():
             password=dict(required=False, default=None),
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
+            seed=dict(),
+            seed_username=dict(),
+            seed_password=dict(no_log=True),
+            irf_members=dict(type='list', default=[]),
         ),
         supports_check_mode=True
     )
@@ -215,6 +284,11 @@ def main():
         safe_fail(module, device, msg=str(e),
                   descr='Error getting current config.')
 
+    # boot and system images are staged over one SSH connection
+    session = TransferSession(hostname, username, password,
+                              look_for_keys=look_for_keys)
+    transfer_stats = {}
+
     existing_boot = existing['startup-primary']['boot']
     existing_system = existing['startup-primary']['system']
     remote_dir = module.params['remote_dir']
@@ -237,13 +311,9 @@ def main():
             safe_fail(module, device, msg=str(fe),
                       descr='Error preparing IPE file transfer.')
 
-        if not ipe_file_copy.file_already_exists():
-            try:
-                ipe_file_copy.transfer_file(look_for_keys=look_for_keys)
-                transfered = True
-            except PYHPError as fe:
-                safe_fail(module, device, msg=str(fe),
-                          descr='Error transfering IPE file.')
+        if stage_file(module, device, ipe_file_copy, session, transfer_stats,
+                      'Error transfering IPE file.'):
+            transfered = True
 
         if not already_set:
             delete_ipe = module.params.get('delete_ipe')
@@ -272,29 +342,25 @@ def main():
             safe_fail(module, device, msg=str(fe),
                       descr='Error preparing system file transfer.')
 
-        if not boot_file_copy.file_already_exists():
-            try:
-                boot_file_copy.transfer_file(look_for_keys=look_for_keys)
-                transfered = True
-            except PYHPError as fe:
-                safe_fail(module, device, msg=str(fe),
-                          descr='Error transfering boot file.')
+        if stage_file(module, device, boot_file_copy, session, transfer_stats,
+                      'Error transfering boot file.'):
+            transfered = True
 
-        if not system_file_copy.file_already_exists():
-            try:
-                system_file_copy.transfer_file(look_for_keys=look_for_keys)
-                transfered = True
-            except PYHPError as fe:
-                safe_fail(module, device, msg=str(fe),
-                          descr='Error transfering system file.')
+        if stage_file(module, device, system_file_copy, session, transfer_stats,
+                      'Error transfering system file.'):
+            transfered = True
 
         if not already_set:
             ios.build(
                 'bootsys', boot=boot_file_copy.dst,
                 system=system_file_copy.dst, stage=True)
 
+    session.close()
+
     commands = None
     end_state = existing
+    bytes_transferred = sum(
+        stats.get('sent', 0) for stats in transfer_stats.values())
 
     reboot_attempt = 'no'
     if device.staged or transfered:
@@ -307,6 +373,8 @@ def main():
             safe_exit(module, device, changed=True,
                       commands=commands,
                       transfered=transfered,
+                      bytes_transferred=bytes_transferred,
+                      transfer_stats=transfer_stats,
                       end_state=end_state)
         else:
             try:
@@ -320,6 +388,8 @@ def main():
     results = {}
     results['commands'] = commands
     results['transfered'] = transfered
+    results['bytes_transferred'] = bytes_transferred
+    results['transfer_stats'] = transfer_stats
     results['changed'] = changed
     results['end_state'] = end_state
 
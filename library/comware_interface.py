@@ -25,8 +25,21 @@ notes:
 options:
     name:
         description:
-            - Full name of the interface
-        required: true
+            - Full name of the interface. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -114,6 +127,8 @@ EXAMPLE = """
 # Basic Ethernet config
 - comware_interface: name=FortyGigE1/0/5 admin=up description=mydesc duplex=auto speed=40000 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 - comware_interface: name=hun1/0/26.1 type=routed state=present username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+# Same description on a range of ports
+- comware_interface: interfaces="FortyGigE1/0/1 to 1/0/8" description=uplink username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 """
 
 import socket
@@ -122,7 +137,9 @@ try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.interface import Interface
-    from pyhpecw7.features.errors import InterfaceError
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
+    from pyhpecw7.features.errors import InterfaceError, InterfaceRangeError
     from pyhpecw7.errors import *
 except ImportError as ie:
     HAS_PYHP = False
@@ -137,13 +154,16 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
+            interfaces=dict(type='list'),
             admin=dict(choices=['up', 'down']),
             description=dict(),
             type=dict(choices=['bridged', 'routed']),
@@ -157,6 +177,8 @@ def main():
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
     if not HAS_PYHP:
@@ -164,7 +186,8 @@ def main():
                   + 'module.', error=str(ie))
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     hostname = socket.gethostbyname(module.params['hostname'])
     username = module.params['username']
@@ -175,7 +198,6 @@ def main():
                     password=password, port=port)
 
     name = module.params['name']
-    subnum_list = name.split('.')
     state = module.params['state']
     changed = False
 
@@ -191,6 +213,11 @@ def main():
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -199,7 +226,7 @@ def main():
                   descr='Error opening connection to device.')
 
     try:
-        interface = Interface(device, name)
+        ifaces = InterfaceRange(device, Interface, names)
     except PYHPError as e:
         safe_fail(module,
                   device,
@@ -207,7 +234,8 @@ def main():
                   msg=str(e))
 
     try:
-        interface.param_check(**proposed)
+        for interface in ifaces.features.values():
+            interface.param_check(**proposed)
     except PYHPError as e:
         safe_fail(module,
                   device,
@@ -215,70 +243,71 @@ def main():
                   msg=str(e))
 
     try:
-        existing = interface.get_config()
+        existing = ifaces.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error getting existing config.')
 
-    if state == 'present':
-        delta = dict(set(proposed.items()).difference(
-            existing.items()))
-        if delta or not existing:
-            if not interface.iface_exists:
-                try:
-                    interface.create_logical()
-                    interface.update()
-                    changed=True
-                    existing = interface.get_config()
-                except PYHPError as e:
-                    safe_fail(
-                        module, device,
-                        msg='Exception message ' + str(e),
-                        descr='There was a problem creating'
-                        + ' the logical interface.')
-                delta = dict(set(proposed.items()).difference(
-                    existing.items()))
+    for each, interface in ifaces.each():
+        if state == 'present':
+            delta = dict(set(proposed.items()).difference(
+                existing[each].items()))
+            if delta or not existing[each]:
+                if not interface.iface_exists:
+                    try:
+                        interface.create_logical()
+                        interface.update()
+                        changed=True
+                        existing[each] = interface.get_config()
+                    except PYHPError as e:
+                        safe_fail(
+                            module, device,
+                            msg='Exception message ' + str(e),
+                            descr='There was a problem creating'
+                            + ' the logical interface.')
+                    delta = dict(set(proposed.items()).difference(
+                        existing[each].items()))
 
-            if delta:
-                res_sub = re.search(r'\.', name)
+                if delta:
+                    res_sub = re.search(r'\.', each)
+                    if interface.is_routed and res_sub != None:
+                        interface.create_sub_iface(stage=True)
+                    interface.build(stage=True, **delta)
+            else:
+                res_sub = re.search(r'\.', each)
                 if interface.is_routed and res_sub != None:
                     interface.create_sub_iface(stage=True)
-                interface.build(stage=True, **delta)
-        else:
-            res_sub = re.search(r'\.', name)
-            if interface.is_routed and res_sub != None:
-                interface.create_sub_iface(stage=True)
 
-    elif state == 'default':
-        defaults = interface.get_default_config()
-        delta = dict(set(existing.items()).difference(
-            defaults.items()))
-        if delta:
-            interface.default(stage=True)
-    elif state == 'absent':
-        if interface.iface_exists:
-            if interface.is_ethernet:
-                defaults = interface.get_default_config()
-                delta = dict(set(existing.items()).difference(
-                    defaults.items()))
-                if delta:
+        elif state == 'default':
+            defaults = interface.get_default_config()
+            delta = dict(set(existing[each].items()).difference(
+                defaults.items()))
+            if delta:
+                interface.default(stage=True)
+        elif state == 'absent':
+            if interface.iface_exists:
+                if interface.is_ethernet:
+                    defaults = interface.get_default_config()
+                    delta = dict(set(existing[each].items()).difference(
+                        defaults.items()))
+                    if delta:
+                        try:
+                            interface.default(stage=True)
+                        except InterfaceError as e:
+                            safe_fail(module, device, msg=str(e),
+                                      descr='Error getting default configuration.')
+                elif len(each.split('.')) == 2:
                     try:
-                        interface.default(stage=True)
+                        interface.remove_sub_iface(stage=True)
                     except InterfaceError as e:
                         safe_fail(module, device, msg=str(e),
-                                  descr='Error getting default configuration.')
-            elif len(subnum_list) == 2:
+                                  descr='Error removing routing sub interface.')
+            else:
                 try:
-                    interface.remove_sub_iface(stage=True)
+                    interface.remove_logical(stage=True)
                 except InterfaceError as e:
                     safe_fail(module, device, msg=str(e),
-                              descr='Error removing routing sub interface.')
-        else:
-            try:
-                interface.remove_logical(stage=True)
-            except InterfaceError as e:
-                safe_fail(module, device, msg=str(e),
-                          descr='Error removing logical interface.')
+                              descr='Error removing logical interface.')
 
     commands = None
     end_state = existing
@@ -291,12 +320,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = interface.get_config()
+                end_state = ifaces.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='Error on device execution.')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
@@ -12,8 +12,21 @@ category: Feature (RW)
 options:
     name:
         description:
-            - interface name
-        required: true
+            - interface name. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -108,6 +121,10 @@ EXAMPLES = """
 - comware_isis_interface: name=vlan-interface30 isisID=4 level=2 networkType=p2p cost=5 routerid=level-2 silent=true state=absent 
                 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# isis 4 on a range of vlan interfaces
+- comware_isis_interface: interfaces="vlan-interface30 to vlan-interface39" isisID=4 cost=5 state=present 
+                username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -115,6 +132,8 @@ try:
     HAS_PYHP = True
     from pyhpecw7.features.isis_interface import Isis
     from pyhpecw7.features.isis_interface import ISis
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.errors import *
     from pyhpecw7.errors import *
@@ -131,13 +150,16 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
+            interfaces=dict(type='list'),
             # enable=dict(required=False),
             isisID=dict(required=True, type='str'),
             level=dict(required=False, choices=['level-1', 'level-2', 'level-1-2']),
@@ -152,6 +174,8 @@ def main():
             password=dict(required=False, default=None),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
     if not HAS_PYHP:
@@ -182,6 +206,11 @@ def main():
     args = dict(name=name, isisID=isisID, level=level, cost=cost, routerid=routerid, networkType=networkType, silent=silent)
     proposed = dict((k, v) for k, v in args.items() if v is not None)
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -190,29 +219,31 @@ def main():
 
     try:
 
-        isis = Isis(device, name)
-        iSis = ISis(device, name, isisID, level, cost, routerid, networkType, silent)
+        isises = InterfaceRange(device, Isis, names)
+        iSises = InterfaceRange(device, ISis, names, isisID, level, cost, routerid, networkType, silent)
     #     isis.param_check(**proposed)
     except PYHPError as e:
         safe_fail(module, device, msg=str(e))
 
     try:
-        existing = isis.get_config()
+        existing = isises.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='error getting isis config')
 
-    if state == 'present':
-        delta = dict(set(proposed.items()).difference(
-            existing.items()))
-        if delta:
-            if module.params['cost'] or module.params['routerid'] or module.params['networkType'] or module.params['silent'] or module.params['level']:
-                iSis.build(stage=True)
-            else:
-                isis.build(stage=True, **delta)
-    elif state == 'absent':
-        if existing:
-            iSis.remove(stage=True)
+    for each, isis in isises.each():
+        iSis = iSises.features[each]
+        if state == 'present':
+            delta = dict(set(proposed.items()).difference(
+                existing[each].items()))
+            if delta:
+                if module.params['cost'] or module.params['routerid'] or module.params['networkType'] or module.params['silent'] or module.params['level']:
+                    iSis.build(stage=True)
+                else:
+                    isis.build(stage=True, **delta)
+        elif state == 'absent':
+            if existing[each]:
+                iSis.remove(stage=True)
 
     commands = None
     end_state = existing
@@ -226,12 +257,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = isis.get_config()
+                end_state = isises.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='error during execution')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
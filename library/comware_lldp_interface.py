@@ -13,8 +13,21 @@ notes:
 options:
     name:
         description:
-            - Full name of the interface
-        required: true
+            - Full name of the interface. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -74,6 +87,9 @@ EXAMPLES = """
 # Basic interface lldp config
 - comware_lldp_interface: name=FortyGigE1/0/2 interface_enable=enabled username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# Disable lldp on a range of ports
+- comware_lldp_interface: interfaces="FortyGigE1/0/1 to 1/0/8" interface_enable=disabled username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -82,6 +98,9 @@ try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.lldp_interface import Lldp
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
+    from pyhpecw7.features.errors import InterfaceRangeError
     from pyhpecw7.errors import PYHPError
 except ImportError as ie:
     HAS_PYHP = False
@@ -96,13 +115,16 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
+            interfaces=dict(type='list'),
             interface_enable=dict(required=True,
                            choices=['enabled', 'disabled']),
             state=dict(choices=['present', 'default'],
@@ -113,6 +135,8 @@ def main():
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
 
@@ -121,7 +145,8 @@ def main():
                   msg='There was a problem loading from the pyhpecw7 module')
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     hostname = socket.gethostbyname(module.params['hostname'])
     username = module.params['username']
@@ -135,6 +160,11 @@ def main():
     state = module.params['state']
     changed = False
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -142,20 +172,20 @@ def main():
         safe_fail(module, device, msg=str(e),
                   descr='Error opening connection to device.')
 
-#    interface_enable = module.params.get('interface_enable')
     try:
-        lldp = Lldp(device, name)
+        lldps = InterfaceRange(device, Lldp, names)
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error initialzing Switchport object.')
 
-    # Make sure interface exists and is ethernet
-    if not lldp.interface.iface_exists:
-        safe_fail(module, device,
-                  msg='{0} doesn\'t exist on the device.'.format(name))
+    # Make sure interfaces exist and are ethernet
+    for each, lldp in lldps.features.items():
+        if not lldp.interface.iface_exists:
+            safe_fail(module, device,
+                      msg='{0} doesn\'t exist on the device.'.format(each))
 
     try:
-        existing = lldp.get_config()
+        existing = lldps.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error getting lldp config.')
@@ -163,19 +193,20 @@ def main():
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
-    if state == 'present':
-        delta = dict(set(proposed.items()).difference(
-            existing.items()))
-
-        if delta:
-            delta['interface_enable'] = proposed.get('interface_enable')
-            lldp.build(stage=True, **delta)
-    elif state == 'default':
-        defaults = lldp.get_default()
-        delta = dict(set(existing.items()).difference(
-            defaults.items()))
-        if delta:
-            lldp.default(stage=True)
+    for each, lldp in lldps.each():
+        if state == 'present':
+            delta = dict(set(proposed.items()).difference(
+                existing[each].items()))
+
+            if delta:
+                delta['interface_enable'] = proposed.get('interface_enable')
+                lldp.build(stage=True, **delta)
+        elif state == 'default':
+            defaults = lldp.get_default()
+            delta = dict(set(existing[each].items()).difference(
+                defaults.items()))
+            if delta:
+                lldp.default(stage=True)
 
     commands = None
     end_state = existing
@@ -188,12 +219,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = lldp.get_config()
+                end_state = lldps.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='Error during command execution.')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
@@ -19,8 +19,21 @@ notes:
 options:
     name:
         description:
-            - Full name of the interface
-        required: true
+            - Full name of the interface. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -87,6 +100,9 @@ EXAMPLE = """
 # Basic Ethernet config
 - comware_mtu: name=Ten-GigabitEthernet1/0/7 jumboframe=1537 mtu=1600 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# Same MTU on a range of ports
+- comware_mtu: interfaces="Ten-GigabitEthernet1/0/1 to 1/0/24" mtu=1600 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -95,7 +111,9 @@ try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.mtu import Mtu
-    from pyhpecw7.features.errors import InterfaceError
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
+    from pyhpecw7.features.errors import InterfaceError, InterfaceRangeError
     from pyhpecw7.errors import *
 except ImportError as ie:
     HAS_PYHP = False
@@ -110,13 +128,16 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
+            interfaces=dict(type='list'),
             mtu=dict(type='str'),
             jumboframe=dict(type='str'),
             state=dict(choices=['present', 'default'],
@@ -127,6 +148,8 @@ def main():
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
 
@@ -135,7 +158,8 @@ def main():
                   + 'module.', error=str(ie))
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     hostname = socket.gethostbyname(module.params['hostname'])
     username = module.params['username']
@@ -155,6 +179,11 @@ def main():
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -163,7 +192,7 @@ def main():
                   descr='Error opening connection to device.')
 
     try:
-        mtu = Mtu(device, name)
+        mtus = InterfaceRange(device, Mtu, names)
     except PYHPError as e:
         safe_fail(module,
                   device,
@@ -171,7 +200,8 @@ def main():
                   msg=str(e))
 
     try:
-        mtu.param_check(**proposed)
+        for mtu in mtus.features.values():
+            mtu.param_check(**proposed)
     except PYHPError as e:
         safe_fail(module,
                   device,
@@ -180,49 +210,58 @@ def main():
     if module.params.get('jumboframe'):
         args = dict(jumboframe=jumboframe)
     try:
-        existing = mtu.get_config()
+        existing = mtus.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error getting existing config.')
 
-    if state == 'present':
-        delta = dict(set(proposed.items()).difference(
-            existing.items()))
-        if module.params.get('jumboframe'):
-            mtu.build_jumbo(stage=True, **args)
-            del delta['jumboframe']
-        if delta or not existing:
-            if not mtu.iface_exists:
-                try:
-                    mtu.create_logical()
-                    mtu.update()
-                    changed=True
-                    existing = mtu.get_config()
-                except PYHPError as e:
-                    safe_fail(
-                        module, device,
-                        msg='Exception message ' + str(e),
-                        descr='There was a problem creating'
-                        + ' the logical interface.')
-                delta = dict(set(proposed.items()).difference(
-                    existing.items()))
+    # the jumbo frame settings of every port come from one get
+    if state == 'default':
+        try:
+            jumbo_configs = mtus.get_config(method='get_jumbo_config')
+        except PYHPError as e:
+            safe_fail(module, device, msg=str(e),
+                      descr='Error getting existing config.')
+
+    for each, mtu in mtus.each():
+        if state == 'present':
+            delta = dict(set(proposed.items()).difference(
+                existing[each].items()))
+            if module.params.get('jumboframe'):
+                mtu.build_jumbo(stage=True, **args)
+                del delta['jumboframe']
+            if delta or not existing[each]:
+                if not mtu.iface_exists:
+                    try:
+                        mtu.create_logical()
+                        mtu.update()
+                        changed=True
+                        existing[each] = mtu.get_config()
+                    except PYHPError as e:
+                        safe_fail(
+                            module, device,
+                            msg='Exception message ' + str(e),
+                            descr='There was a problem creating'
+                            + ' the logical interface.')
+                    delta = dict(set(proposed.items()).difference(
+                        existing[each].items()))
 
+                if delta:
+                    mtu.build(stage=True, **delta)
+        elif state == 'default':
+            defaults = mtu.get_default_config()
+            delta = dict(set(existing[each].items()).difference(
+                defaults.items()))
+            jumbo_config = jumbo_configs[each]
+            if jumbo_config:
+                jumbo_lst = []
+                for k,v in jumbo_config.items():
+                    jumbo_lst.append(v)
+                #jumboframe default 9416
+                if int(jumbo_lst[0]) != 9416:
+                    mtu.remove_jumbo(stage=True,**jumbo_config)
             if delta:
-                mtu.build(stage=True, **delta)
-    elif state == 'default':
-        defaults = mtu.get_default_config()
-        delta = dict(set(existing.items()).difference(
-            defaults.items()))
-        jumbo_config = mtu.get_jumbo_config()
-        if jumbo_config:
-            jumbo_lst = []
-            for k,v in jumbo_config.items():
-                jumbo_lst.append(v)
-            #jumboframe default 9416
-            if int(jumbo_lst[0]) != 9416:
-                mtu.remove_jumbo(stage=True,**jumbo_config)
-        if delta:
-            mtu.default(stage=True)
+                mtu.default(stage=True)
 
     commands = None
     end_state = existing
@@ -235,12 +274,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = mtu.get_config()
+                end_state = mtus.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='Error on device execution.')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
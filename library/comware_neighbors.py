@@ -17,6 +17,16 @@ options:
         default: lldp
         choices: ['lldp', 'cdp']
         aliases: []
+    fields:
+        description:
+            - Keys to return for each neighbor, in addition to local_intf.
+              lldp supports neighbor, neighbor_intf, neighbor_intf_descr,
+              chassis_id and system_descr. cdp supports neighbor and
+              neighbor_intf.
+        required: false
+        default: ['neighbor', 'neighbor_intf']
+        choices: []
+        aliases: []
     port:
         description:
             - NETCONF port number
@@ -83,6 +93,8 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
@@ -90,6 +102,7 @@ def main():
     module = AnsibleModule(
         argument_spec=dict(
             neigh_type=dict(default='lldp', choices=['cdp', 'lldp']),
+            fields=dict(required=False, type='list'),
             port=dict(default=830, type='int'),
             hostname=dict(required=True),
             username=dict(required=True),
@@ -123,7 +136,8 @@ def main():
                   descr='error opening conn to device')
 
     try:
-        neighbors = Neighbors(device)
+        neighbors = Neighbors(device, ntypes=[neigh_type],
+                              fields=module.params['fields'])
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='error getting neighbor info')
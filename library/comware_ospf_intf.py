@@ -20,8 +20,21 @@ notes:
 options:
     name:
         description:
-            - full name of interface
-        required: true
+            - full name of interface. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -147,6 +160,9 @@ EXAMPLE = """
   md5type=md5 md5pwdtype=plain md5pwd=1 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 - comware_ospf_intf: name=Ten-GigabitEthernet1/0/7 state=default \
   username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+# Same cost on a range of routed ports
+- comware_ospf_intf: interfaces="Ten-GigabitEthernet1/0/1 to 1/0/8" ospfname=1 area=0 ospfcost=10 \
+  username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 """
 
 import socket
@@ -155,8 +171,10 @@ try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.ospf_intf import Ospf
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
     from pyhpecw7.features.interface import Interface
-    from pyhpecw7.features.errors import InterfaceError
+    from pyhpecw7.features.errors import InterfaceError, InterfaceRangeError
     from pyhpecw7.errors import *
 except ImportError as ie:
     HAS_PYHP = False
@@ -170,12 +188,15 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True,type='str'),
+            name=dict(required=False,type='str'),
+            interfaces=dict(type='list'),
             ospfname=dict(required=False,type='str'),
             ospfcost=dict(required=False,type='str'),
             area=dict(required=False,type='str'),
@@ -194,6 +215,8 @@ def main():
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
     if not HAS_PYHP:
@@ -201,7 +224,8 @@ def main():
                   + 'module.', error=str(ie))
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     hostname = socket.gethostbyname(module.params['hostname'])
     username = module.params['username']
@@ -225,6 +249,11 @@ def main():
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -255,26 +284,29 @@ def main():
             safe_fail(module,msg='all the paramaters md5pwd keyid md5type md5pwdtype are needed when setting md5 auth mode')
 
     try:
-        ospf = Ospf(device,name)
-        ospf_interface = Interface(device,name)
+        ospfs = InterfaceRange(device, Ospf, names)
+        ospf_interfaces = InterfaceRange(device, Interface, names)
     except PYHPError as e:
         safe_fail(module,device,descr='there is problem in setting ospf config',
                   msg=str(e))
 
-    if not ospf_interface.iface_exists:
-        safe_fail(module, device, msg='interface does not exist.')
-    is_eth, is_rtd = ospf_interface._is_ethernet_is_routed()
-    if not is_rtd:
-        safe_fail(module,msg='Interface is not l3 interface. please use interface module set first.')
+    for each, ospf_interface in ospf_interfaces.features.items():
+        if not ospf_interface.iface_exists:
+            safe_fail(module, device, msg='interface {0} does not exist.'.format(each))
+        is_eth, is_rtd = ospf_interface._is_ethernet_is_routed()
+        if not is_rtd:
+            safe_fail(module,msg='Interface {0} is not l3 interface.'.format(each)
+                      + ' please use interface module set first.')
 
     try:
-        ospf.param_check(**proposed)
+        for ospf in ospfs.features.values():
+            ospf.param_check(**proposed)
     except PYHPError as e:
         safe_fail(module,device,descr='There was problem with the supplied parameters.',
                   msg=str(e))
 
     try:
-        existing = ospf.get_config()
+        existing = ospfs.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error getting existing config.')
@@ -286,37 +318,38 @@ def main():
     proposed_md5 = dict(keyid=keyid, md5type=md5type, \
                         md5pwdtype=md5pwdtype, md5pwd=md5pwd)
 
-    if state == 'present':
-        ospf.build_area(stage=True, **proposed_area)
-        if ospfcost:
-            ospf.build(stage=True,**proposed_cost)
-            if network_type:
-                ospf.build(stage=True, **proposed_nets)
-                if simplepwd:
-                    ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
-                elif md5pwd:
-                    ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
+    for each, ospf in ospfs.each():
+        if state == 'present':
+            ospf.build_area(stage=True, **proposed_area)
+            if ospfcost:
+                ospf.build(stage=True,**proposed_cost)
+                if network_type:
+                    ospf.build(stage=True, **proposed_nets)
+                    if simplepwd:
+                        ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
+                    elif md5pwd:
+                        ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
+                else:
+                    if simplepwd:
+                        ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
+                    elif md5pwd:
+                        ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
             else:
-                if simplepwd:
-                    ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
-                elif md5pwd:
-                    ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
-        else:
-            if network_type:
-                ospf.build(stage=True, **proposed_nets)
-                if simplepwd:
-                    ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
-                elif md5pwd:
-                    ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
-            else:
-                if simplepwd:
-                    ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
-                elif md5pwd:
-                    ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
+                if network_type:
+                    ospf.build(stage=True, **proposed_nets)
+                    if simplepwd:
+                        ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
+                    elif md5pwd:
+                        ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
+                else:
+                    if simplepwd:
+                        ospf.build_auth_simple(stage=True, state='present', **proposed_spwd)
+                    elif md5pwd:
+                        ospf.build_auth_md5(stage=True, state='present', **proposed_md5)
 
-    elif state == 'absent' or 'default':
-        if existing:
-            ospf.default_ospf(stage=True)
+        elif state == 'absent' or 'default':
+            if existing[each]:
+                ospf.default_ospf(stage=True)
 
     commands = None
     end_state = existing
@@ -329,12 +362,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = ospf.get_config()
+                end_state = ospfs.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='Error on device execution.')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
@@ -13,8 +13,19 @@ notes:
 options:
     intf_name:
         description:
-            -  interface name.
-        required: true
+            -  interface name. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              intf_name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The commands of all
+              of them are pushed together.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -91,6 +102,8 @@ EXAMPLES = """
   - comware_sflow_intf: intf_name=xxxx rate=xxxx collector=xx username={{ username }} password={{ password }} hostname={{ inventory_hostname }} username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 # delete netstream config
   - comware_sflow_intf: intf_name=xxxx rate=xxxx collector=xx username={{ username }} password={{ password }} hostname={{ inventory_hostname }} state=absent username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+# sflow config of a range of interfaces
+  - comware_sflow_intf: interfaces="Ten-GigabitEthernet1/0/1 to 1/0/48" rate=4000 collector=1 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
 """
 
@@ -98,6 +111,8 @@ import socket
 try:
     HAS_PYHP = True
     from pyhpecw7.features.sflow_intf import Sflow
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.errors import *
     from pyhpecw7.errors import *
@@ -114,12 +129,15 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            intf_name=dict(required=True),
+            intf_name=dict(required=False),
+            interfaces=dict(type='list'),
             collector=dict(required=False),
             rate=dict(required=False),
             state=dict(choices=['present', 'absent'], default='present'),
@@ -129,6 +147,8 @@ def main():
             password=dict(required=False, default=None),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['intf_name', 'interfaces']],
+        mutually_exclusive=[['intf_name', 'interfaces']],
         supports_check_mode=True
     )
     if not HAS_PYHP:
@@ -153,6 +173,11 @@ def main():
 
     changed = False
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [intf_name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -161,14 +186,17 @@ def main():
                   descr='error connecting to device')
 
     try:
-        SFLOW = Sflow(device, intf_name, collector, rate)
+        SFLOWS = InterfaceRange(device, Sflow, names, collector, rate)
     except PYHPError as e:
         safe_fail(module, device, msg=str(e))
 
-    if state == 'present':
-        SFLOW.build(stage=True)
-    elif state == 'absent':
-        SFLOW.remove(stage=True)
+    # staged together, the commands of every interface
+    # go out in one cli_config
+    for each, SFLOW in SFLOWS.each():
+        if state == 'present':
+            SFLOW.build(stage=True)
+        elif state == 'absent':
+            SFLOW.remove(stage=True)
 
     commands = None
 
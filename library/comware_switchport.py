@@ -24,8 +24,21 @@ notes:
 options:
     name:
         description:
-            - Full name of the interface
-        required: true
+            - Full name of the interface. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              name. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -122,6 +135,9 @@ EXAMPLES = """
 # Basic trunk config
 - comware_switchport: name=FortyGigE1/0/2 link_type=trunk permitted_vlans="1-3,5,8-10" username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# Access config of a range of ports
+- comware_switchport: interfaces="Ten-GigabitEthernet1/0/1 to 1/0/24,Ten-GigabitEthernet1/0/30" link_type=access pvid=3 username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -130,6 +146,9 @@ try:
     HAS_PYHP = True
     from pyhpecw7.comware import HPCOM7
     from pyhpecw7.features.switchport import Switchport
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
+    from pyhpecw7.features.errors import InterfaceRangeError
     from pyhpecw7.features.vlan import Vlan
     from pyhpecw7.features.portchannel import Portchannel
     from pyhpecw7.errors import PYHPError
@@ -146,13 +165,16 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
+            interfaces=dict(type='list'),
             link_type=dict(required=True,
                            choices=['access', 'trunk', 'hybrid']),
             pvid=dict(type='str'),
@@ -167,6 +189,8 @@ def main():
             port=dict(type='int', default=830),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['name', 'interfaces']],
+        mutually_exclusive=[['name', 'interfaces']],
         supports_check_mode=True
     )
 
@@ -175,7 +199,8 @@ def main():
                   msg='There was a problem loading from the pyhpecw7 module')
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     hostname = socket.gethostbyname(module.params['hostname'])
     username = module.params['username']
@@ -204,6 +229,11 @@ def main():
                 safe_fail(module,msg='Hybrid interface don\'t take '
                           + 'permitted vlan lists.')
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [name])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -225,83 +255,82 @@ def main():
                              descr='Error initializing Vlan object'
                              + ' or getting current vlan config.')
 
-    # Make sure port is not part of port channel
+    # Make sure ports are not part of a port channel
     try:
         portchannel = Portchannel(device, '99', 'bridged')
         pc_list = portchannel.get_all_members()
     except PYHPError as e:
         module.fail_json(msg=str(e),
                          descr='Error getting port channel information.')
-    if name in pc_list:
-        safe_fail(module, device,
-                  msg='{0} is currently part of a port channel.'.format(name)
-                  + ' Changes should be made to the port channel interface.')
+    for each in names:
+        if each in pc_list:
+            safe_fail(module, device,
+                      msg='{0} is currently part of a port channel.'.format(each)
+                      + ' Changes should be made to the port channel interface.')
 
     try:
-        switchport = Switchport(device, name)
+        switchports = InterfaceRange(device, Switchport, names)
     except PYHPError as e:
         safe_fail(module, device, msg=str(e),
                   descr='Error initialzing Switchport object.')
 
-    # Make sure interface exists and is ethernet
-    if not switchport.interface.iface_exists:
-        safe_fail(module, device,
-                  msg='{0} doesn\'t exist on the device.'.format(name))
+    # Make sure interfaces exist and are ethernet
+    for each, switchport in switchports.features.items():
+        if not switchport.interface.iface_exists:
+            safe_fail(module, device,
+                      msg='{0} doesn\'t exist on the device.'.format(each))
 
-    # Make sure interface is in bridged mode
-    try:
-        if_info = switchport.interface.get_config()
-    except PYHPError as e:
-        safe_fail(module, device, msg=str(e),
-                  descr='Error getting current interface config.')
+    # Make sure interfaces are in bridged mode, reading every
+    # interface and switchport from one get of each table
+    with device.table_cache():
+        for each, switchport in switchports.features.items():
+            try:
+                if_info = switchport.interface.get_config()
+            except PYHPError as e:
+                safe_fail(module, device, msg=str(e),
+                          descr='Error getting current interface config.')
 
-    if if_info.get('type') != 'bridged':
-        safe_fail(module, device, msg='{0} is not in bridged mode.'.format(name)
-                  + ' Please use the interface module to change that.')
+            if if_info.get('type') != 'bridged':
+                safe_fail(module, device, msg='{0} is not in bridged mode.'.format(each)
+                          + ' Please use the interface module to change that.')
 
-    try:
-        existing = switchport.get_config()
-    except PYHPError as e:
-        safe_fail(module, device, msg=str(e),
-                  descr='Error getting switchpot config.')
+        try:
+            existing = switchports.get_config()
+        except PYHPError as e:
+            safe_fail(module, device, msg=str(e),
+                      descr='Error getting switchpot config.')
 
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
-    if state == 'present':
-        delta = dict(set(proposed.items()).difference(
-            existing.items()))
-        if delta:
-            delta['link_type'] = proposed.get('link_type')
-            pvid = proposed.get('pvid')
-            if pvid:
-                delta['pvid'] = pvid
-
-            switchport.build(stage=True, **delta)
-    elif state == 'default':
-        defaults = switchport.get_default()
-        delta = dict(set(existing.items()).difference(
-            defaults.items()))
-        if delta:
-            switchport.default(stage=True)
-    elif state == 'absent':
-        # options = {'link_type': "module.params.get('link_type')",
-        #                   'pvid': "module.params.get('pvid')",
-        #                   'permitted_vlans': "module.params.get('permitted_vlans')",
-        #                   'untaggedvlan': "module.params.get('untaggedvlan')",
-        #                   'taggedvlan': "module.params.get('taggedvlan')"}
-        # options = dict((k, v) for k, v in module.params.items()
-        #                 if v is not None and k not in filtered_keys)
-        defaults = switchport.get_default()
-        delta = dict(set(existing.items()).difference(
-            defaults.items()))
-        if delta:
-            if module.params.get('link_type') == 'hybrid':
-                switchport.remove_hybrid(stage=True)
-            if module.params.get('link_type') == 'trunk':
-                switchport.remove_trunk(stage=True)
-            if module.params.get('link_type') == 'access':
-                switchport.remove_access(stage=True)
+    for each, switchport in switchports.each():
+        if state == 'present':
+            delta = dict(set(proposed.items()).difference(
+                existing[each].items()))
+            if delta:
+                delta['link_type'] = proposed.get('link_type')
+                pvid = proposed.get('pvid')
+                if pvid:
+                    delta['pvid'] = pvid
+
+                switchport.build(stage=True, **delta)
+        elif state == 'default':
+            defaults = switchport.get_default()
+            delta = dict(set(existing[each].items()).difference(
+                defaults.items()))
+            if delta:
+                switchport.default(stage=True)
+        elif state == 'absent':
+            defaults = switchport.get_default()
+            delta = dict(set(existing[each].items()).difference(
+                defaults.items()))
+            if delta:
+                if module.params.get('link_type') == 'hybrid':
+                    switchport.remove_hybrid(stage=True)
+                if module.params.get('link_type') == 'trunk':
+                    switchport.remove_trunk(stage=True)
+                if module.params.get('link_type') == 'access':
+                    switchport.remove_access(stage=True)
     commands = None
     end_state = existing
 
@@ -312,13 +341,18 @@ def main():
                       commands=commands)
         else:
             try:
+                # the changes of every interface go out together
                 device.execute_staged()
-                end_state = switchport.get_config()
+                end_state = switchports.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='Error during command execution.')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
@@ -15,7 +15,9 @@ options:
     vlanid:
         description:
             - VLAN ID to configure
-            - eg:vlanid=30-40 or vlanid=30
+            - eg:vlanid=30-40 or vlanid=30 or vlanid=10,20,30-40
+            - Ranges and lists are read and configured in bulk, with one
+              paged read of the VLAN table and one edit per 1000 VLANs
         required: true
         default: null
         choices: []
@@ -90,6 +92,9 @@ EXAMPLES = """
 # ensure VLAN 10 does not exist
 - comware_vlan: vlanid=10 state=absent username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+# ensure VLANs 100-3000 and 3500 exist
+- comware_vlan: vlanid=100-3000,3500 state=present username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -113,9 +118,56 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 
+def expand_vlans(vlanid, name=None, descr=None):
+    """Return the VLANs of a vlanid parameter, e.g. '10', '10-20' or
+    '10,20-30', as dictionaries. Names and descriptions are numbered
+    along each range. Raises VlanIDError for a malformed or
+    descending range, e.g. '20-10'.
+    """
+    vlans = []
+    for item in vlanid.split(','):
+        match = re.match(r'^\s*(\d+)\s*(?:-\s*(\d+))?\s*$', item)
+        if not match:
+            raise VlanIDError
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if last < first:
+            raise VlanIDError
+
+        vlan_name = name
+        vlan_descr = descr
+        for each in range(first, last + 1):
+            vlans.append(dict(vlanid=str(each), name=vlan_name,
+                              descr=vlan_descr))
+            digs = re.findall(r'\d+', vlan_name) if name is not None else []
+            if digs:
+                vlan_name = re.sub(r'\d+', str(int(digs[0]) + 1), vlan_name)
+            elif name is not None:
+                vlan_name = name + str(each + 1)
+            if descr is not None:
+                vlan_descr = descr + '_' + str(each + 1)
+
+    return vlans
+
+
+def get_vlans(vlan, proposed):
+    """Return the configuration of the VLANs proposed, keyed by VLAN
+    ID: from a single get for one VLAN, else from the VLAN table.
+    """
+    if len(proposed) == 1:
+        config = vlan.get_config()
+        if config:
+            return {config['vlanid']: config}
+        return {}
+
+    return vlan.get_vlan_table()
+
+
 def main():
     module = AnsibleModule(
         argument_spec=dict(
@@ -148,95 +200,38 @@ def main():
     descr = module.params['descr']
     state = module.params['state']
     changed = False
-    descr_a = module.params['descr']
-    name_a = module.params['name']
-    vlanidlist = []
-    digs = []
-    if re.search(r'(\d+)-(\d+)', vlanid, re.I)!=None:
-        t = re.search(r'(\d+)-(\d+)', vlanid, re.I)
-        vlanidlist.append(int(t.group(1)))
-        vlanidlist.append(int(t.group(2)))
-        f = vlanidlist
-        for vlanid in range(f[0],f[1]+1):
-            vlanid = str(vlanid)
-            dig=re.compile(r'\d+')
-            if name_a !=None:
-                digs = dig.findall(name)
-            args = dict(vlanid=vlanid, name=name, descr=descr)
-            if digs !=[]:
-                digs = int(digs[0])+1
-                name = re.sub(r'\d+',str(digs),name)
-            elif digs ==[] and name_a !=None:
-                num = int(vlanid)+1
-                name = name_a +str(num)
-            if descr != None:
-                num = int(vlanid)+1
-                descr = descr_a + "_"+str(num)
-            proposed = dict((k, v) for k, v in args.items() if v is not None)
-            try:
-                look_for_keys = module.params['look_for_keys']
-                device.open(look_for_keys=look_for_keys)
-            except ConnectionError as e:
-                safe_fail(module, device, msg=str(e))
 
-            try:
-                vlan = Vlan(device, vlanid)
-                vlan.param_check(**proposed)
-            except LengthOfStringError as lose:
-                safe_fail(module, device, msg=str(lose))
-            except VlanIDError as vie:
-                safe_fail(module, device, msg=str(vie))
-            except PYHPError as e:
-                safe_fail(module, device, msg=str(e))
+    proposed = []
+    try:
+        for args in expand_vlans(vlanid, name, descr):
+            each = dict((k, v) for k, v in args.items() if v is not None)
+            Vlan(device, each['vlanid']).param_check(**each)
+            proposed.append(each)
+    except LengthOfStringError as lose:
+        safe_fail(module, msg=str(lose))
+    except VlanIDError as vie:
+        safe_fail(module, msg=str(vie))
+
+    try:
+        look_for_keys = module.params['look_for_keys']
+        device.open(look_for_keys=look_for_keys)
+    except ConnectionError as e:
+        safe_fail(module, device, msg=str(e))
+
+    vlan = Vlan(device, proposed[0]['vlanid'])
+    try:
+        table = get_vlans(vlan, proposed)
+    except PYHPError as e:
+        safe_fail(module, device, msg=str(e),
+                  descr='error getting vlan config')
+
+    delta = vlan.get_bulk_delta(proposed, state=state, existing=table)
+    if delta:
+        vlan.build_bulk(delta, stage=True)
 
-            try:
-                existing = vlan.get_config()
-            except PYHPError as e:
-                safe_fail(module, device, msg=str(e),
-                          descr='error getting vlan config')
-
-            if state == 'present':
-                delta = dict(set(proposed.items()).difference(
-                    existing.items()))
-                if delta:
-                    vlan.build(stage=True, **delta)
-            elif state == 'absent':
-                if existing:
-                    vlan.remove(stage=True)
-    else:
-        args = dict(vlanid=vlanid, name=name, descr=descr)
-        proposed = dict((k, v) for k, v in args.items() if v is not None)
-
-        try:
-            look_for_keys = module.params['look_for_keys']
-            device.open(look_for_keys=look_for_keys)
-        except ConnectionError as e:
-            safe_fail(module, device, msg=str(e))
-
-        try:
-            vlan = Vlan(device, vlanid)
-            vlan.param_check(**proposed)
-        except LengthOfStringError as lose:
-            safe_fail(module, device, msg=str(lose))
-        except VlanIDError as vie:
-            safe_fail(module, device, msg=str(vie))
-        except PYHPError as e:
-            safe_fail(module, device, msg=str(e))
-
-        try:
-            existing = vlan.get_config()
-        except PYHPError as e:
-            safe_fail(module, device, msg=str(e),
-                      descr='error getting vlan config')
-        if state == 'present':
-            delta = dict(set(proposed.items()).difference(
-                existing.items()))
-            if delta:
-                vlan.build(stage=True, **delta)
-        elif state == 'absent':
-            if existing:
-                vlan.remove(stage=True)
     commands = None
+    existing = [table[each['vlanid']] for each in proposed
+                if each['vlanid'] in table]
     end_state = existing
 
     if device.staged:
@@ -247,20 +242,28 @@ def main():
                       commands=commands)
         else:
             try:
-                device.execute_staged()
-                end_state = vlan.get_config()
+                # each chunk of VLANs stays its own edit_config
+                device.execute_staged(coalesce=False)
+                table = get_vlans(vlan, proposed)
+                end_state = [table[each['vlanid']] for each in proposed
+                             if each['vlanid'] in table]
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='error during execution')
             changed = True
 
     results = {}
-    results['proposed'] = proposed
-    results['existing'] = existing
+    if len(proposed) == 1:
+        results['proposed'] = proposed[0]
+        results['existing'] = existing[0] if existing else {}
+        results['end_state'] = end_state[0] if end_state else {}
+    else:
+        results['proposed'] = proposed
+        results['existing'] = existing
+        results['end_state'] = end_state
     results['state'] = state
     results['commands'] = commands
     results['changed'] = changed
-    results['end_state'] = end_state
 
     safe_exit(module, device, **results) 
 
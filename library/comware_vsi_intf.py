@@ -16,8 +16,21 @@ notes:
 options:
     vsi_intf:
         description:
-            - The vsi interface view to config
-        required: true
+            - The vsi interface view to config. Required unless
+              interfaces is given.
+        required: false
+        default: null
+        choices: []
+        aliases: []
+    interfaces:
+        description:
+            - List of interfaces to configure the same way, instead of
+              vsi_intf. Items can be Comware ranges, e.g.
+              Ten-GigabitEthernet1/0/1 to 1/0/48. The existing settings
+              of all of them are read once and the changes are pushed
+              together. existing and end_state are then keyed by
+              interface.
+        required: false
         default: null
         choices: []
         aliases: []
@@ -99,6 +112,10 @@ EXAMPLES = """
        # comware_vsi_intf: vsi_intf=Vsi-interface1 binding=vpna macaddr=201a-101a-40fa  local_proxy=arp \
        distribute_gateway=local username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
 
+     # - name:  bind a range of vsi interfaces
+       # comware_vsi_intf: interfaces="Vsi-interface1 to Vsi-interface8" binding=vpna \
+       username={{ username }} password={{ password }} hostname={{ inventory_hostname }}
+
 """
 
 import socket
@@ -109,6 +126,8 @@ try:
     from pyhpecw7.features.interface import Interface
     from pyhpecw7.utils.validate import valid_ip_network
     from pyhpecw7.features.vsi_intf import Vsi
+    from pyhpecw7.features.interface_range import InterfaceRange,\
+        expand_interfaces
     from pyhpecw7.features.errors import *
     from pyhpecw7.errors import *
 except ImportError as ie:
@@ -124,6 +143,8 @@ def safe_fail(module, device=None, **kwargs):
 def safe_exit(module, device=None, **kwargs):
     if device:
         device.close()
+        if device.perf.enabled:
+            kwargs['perf'] = device.perf.summary()
     module.exit_json(**kwargs)
 
 def ip_stringify(**kwargs):
@@ -139,7 +160,8 @@ def checks(existing, proposed, module):
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            vsi_intf=dict(required=True, type='str'),
+            vsi_intf=dict(required=False, type='str'),
+            interfaces=dict(type='list'),
             binding=dict(type='str'),
             macaddr=dict(type='str'),
             local_proxy=dict(choices=['nd', 'arp']),
@@ -151,6 +173,8 @@ def main():
             password=dict(required=False, default=None),
             look_for_keys=dict(default=False, type='bool'),
         ),
+        required_one_of=[['vsi_intf', 'interfaces']],
+        mutually_exclusive=[['vsi_intf', 'interfaces']],
         supports_check_mode=True
     )
     if not HAS_PYHP:
@@ -158,7 +182,8 @@ def main():
                          + 'module.', error=str(ie))
 
     filtered_keys = ('state', 'hostname', 'username', 'password',
-                     'port', 'CHECKMODE', 'name', 'look_for_keys')
+                     'port', 'CHECKMODE', 'name', 'interfaces',
+                     'look_for_keys')
 
     username = module.params['username']
     password = module.params['password']
@@ -176,6 +201,11 @@ def main():
     proposed = dict((k, v) for k, v in module.params.items()
                     if v is not None and k not in filtered_keys)
 
+    try:
+        names = expand_interfaces(module.params['interfaces'] or [vsi_intf])
+    except InterfaceRangeError as e:
+        safe_fail(module, msg=str(e))
+
     try:
         look_for_keys = module.params['look_for_keys']
         device.open(look_for_keys=look_for_keys)
@@ -183,13 +213,14 @@ def main():
         safe_fail(module, device, msg=str(e), descr='error opening device conn')
 
     try:
-        vsi_interface = Interface(device,vsi_intf)
+        vsi_interfaces = InterfaceRange(device, Interface, names)
     except PYHPError as e:
         safe_fail(module, device, msg=str(e), descr='could not obtain existing')
 
-    if vsi_interface._iface_type(vsi_intf)[1] != 'Vsi-interface':
-        safe_fail(module,msg='This module is used for config vsi interface '+
-                             ', Other port types can be processed using the interface module')
+    for each, vsi_interface in vsi_interfaces.features.items():
+        if vsi_interface._iface_type(each)[1] != 'Vsi-interface':
+            safe_fail(module,msg='This module is used for config vsi interface '+
+                                 ', Other port types can be processed using the interface module')
 
     try:
         l2vpn = L2VPN(device)
@@ -201,11 +232,12 @@ def main():
         safe_fail(module, device, msg='l2vpn needs to be enabled.')
 
     try:
-        interface = Vsi(device, vsi_intf)
-        existing = interface.get_config()
+        vsis = InterfaceRange(device, Vsi, names)
+        existing = vsis.get_config()
     except PYHPError as e:
         safe_fail(module, device, msg=str(e), descr='could not obtain existing')
 
+    interface = vsis.features[names[0]]
     if binding not in interface.get_vpn_config():
         safe_fail(module,msg='The vpn-intance you provided does not exist, please create it first')
 
@@ -216,15 +248,16 @@ def main():
                   descr='There was problem with the supplied parameters.',
                   msg=str(e))
 
-    if state == 'present':
-        delta = proposed
-        if delta:
-            interface.build(stage=True,**delta)
+    for each, interface in vsis.each():
+        if state == 'present':
+            delta = proposed
+            if delta:
+                interface.build(stage=True,**delta)
 
-    elif state == 'default':
-        delta = dict(vsi=vsi)
-        if delta:
-            interface.remove(stage=True,**delta)
+        elif state == 'default':
+            delta = dict(vsi=vsi)
+            if delta:
+                interface.remove(stage=True,**delta)
 
     commands = None
     end_state = existing
@@ -238,12 +271,16 @@ def main():
         else:
             try:
                 device.execute_staged()
-                end_state = interface.get_config()
+                end_state = vsis.get_config()
             except PYHPError as e:
                 safe_fail(module, device, msg=str(e),
                           descr='failed during execution')
             changed = True
 
+    if not module.params['interfaces']:
+        existing = existing[names[0]]
+        end_state = end_state[names[0]]
+
     results = {}
     results['proposed'] = proposed
     results['existing'] = existing
@@ -0,0 +1,253 @@
+"""Record NETCONF sessions to HPCOM7 devices and replay them offline.
+
+(c) Copyright 2016 Hewlett Packard Enterprise Development LP Licensed under the Apache License, Version 2.0
+(the "License"); you may not use this file except in compliance with the License. You may obtain a copy of the License
+at http://www.apache.org/licenses/LICENSE-2.0 Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing permissions and limitations under the License.
+
+"""
+import collections
+import gzip
+import json
+import re
+import threading
+import time
+from ncclient import manager
+from ncclient.capabilities import Capabilities
+from ncclient.transport.errors import TransportError
+from ncclient.transport.session import Session
+from pyhpecw7.utils.xml.namespaces import NETCONFBASE
+
+CASSETTE_VERSION = 1
+
+REDACTED = '******'
+
+# CLI secrets: the word after simple/cipher/hash/plain, and passwords
+# or SNMP communities given without one of those keywords
+CLI_SECRETS = (
+    re.compile(r'(\b(?:simple|cipher|hash|plain)\s+)\S+'),
+    re.compile(r'(\b(?:authentication-password|community\s+(?:read|write))\s+)'
+               r'(?!(?:simple|cipher|hash|plain)\b)\S+'),
+)
+
+# XML leaves holding secrets, e.g. <Password> or <SimplePwd>,
+# except ones that only describe them, e.g. <PasswordType>
+XML_SECRET = re.compile(
+    r'<((?:[\w.-]+:)?\w*(?:Password|Pwd|Secret|Key|Community)\w*)([^>]*)>([^<]+)</\1>')
+XML_SECRET_EXEMPT = ('Type', 'Id', 'ID', 'Mode', 'Index')
+
+_MESSAGE_ID = re.compile(r'message-id="([^"]*)"')
+
+
+def redact(text):
+    """Replace the secrets of a NETCONF message, e.g. passwords
+    of CLI commands and configuration, with ``REDACTED``.
+    """
+    for pattern in CLI_SECRETS:
+        text = pattern.sub(r'\1' + REDACTED, text)
+
+    def leaf(match):
+        if match.group(1).endswith(XML_SECRET_EXEMPT):
+            return match.group(0)
+        return '<{0}{1}>{2}</{0}>'.format(match.group(1), match.group(2), REDACTED)
+
+    return XML_SECRET.sub(leaf, text)
+
+
+def message_id(message):
+    """Return the message-id of a NETCONF message, or None.
+    """
+    match = _MESSAGE_ID.search(message, 0, 512)
+    if match:
+        return match.group(1)
+    return None
+
+
+def normalize(request):
+    """Return a request without what changes between sessions, its
+    message-id and secrets, to match it with a recorded one.
+    """
+    return redact(_MESSAGE_ID.sub('message-id=""', request, 1))
+
+
+class Cassette(object):
+    """This class holds the requests, replies and latencies of a
+    NETCONF session, as recorded from a device.
+
+    Secrets are redacted before anything is kept, and live requests
+    are redacted the same way to be matched when replaying.
+
+    Args:
+        host (str): OPTIONAL - the device recorded.
+
+    Attributes:
+        interactions (list): dictionaries with the 'request', 'reply'
+            and 'latency' of every RPC, in the order they were sent.
+        capabilities (list): the capabilities the device announced.
+        session_id (str): the NETCONF session-id of the recording.
+    """
+    def __init__(self, host=None):
+        self.host = host
+        self.interactions = []
+        self.capabilities = []
+        self.session_id = None
+
+        self._lock = threading.Lock()
+        self._replies = None
+
+    @classmethod
+    def load(cls, path):
+        """Read a cassette written by ``save``.
+
+        Raises:
+            IOError: if the file can't be read.
+            ValueError: if the file isn't a cassette of this version.
+        """
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            data = json.load(f)
+
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError('{0} is not a version {1} cassette.'.format(
+                path, CASSETTE_VERSION))
+
+        cassette = cls(data.get('host'))
+        cassette.interactions = data['interactions']
+        cassette.capabilities = data['capabilities']
+        cassette.session_id = data.get('session_id')
+        return cassette
+
+    def save(self, path):
+        """Write the cassette as JSON, gzipped if ``path`` ends with '.gz'.
+        """
+        data = dict(version=CASSETTE_VERSION, host=self.host,
+                    session_id=self.session_id,
+                    capabilities=self.capabilities,
+                    interactions=self.interactions)
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    def record(self, session):
+        """Record every RPC of a connected ncclient session.
+
+        Args:
+            session: the ncclient transport session, i.e.
+                ``manager.connect(...)._session``.
+        """
+        self.capabilities = list(session.server_capabilities)
+        self.session_id = session.id
+        pending = {}
+
+        send = session.send
+        dispatch = session._dispatch_message
+
+        def send_message(message):
+            pending[message_id(message)] = (normalize(message), time.time())
+            return send(message)
+
+        def dispatch_message(raw):
+            request = pending.pop(message_id(raw), None)
+            if request is not None:
+                reply = redact(_MESSAGE_ID.sub('message-id=""', raw, 1))
+                with self._lock:
+                    self.interactions.append(dict(
+                        request=request[0], reply=reply,
+                        latency=round(time.time() - request[1], 6)))
+            return dispatch(raw)
+
+        session.send = send_message
+        session._dispatch_message = dispatch_message
+
+    def play(self, request):
+        """Return the recorded reply to a live request and its latency.
+
+        Replies to the same request are served in the order they were
+        recorded, the last one repeating once they run out.
+
+        Returns:
+            A tuple of the reply, with the request's message-id, and
+            its latency, or (None, 0) if the request wasn't recorded.
+        """
+        with self._lock:
+            if self._replies is None:
+                self._replies = collections.defaultdict(collections.deque)
+                for each in self.interactions:
+                    self._replies[each['request']].append(each)
+
+            replies = self._replies.get(normalize(request))
+            if not replies:
+                return None, 0
+            interaction = replies[0] if len(replies) == 1 else replies.popleft()
+
+        reply = _MESSAGE_ID.sub('message-id="{0}"'.format(message_id(request) or ''),
+                                interaction['reply'], 1)
+        return reply, interaction['latency']
+
+    def connect(self, device_params=None, timeout=30, scale=1.0):
+        """Return an ncclient manager served by this cassette
+        instead of a device.
+
+        Args:
+            device_params (dict): OPTIONAL - ncclient device parameters.
+                Defaults to the hpcomware handler.
+            timeout (int): OPTIONAL - RPC timeout of the manager.
+            scale (float): OPTIONAL - multiplier of the recorded
+                latencies, e.g. 0 replies immediately. Defaults to 1.0.
+        """
+        device_handler = manager.make_device_handler(
+            device_params or {'name': 'hpcomware'})
+        session = ReplaySession(self, device_handler, scale=scale)
+        return manager.Manager(session, device_handler, timeout=timeout)
+
+
+class ReplaySession(Session):
+    """An ncclient session answering requests from a ``Cassette``
+    after their recorded latency, without any device.
+
+    Requests that weren't recorded get an rpc-error reply.
+
+    Args:
+        cassette (Cassette): the recorded session.
+        device_handler: the ncclient device handler.
+        scale (float): OPTIONAL - multiplier of the recorded latencies.
+            Defaults to 1.0.
+    """
+    def __init__(self, cassette, device_handler, scale=1.0):
+        super(ReplaySession, self).__init__(
+            Capabilities(device_handler.get_capabilities()))
+        self.cassette = cassette
+        self.scale = scale
+        self._device_handler = device_handler
+        self._server_capabilities = Capabilities(cassette.capabilities)
+        self._id = cassette.session_id
+        self._connected = True
+
+    def send(self, message):
+        if not self.connected:
+            raise TransportError('Not connected to NETCONF server')
+
+        reply, latency = self.cassette.play(message)
+        if reply is None:
+            reply = self._not_recorded(message)
+
+        delay = latency * self.scale
+        if delay > 0:
+            timer = threading.Timer(delay, self._dispatch_message, [reply])
+            timer.daemon = True
+            timer.start()
+        else:
+            self._dispatch_message(reply)
+
+    def _not_recorded(self, message):
+        return ('<rpc-reply xmlns="{0}" message-id="{1}"><rpc-error>'
+                '<error-type>application</error-type>'
+                '<error-tag>operation-failed</error-tag>'
+                '<error-severity>error</error-severity>'
+                '<error-message>The request was not recorded in the cassette.'
+                '</error-message></rpc-error></rpc-reply>').format(
+                    NETCONFBASE, message_id(message) or '')
+
+    def close(self):
+        self._connected = False
@@ -11,15 +11,39 @@ from ncclient import manager
 from ncclient.operations.rpc import RPCError
 import ncclient.transport.errors as NcTransErrors
 import ncclient.operations.errors as NcOpErrors
-from pyhpecw7.features.facts import Facts
+from pyhpecw7.features.facts import Facts, FactsCache, FACTS_TTL
+from pyhpecw7.features.interface_table import InterfaceTable
+from pyhpecw7.features.running_config import RunningConfig
+from pyhpecw7.features.table_cache import TableCache
+from pyhpecw7.cassette import Cassette
+from pyhpecw7.perf import PerfRecorder, SessionMonitor, find_caller,\
+    new_event, log_event
+import contextlib
+import copy
 import time
 import socket
 from lxml import etree
-from pyhpecw7.utils.xml.namespaces import NETCONFBASE_C
+from pyhpecw7.utils.xml.namespaces import NETCONFBASE_C, HPDATA, HPBASE_C
+from pyhpecw7.utils.xml.lib import iter_elements, elem_to_dict, nc_element_maker
 from pyhpecw7.errors import NCTimeoutError, ConnectionClosedError, NCError,\
     ConnectionAuthenticationError, ConnectionSSHError, ConnectionUnkownHostError,\
     ConnectionError, LockConflictError, UnlockConflictError
 
+# first words of CLI commands that only read state and therefore
+# don't need the running datastore lock when sent with cli_display
+READ_ONLY_CLI = ('display', 'dir', 'more', 'ping', 'tracert')
+
+# config tags that add or remove interfaces, so the
+# shared interface table must be fetched again
+INTERFACE_TABLE_TAGS = ('LogicInterfaces', 'NewSubInterfaces')
+
+# config leaves, by module/table, that change a column the
+# shared interface table keeps, e.g. a port made routed
+INTERFACE_TABLE_LEAVES = {('Ifmgr', 'Interfaces'): ('PortLayer',)}
+
+# depth of table rows in an edit_config payload: config/top/Module/Table/Row
+_ROW_DEPTH = 4
+
 
 class HPCOM7(object):
     """This class manages the NETCONF connection to an HP Comware switch,
@@ -37,6 +61,23 @@ class HPCOM7(object):
             before timing out.
         ssh_config: OPTIONAL - enables parsing of a OpenSSH configuration
             file, either file in string, or defaults to ~/.ssh/config if True
+        open_delay: OPTIONAL - seconds to wait before connecting in
+            ``open()``.  Default is .25.  Pooled sessions set this to 0.
+        lock_wait: OPTIONAL - seconds ``lock()`` keeps retrying, with
+            backoff, while another session holds the NETCONF lock.
+            Default is 10.  0 fails on the first conflict.
+        facts_ttl: OPTIONAL - seconds the ``facts`` property serves
+            cached facts before fetching them again.  Default is
+            ``FACTS_TTL`` of ``pyhpecw7.features.facts``, 60.
+        perf_hooks: OPTIONAL - list of callables each called with the
+            event dictionary of every RPC, see ``pyhpecw7.perf.new_event``.
+        record: OPTIONAL - path of a cassette to record the session to,
+            with secrets redacted.  It is written by ``close()``, and
+            gzipped if the path ends with '.gz'.
+        replay: OPTIONAL - path of a recorded cassette to serve the
+            session from instead of connecting to the device.
+        replay_scale: OPTIONAL - multiplier of the recorded latencies
+            when replaying.  Default is 1.0.  0 replies immediately.
 
     Attributes:
         staged: Dictionary that stores XML objects prior to being sent to
@@ -50,6 +91,13 @@ class HPCOM7(object):
            to build this attribute.  Keys are user defined to make it
            possible to recall/view the specified object if more than one
            are being prepared to send.
+        rpcs_saved: Number of RPCs saved by ``coalesce_staged()`` during
+           the last ``execute_staged()``.
+        perf: ``PerfRecorder`` summing up the operation, caller, sizes
+           and timings of every RPC, ``open()`` and ``close()``.  Events
+           are also sent to ``perf_hooks`` and logged to the
+           'pyhpecw7.perf' logger at DEBUG level.
+        cassette: The ``Cassette`` being recorded or replayed, if any.
     """
     def __init__(self, **kvargs):
         self.host = kvargs.get('host')
@@ -58,9 +106,24 @@ class HPCOM7(object):
         self.port = kvargs.get('port') or 830
         self.timeout = kvargs.get('timeout') or 30
         self.ssh_config = kvargs.get('ssh_config', None)
+        self.open_delay = kvargs.get('open_delay', .25)
+        self.lock_wait = kvargs.get('lock_wait', 10)
+        self.facts_cache = FactsCache(ttl=kvargs.get('facts_ttl', FACTS_TTL))
         self.staged = []
-
+        self.rpcs_saved = 0
+        self.perf = PerfRecorder()
+        self.perf_hooks = list(kvargs.get('perf_hooks') or [])
+        self.record_path = kvargs.get('record')
+        self.replay_path = kvargs.get('replay')
+        self.replay_scale = kvargs.get('replay_scale', 1.0)
+        self.cassette = None
+
+        self._monitor = None
         self._locked = False
+        self._in_transaction = False
+        self._interface_table = None
+        self._running_config = None
+        self._table_cache = None
 
     def open(self,
              hostkey_verify=False,
@@ -77,9 +140,11 @@ class HPCOM7(object):
                 usual locations for ssh keys (e.g. ~/.ssh/id_*)
 
         Returns:
-            Connection to the device using ncclient's connect method.
+            Connection to the device using ncclient's connect method,
+            or to the cassette when replaying.
 
         Raises:
+            IOError: if the cassette to replay can't be read.
             ConnectionAuthenticationError: if there is an error authenticating
                 to the device.
             ConnectionSSHError: if NETCONF isn't enabled on the device, or the
@@ -88,49 +153,157 @@ class HPCOM7(object):
                 be resolved to an IP address.
             ConnectionError: if an unkown error occurs during connection
         """
-        time.sleep(.25)
-
-        try:
-            self.connection = manager.connect(host=self.host,
-                                              port=self.port,
-                                              username=self.username,
-                                              password=self.password,
-                                              device_params={'name': 'hpcomware'},
-                                              hostkey_verify=hostkey_verify,
-                                              allow_agent=allow_agent,
-                                              manager_params={'timeout': self.timeout},
-                                              look_for_keys=look_for_keys,
-                                              timeout=self.timeout,
-                                              ssh_config=self.ssh_config)
-
-        except NcTransErrors.AuthenticationError:
-            raise ConnectionAuthenticationError(self)
-        except NcTransErrors.SSHError:
-            raise ConnectionSSHError(
-                self, msg='There was an error connecting with SSH.'
-                ' The NETCONF server may be down or refused the connection.'
-                ' The connection may have timed out if the server wasn\'t reachable.')
-        except socket.gaierror:
-            raise ConnectionUnkownHostError(self)
-        except ImportError:
-            raise ImportError('ncclient does not have the comware extensions')
-        except Exception:
-            raise ConnectionError(self, msg='There was an unknown error while trying to connect.')
-
+        if self.replay_path:
+            self.cassette = Cassette.load(self.replay_path)
+            self.connection = self.cassette.connect(timeout=self.timeout,
+                                                    scale=self.replay_scale)
+            self._monitor = SessionMonitor(self.connection._session)
+            return self.connection
+
+        if self.open_delay:
+            time.sleep(self.open_delay)
+
+        event = new_event('open', find_caller())
+        with self._record(event):
+            start = time.time()
+            try:
+                self.connection = manager.connect(host=self.host,
+                                                  port=self.port,
+                                                  username=self.username,
+                                                  password=self.password,
+                                                  device_params={'name': 'hpcomware'},
+                                                  hostkey_verify=hostkey_verify,
+                                                  allow_agent=allow_agent,
+                                                  manager_params={'timeout': self.timeout},
+                                                  look_for_keys=look_for_keys,
+                                                  timeout=self.timeout,
+                                                  ssh_config=self.ssh_config)
+
+            except NcTransErrors.AuthenticationError:
+                raise ConnectionAuthenticationError(self)
+            except NcTransErrors.SSHError:
+                raise ConnectionSSHError(
+                    self, msg='There was an error connecting with SSH.'
+                    ' The NETCONF server may be down or refused the connection.'
+                    ' The connection may have timed out if the server wasn\'t reachable.')
+            except socket.gaierror:
+                raise ConnectionUnkownHostError(self)
+            except ImportError:
+                raise ImportError('ncclient does not have the comware extensions')
+            except Exception:
+                raise ConnectionError(self, msg='There was an unknown error while trying to connect.')
+            finally:
+                event['latency'] = time.time() - start
+
+        self._monitor = SessionMonitor(self.connection._session)
+        if self.record_path:
+            self.cassette = Cassette(self.host)
+            self.cassette.record(self.connection._session)
         return self.connection
 
     @property
     def facts(self):
         """
         A dictionary of a facts about the device.
-        ``None`` if not connected.
+        ``None`` if not connected.  Served from ``facts_cache``
+        for ``facts_ttl`` seconds.
         """
         if hasattr(self, 'connection'):
             if self.connection.connected:
-                facts = Facts(self)
+                facts = Facts(self, cache=self.facts_cache)
                 return dict(facts.facts)
         return None
 
+    @property
+    def interface_table(self):
+        """The ``InterfaceTable`` shared by every feature class
+        using this device. It is fetched with one get on first use.
+        """
+        if self._interface_table is None:
+            self._interface_table = InterfaceTable(self)
+        return self._interface_table
+
+    @property
+    def running_config(self):
+        """The ``RunningConfig`` snapshot shared by every CLI-scraping
+        feature class using this device. It is fetched with one
+        ``display current-configuration`` on first use.
+        """
+        if self._running_config is None:
+            self._running_config = RunningConfig(self)
+        return self._running_config
+
+    def invalidate_caches(self, config=None):
+        """Drop cached device state that a config push may have changed.
+
+        Called after every RPC that isn't read only.
+
+        Args:
+            config: The config payload that was sent. Cached facts,
+                the running config snapshot and the tables of
+                ``table_cache()`` are always dropped. The interface table
+                is dropped if the payload adds or removes interfaces,
+                changes a column it keeps, e.g. PortLayer, or is CLI,
+                or is None.
+        """
+        self.facts_cache.invalidate(self.host, self.port)
+        if self._running_config is not None:
+            self._running_config.invalidate()
+        if self._table_cache is not None:
+            self._table_cache.invalidate()
+
+        table = self._interface_table
+        if table is None or not table.loaded:
+            return
+
+        if not isinstance(config, etree._Element):
+            table.invalidate()
+        elif self._changes_interface_table(config):
+            table.invalidate()
+
+    def _changes_interface_table(self, config):
+        """Return whether an edit_config payload adds or removes
+        interfaces or changes a column of the interface table.
+        """
+        for ele in config.iter(tag=etree.Element):
+            tag = etree.QName(ele).localname
+            if tag in INTERFACE_TABLE_TAGS:
+                return True
+
+            row = ele.getparent()
+            table = row.getparent() if row is not None else None
+            module = table.getparent() if table is not None else None
+            if module is None:
+                continue
+            leaves = INTERFACE_TABLE_LEAVES.get(
+                (etree.QName(module).localname, etree.QName(table).localname), ())
+            if tag in leaves:
+                return True
+
+        return False
+
+    @contextlib.contextmanager
+    def table_cache(self):
+        """Serve the single-row gets sent inside the block from whole
+        tables fetched once, see ``TableCache``.
+
+        Used to read the same feature on many interfaces, e.g. the
+        switchport settings of 48 ports, with one get per table.
+        Nested blocks share the cache of the outermost one, and any
+        change to the configuration drops it.
+
+        Yields:
+            The ``TableCache``.
+        """
+        outer = self._table_cache
+        if outer is None:
+            self._table_cache = TableCache(self)
+        try:
+            yield self._table_cache
+        finally:
+            if outer is None:
+                self._table_cache = None
+
     @property
     def connected(self):
         """``True`` if the NETCONF session to the device is open
@@ -142,13 +315,70 @@ class HPCOM7(object):
         return False
 
     def close(self):
-        """Close the NETCONF connection to the HP switch.
+        """Close the NETCONF connection to the HP switch, and write
+        the cassette if the session is recorded.
         """
         try:
             if self.connected:
+                self._close_session()
+        finally:
+            if self.record_path and self.cassette is not None:
+                self.cassette.save(self.record_path)
+
+    def _close_session(self):
+        event = new_event('close', find_caller())
+        event['rpcs'] = 1
+        with self._record(event):
+            since = time.time()
+            try:
                 self.connection.close_session()
-        except NcOpErrors.TimeoutExpiredError:
-            raise NCTimeoutError
+            except NcOpErrors.TimeoutExpiredError:
+                raise NCTimeoutError
+            finally:
+                self._measure(event, since)
+
+    @contextlib.contextmanager
+    def _record(self, event):
+        """Time the block as an RPC event, then send the event
+        to ``perf``, ``perf_hooks`` and the 'pyhpecw7.perf' log.
+        """
+        start = time.time()
+        try:
+            yield event
+        except Exception as e:
+            event['error'] = type(e).__name__
+            raise
+        finally:
+            event['seconds'] = time.time() - start
+            self._emit(event)
+
+    def _emit(self, event):
+        event['host'] = self.host
+        self.perf.record(event)
+        for hook in self.perf_hooks:
+            hook(event)
+        log_event(event)
+
+    def _measure(self, event, since):
+        """Fill in the sizes, latency and parse time of an event from
+        the ``SessionMonitor``, for the last request sent since ``since``.
+        """
+        if self._monitor is None:
+            return
+
+        message_id, request_bytes, sent = self._monitor.last_sent
+        if sent >= since:
+            event['request_bytes'] = request_bytes
+            self._measure_reply(event, message_id, sent)
+
+    def _measure_reply(self, event, message_id, sent):
+        """Fill in the reply size, latency and parse time of an event
+        for a request sent at ``sent``, parsed until now.
+        """
+        received, event['reply_bytes'] = self._monitor.reply(message_id)
+        if received is not None:
+            event['latency'] = max(received - sent, 0.0)
+            event['parse_time'] = max(time.time() - received, 0.0)
 
     def stage_config(self, config, cfg_type):
         """Append config object to the staging area.
@@ -191,11 +421,24 @@ class HPCOM7(object):
 
         return cfgs
 
-    def execute(self, run_cmd_func, args=[], kwargs={}):
+    def execute(self, run_cmd_func, args=[], kwargs={}, read_only=False,
+                operation=None, parse=None):
         """Safely execute the supplied function with args and kwargs.
 
+        The running datastore is locked around the call, unless the
+        call is read only or is made inside ``transaction()``, which
+        already holds it.
+
+        Every call is recorded as an RPC event, see ``perf``.
+
         Args:
             run_cmd_func(executable): Function to be run.
+            read_only (bool): OPTIONAL - the call doesn't change the
+                device, so no lock is taken. Defaults to False.
+            operation (str): OPTIONAL - name of the RPC in its event.
+                Defaults to the name of ``run_cmd_func``.
+            parse (callable): OPTIONAL - turns the reply into the value
+                returned, timed as part of the parse time.
 
         Returns:
             The return value of the supplied function.
@@ -208,56 +451,256 @@ class HPCOM7(object):
         if self.connected is not True:
             raise ConnectionClosedError(self)
 
-        try:
-            self.lock()
-            rsp = run_cmd_func(*args, **kwargs)
-        except RPCError as e:
-            raise NCError(e)
-        except NcOpErrors.TimeoutExpiredError:
-            raise NCTimeoutError
-        except NcTransErrors.TransportError:
+        per_rpc_lock = not (read_only or self._in_transaction)
+        event = new_event(operation or self._operation_name(run_cmd_func),
+                          find_caller())
+        event['rpcs'] = 3 if per_rpc_lock else 1
+        with self._record(event):
+            try:
+                if per_rpc_lock:
+                    since = time.time()
+                    self.lock()
+                    event['lock_wait'] = time.time() - since
+                since = time.time()
+                try:
+                    rsp = run_cmd_func(*args, **kwargs)
+                    if parse is not None:
+                        rsp = parse(rsp)
+                finally:
+                    self._measure(event, since)
+            except RPCError as e:
+                raise NCError(e)
+            except NcOpErrors.TimeoutExpiredError:
+                raise NCTimeoutError
+            except NcTransErrors.TransportError:
+                raise ConnectionClosedError(self)
+            finally:
+                if per_rpc_lock:
+                    self.unlock()
+
+        return rsp
+
+    def _operation_name(self, run_cmd_func):
+        """Return the name of the RPC a function sends, e.g. 'get'
+        for ``connection.get``, which is a partial of ncclient's
+        ``Get`` operation class.
+        """
+        func = getattr(run_cmd_func, 'args', None) and run_cmd_func.args[0]
+        return getattr(func or run_cmd_func, '__name__', 'rpc')
+
+    @contextlib.contextmanager
+    def transaction(self, target='running'):
+        """Hold the NETCONF lock for every RPC run inside the block.
+
+        The lock is taken once on entry and released once on exit,
+        instead of around each RPC. Nested transactions reuse the
+        outer lock.
+
+        Example::
+
+            with device.transaction():
+                device.edit_config(config)
+                device.cli_config(commands)
+
+        Args:
+            target (str): datastore to lock. Defaults to 'running'.
+
+        Raises:
+            LockConflictError: if another process holds the NETCONF lock.
+            NCTimeoutError: if a client-side timeout has occured.
+            ConnectionClosedError: if the NETCONF session is closed.
+        """
+        if self._in_transaction:
+            yield self
+            return
+
+        if self.connected is not True:
             raise ConnectionClosedError(self)
+
+        event = new_event('lock', find_caller())
+        event['rpcs'] = 1
+        with self._record(event):
+            since = time.time()
+            try:
+                self.lock(target)
+            except NcOpErrors.TimeoutExpiredError:
+                raise NCTimeoutError
+            except NcTransErrors.TransportError:
+                raise ConnectionClosedError(self)
+            finally:
+                event['lock_wait'] = time.time() - since
+                self._measure(event, since)
+
+        self._in_transaction = True
+        try:
+            yield self
         finally:
-            self.unlock()
+            self._in_transaction = False
+            event = new_event('unlock', event['caller'])
+            event['rpcs'] = 1
+            with self._record(event):
+                since = time.time()
+                try:
+                    self.unlock(target)
+                finally:
+                    self._measure(event, since)
+
+    def coalesce_staged(self):
+        """Merge adjacent staged items that can be sent as one RPC.
+
+        Consecutive 'edit_config' payloads are merged into a single
+        <config> tree and consecutive 'cli_config' command lists are
+        concatenated. Every other config type is a barrier, so the
+        relative order of staged items is kept.
+
+        Payloads are only merged where no node would change meaning or
+        order: a node is merged only into the last node of the merged
+        tree at the same level, when both have the same tag and the
+        same attributes, including ``operation``. Anything else, and
+        every table row, is appended, so the device applies the merged
+        tree in the order the items were staged.
 
-        return rsp
+        Returns:
+            The number of RPCs saved.
+        """
+        coalesced = []
+        for command in self.staged:
+            cfg_type = command['cfg_type']
+            last = coalesced[-1] if coalesced else None
+
+            if last and last['cfg_type'] == cfg_type == 'edit_config':
+                merged = self._merge_edit_config(last['config'], command['config'])
+                if merged is not None:
+                    last['config'] = merged
+                    continue
+            elif last and last['cfg_type'] == cfg_type == 'cli_config':
+                last['config'] = self._merge_cli_config(last['config'], command['config'])
+                continue
+
+            coalesced.append(dict(command))
+
+        saved = len(self.staged) - len(coalesced)
+        self.staged[:] = coalesced
+
+        return saved
 
-    def execute_staged(self, target='running'):
+    def _merge_edit_config(self, config, other):
+        """Return a copy of ``config`` with the contents of ``other``
+        merged in, or None if they can't be merged safely.
+        """
+        if not isinstance(config, etree._Element)\
+                or not isinstance(other, etree._Element)\
+                or config.tag != other.tag\
+                or dict(config.attrib) != dict(other.attrib):
+            return None
+
+        merged = copy.deepcopy(config)
+        if self._merge_children(merged, other, 0):
+            return merged
+
+        return None
+
+    def _merge_children(self, base, other, depth):
+        """Merge the children of ``other`` into ``base``.
+
+        Only the last child of ``base`` can take the contents of a
+        child of ``other``, so that e.g. a VLAN edit staged after an
+        Ifmgr edit is not moved before it.
+
+        Returns False, leaving ``base`` partially merged, on a conflict.
+        """
+        for child in other:
+            match = None
+            if len(base) and base[-1].tag == child.tag:
+                match = base[-1]
+
+            if match is None or depth + 1 >= _ROW_DEPTH:
+                base.append(copy.deepcopy(child))
+                continue
+
+            if dict(match.attrib) != dict(child.attrib)\
+                    or not self._is_container(match)\
+                    or not self._is_container(child):
+                return False
+
+            if not self._merge_children(match, child, depth + 1):
+                return False
+
+        return True
+
+    def _is_container(self, ele):
+        """Return whether an element only holds other elements
+        that have children, i.e. it has no leaf values of its own.
+        """
+        if ele.text and ele.text.strip():
+            return False
+
+        return all(len(child) for child in ele)
+
+    def _merge_cli_config(self, cmds, other):
+        """Concatenate two CLI command lists.
+
+        Each cli_config call starts in system view, so the second list
+        is preceded by 'return' and 'system-view' to start from the
+        same view no matter where the first list left off.
+        """
+        if isinstance(cmds, str):
+            cmds = cmds.split('\n')
+        if isinstance(other, str):
+            other = other.split('\n')
+
+        return list(cmds) + ['return', 'system-view'] + list(other)
+
+    def execute_staged(self, target='running', coalesce=True):
         """Execute/Push the XML object(s) or CLI strings in the staging
         area (self.staged) to the device.
 
+        The whole staging area is pushed inside a single ``transaction()``,
+        so the NETCONF lock is taken and released once for the batch.
+
         Args:
             target (str): must be set to running.
                 It *could* change in the future
                 if HP supports candidate configurations, etc.
                 Only used for 'edit_config' API calls.
                 Defaults to 'running'.
+            coalesce (bool): OPTIONAL - merge adjacent items with
+                ``coalesce_staged()`` first. Defaults to True.
 
         Returns:
             A list of responses received from the device.
             Responses with CLI information are extracted from the XML
-            response.
+            response.  When items were coalesced there is one response
+            per RPC sent, not per item staged.
         """
         rsps = []
-        for command in self.staged:
-            cfg_type = command['cfg_type']
-            config = command['config']
-            args = []
-            kwargs = {}
-            if cfg_type == 'edit_config':
-                run_cmd_func, kwargs = self.edit_config, dict(target=target, config=config)
-            elif cfg_type == 'action':
-                run_cmd_func, args = self.action, [config]
-            elif cfg_type == 'save':
-                run_cmd_func, args = self.save, [config]
-            elif cfg_type == 'rollback':
-                run_cmd_func, args = self.rollback, [config]
-            elif cfg_type == 'cli_config':
-                run_cmd_func, args = self.cli_config, [config]
-            elif cfg_type == 'cli_display':
-                run_cmd_func, args = self.cli_display, [config]
-
-            rsps.append(run_cmd_func(*args, **kwargs))
+        self.rpcs_saved = 0
+        if not self.staged:
+            return rsps
+
+        if coalesce:
+            self.rpcs_saved = self.coalesce_staged()
+
+        with self.transaction():
+            for command in self.staged:
+                cfg_type = command['cfg_type']
+                config = command['config']
+                args = []
+                kwargs = {}
+                if cfg_type == 'edit_config':
+                    run_cmd_func, kwargs = self.edit_config, dict(target=target, config=config)
+                elif cfg_type == 'action':
+                    run_cmd_func, args = self.action, [config]
+                elif cfg_type == 'save':
+                    run_cmd_func, args = self.save, [config]
+                elif cfg_type == 'rollback':
+                    run_cmd_func, args = self.rollback, [config]
+                elif cfg_type == 'cli_config':
+                    run_cmd_func, args = self.cli_config, [config]
+                elif cfg_type == 'cli_display':
+                    run_cmd_func, args = self.cli_display, [config]
+
+                rsps.append(run_cmd_func(*args, **kwargs))
 
         del self.staged[:]
         return rsps
@@ -265,18 +708,30 @@ class HPCOM7(object):
     def lock(self, target='running'):
         """Attempt to lock the NETCONF connection.
 
+        While another session holds the lock, the request is retried
+        with exponential backoff for up to ``self.lock_wait`` seconds.
+
         Raises:
             NCError: if there is an error in the NETCONF protocol.
-            LockConflictError: if another process hold the NETCONF lock.
+            LockConflictError: if another process hold the NETCONF lock
+                for longer than ``self.lock_wait`` seconds.
         """
-        try:
-            self.connection.lock(target)
-            self._locked = True
-        except RPCError as e:
-            if e.tag == 'lock-denied':
-                raise LockConflictError
-            else:
-                raise NCError(e)
+        deadline = time.time() + (self.lock_wait or 0)
+        backoff = .1
+        while True:
+            try:
+                self.connection.lock(target)
+                self._locked = True
+                return
+            except RPCError as e:
+                if e.tag != 'lock-denied':
+                    raise NCError(e)
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise LockConflictError
+                time.sleep(min(backoff, remaining))
+                backoff = min(backoff * 2, 2)
 
     def unlock(self, target='running'):
         """Attempt to unlock the NETCONF connection.
@@ -308,7 +763,9 @@ class HPCOM7(object):
         Returns:
             The etree.Element returned from ncclient.manager.edit_config
         """
-        rsp = self.execute(self.connection.edit_config, kwargs=dict(target=target, config=config))
+        rsp = self.execute(self.connection.edit_config, kwargs=dict(target=target, config=config),
+                           operation='edit_config')
+        self.invalidate_caches(config)
         return rsp
 
     def get(self, get_tuple=None):
@@ -319,22 +776,34 @@ class HPCOM7(object):
                 e.g: ('subtree', <etree.Element>)
 
         Returns:
-            The etree.Element returned from ncclient.manager.get
+            The etree.Element returned from ncclient.manager.get,
+            or from the cache inside a ``table_cache()`` block.
 
         """
-        rsp = self.execute(self.connection.get, [get_tuple])
+        if self._table_cache is not None:
+            rsp = self._table_cache.get(get_tuple)
+            if rsp is not None:
+                return rsp
+
+        rsp = self.execute(self.connection.get, [get_tuple], read_only=True,
+                           operation='get')
         return rsp
 
-    def action(self, element):
+    def action(self, element, read_only=False):
         """Wrapper for ncclient.manger.action
 
         Args:
             element: etree.Element sent to ncclient.manager.action
+            read_only (bool): OPTIONAL - the action only reads state,
+                e.g. a FileSystem md5sum, so no lock is taken.
 
         Returns:
             The etree.Element returned from ncclient.manager.action
         """
-        rsp = self.execute(self.connection.action, [element])
+        rsp = self.execute(self.connection.action, [element], read_only=read_only,
+                           operation='action')
+        if not read_only:
+            self.invalidate_caches(element)
         return rsp
 
     def save(self, filename=None):
@@ -346,7 +815,7 @@ class HPCOM7(object):
         Returns:
             The etree.Element returned from ncclient.manager.save
         """
-        rsp = self.execute(self.connection.save, [filename])
+        rsp = self.execute(self.connection.save, [filename], operation='save')
         return rsp
 
     def rollback(self, filename):
@@ -358,12 +827,15 @@ class HPCOM7(object):
         Returns:
             The etree.Element returned from ncclient.manager.rollback
         """
-        rsp = self.execute(self.connection.rollback, [filename])
+        rsp = self.execute(self.connection.rollback, [filename], operation='rollback')
         return rsp
 
     def cli_display(self, command):
         """Immediately push display commands to the device and returns text.
 
+        No lock is taken when every command is read only
+        (see ``READ_ONLY_CLI``).
+
         Args:
             command (list or string): display commands
 
@@ -371,10 +843,12 @@ class HPCOM7(object):
             raw text CLI output
 
         """
-        rsp = self.execute(self.connection.cli_display, [command])
-        text = self._find_between(rsp.xml, 'CDATA[', ']]')
-        text = self._strip_return(text)
-
+        read_only = self._is_read_only_cli(command)
+        text = self.execute(self.connection.cli_display, [command],
+                            read_only=read_only, operation='cli_display',
+                            parse=self._extract_display)
+        if not read_only:
+            self.invalidate_caches(command)
         return text
 
     def cli_config(self, command):
@@ -387,10 +861,165 @@ class HPCOM7(object):
             raw text CLI output
 
         """
-        rsp = self.execute(self.connection.cli_config, [command])
+        text = self.execute(self.connection.cli_config, [command],
+                            operation='cli_config', parse=self._parse_config)
+        self.invalidate_caches(command)
+        return text
+
+    def _parse_config(self, rsp):
+        """Extract the CLI text from a cli_config response.
+        """
         xml = bytes(bytearray(rsp.xml, encoding='utf-8'))
-        xml_obj = etree.fromstring(xml)
-        return self._extract_config(xml_obj)
+        return self._extract_config(etree.fromstring(xml))
+
+    def pipeline(self, lock=False):
+        """Return a ``Pipeline`` that sends RPCs back to back on this
+        session without waiting for each reply.
+
+        Args:
+            lock (bool): OPTIONAL - hold the NETCONF lock for the whole
+                pipeline, needed to queue edit_config or cli_config.
+                Defaults to False.
+
+        Example::
+
+            with device.pipeline() as pipe:
+                inventory = pipe.get(('subtree', inventory_top))
+                base = pipe.get(('subtree', base_top))
+            inventory.result().data_ele
+        """
+        return Pipeline(self, lock=lock)
+
+    def get_many(self, get_tuples):
+        """Send several gets back to back and collect the replies.
+
+        Args:
+            get_tuples (list): tuples as sent to ``get()``,
+                e.g: [('subtree', <etree.Element>), ...]
+
+        Returns:
+            A list of the etree.Elements returned from ncclient.manager.get,
+            in the same order as ``get_tuples``.
+        """
+        with self.pipeline() as pipe:
+            pending = [pipe.get(get_tuple) for get_tuple in get_tuples]
+
+        return [each.result() for each in pending]
+
+    def iter_get(self, get_tuple, row_tag, key_map=None, value_map={}):
+        """Streaming ``get()`` for large tables, e.g. the MAC table.
+
+        Rows are parsed incrementally from the raw reply instead of
+        building the whole reply as a DOM tree.
+
+        Args:
+            get_tuple: The tuple sent to ncclient.manager.get,
+                e.g: ('subtree', <etree.Element>)
+            row_tag (str): tag of a table row, e.g. 'Unicast'
+            key_map (dict): OPTIONAL - dictionary keys to XML tags of a
+                row. Rows are yielded as dictionaries if given.
+            value_map (dict): OPTIONAL - see ``data_elem_to_dict``.
+
+        Returns:
+            A generator, see ``PendingReply.iter_rows``.
+        """
+        with self.pipeline() as pipe:
+            pending = pipe.get(get_tuple)
+
+        return pending.iter_rows(row_tag, key_map=key_map, value_map=value_map)
+
+    def iter_table(self, top, index, page_size=1000, key_map=None,
+                   value_map={}, config=False, first_page=None):
+        """Page through a table with Comware's get-bulk operation.
+
+        Each page is one get-bulk of at most ``page_size`` rows that
+        starts after the index of the last row of the previous page.
+        Rows are streamed as each page arrives, so neither the device
+        nor this host has to hold the whole table at once.
+
+        Args:
+            top (etree.Element): subtree filter of a single table,
+                i.e. top/Module/Table/Row. Columns listed in the row
+                limit the columns returned.
+            index (list): tags of the index columns of a row,
+                e.g. ['IfIndex'] or ['VLANID', 'MacAddress']
+            page_size (int): OPTIONAL - rows per get-bulk. Defaults to 1000.
+            key_map (dict): OPTIONAL - dictionary keys to XML tags of a
+                row. Rows are yielded as dictionaries if given.
+            value_map (dict): OPTIONAL - see ``data_elem_to_dict``.
+            config (bool): OPTIONAL - page through the configuration
+                with get-bulk-config instead. ``top`` must then use the
+                config namespace.
+            first_page (PendingReply): OPTIONAL - the first page, already
+                requested with ``Pipeline.get_bulk`` for the same ``top``,
+                e.g. to pipeline it with other gets.
+
+        Returns:
+            A generator of row dictionaries, or of row ``etree.Element``
+            objects that are only valid until the next row is read.
+
+        Raises:
+            ValueError: if the rows returned lack the index columns.
+        """
+        top = self._bulk_filter(top, index)
+        row = top[0][0][0]
+        row_qname = etree.QName(row)
+        ns = '{' + row_qname.namespace + '}'
+
+        pending = first_page
+        while True:
+            if pending is None:
+                with self.pipeline() as pipe:
+                    pending = pipe.get_bulk(top, page_size, config=config)
+
+            rows = 0
+            last = None
+            for elem in pending.iter_rows(row_qname.localname,
+                                          ns=row_qname.namespace):
+                rows += 1
+                last = [elem.findtext(ns + tag) for tag in index]
+                if key_map is None:
+                    yield elem
+                else:
+                    yield elem_to_dict(elem, ns, key_map, value_map=value_map)
+
+            if rows < page_size:
+                break
+            if None in last:
+                raise ValueError('Rows of the table have no index columns '
+                                 + '{0}, so it can not be paged.'.format(index))
+
+            for tag, value in zip(index, last):
+                column = row.find(ns + tag)
+                if column is None:
+                    column = etree.SubElement(row, ns + tag)
+                column.text = value
+            pending = None
+
+    def _bulk_filter(self, top, index):
+        """Return a copy of a table filter that asks for
+        the index columns if it limits the columns returned.
+        """
+        top = copy.deepcopy(top)
+        row = top[0][0][0]
+        if len(row):
+            ns = '{' + etree.QName(row).namespace + '}'
+            for tag in index:
+                if row.find(ns + tag) is None:
+                    etree.SubElement(row, ns + tag)
+
+        return top
+
+    def _bulk_request(self, top, count, config=False):
+        """Build a get-bulk (or get-bulk-config) request returning
+        at most ``count`` rows of the table in ``top``.
+        """
+        top = copy.deepcopy(top)
+        top[0][0].set(HPBASE_C + 'count', str(count))
+
+        E = nc_element_maker()
+        operation = 'get-bulk-config' if config else 'get-bulk'
+        return E(operation, E.filter(top, type='subtree'))
 
     def reboot(self):
         """Attempt an immediate reboot of the device.
@@ -404,6 +1033,31 @@ class HPCOM7(object):
         finally:
             self.connection.async_mode = False
 
+    def _is_read_only_cli(self, command):
+        """Return whether every CLI command only reads state.
+
+        Abbreviations are accepted, e.g. 'dis' for 'display'.
+        """
+        if isinstance(command, str):
+            command = [command]
+
+        for each in command:
+            words = each.split()
+            if not words:
+                continue
+            verb = words[0].lower()
+            if len(verb) < 3 or not any(
+                    ro.startswith(verb) for ro in READ_ONLY_CLI):
+                return False
+
+        return True
+
+    def _extract_display(self, rsp):
+        """Extract display text from a cli_display response.
+        """
+        text = self._find_between(rsp.xml, 'CDATA[', ']]')
+        return self._strip_return(text)
+
     def _strip_return(self, text):
         """Strip excess return characters from text.
         """
@@ -446,3 +1100,263 @@ class HPCOM7(object):
             return s[start:end]
         except ValueError:
             return ""
+
+
+class PendingReply(object):
+    """The future of a single RPC sent by a ``Pipeline``.
+
+    The RPC event of the reply, see ``HPCOM7.perf``, is recorded
+    the first time it is read.
+
+    Args:
+        device (HPCOM7): the device the RPC was sent on.
+        rpc: the asynchronous ncclient RPC object.
+        extract (callable): OPTIONAL - turns the RPC reply into the
+            value returned by ``result()``.
+        event (dict): OPTIONAL - the RPC event, see ``pyhpecw7.perf``.
+        sent (float): OPTIONAL - time the RPC was sent.
+    """
+    def __init__(self, device, rpc, extract=None, event=None, sent=None):
+        self.device = device
+        self.rpc = rpc
+        self._extract = extract
+        self._event = event
+        self._sent = sent
+
+    @property
+    def message_id(self):
+        """The NETCONF message-id of the RPC.
+        """
+        return self.rpc.id
+
+    def done(self):
+        """``True`` once the reply, or an error, has been received.
+        """
+        return self.rpc.event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the reply arrives, returning ``done()``.
+        """
+        if timeout is None:
+            timeout = self.device.timeout
+        return self.rpc.event.wait(timeout)
+
+    def result(self, timeout=None):
+        """Wait for and return the reply.
+
+        Returns:
+            The same value the equivalent ``HPCOM7`` method returns.
+
+        Raises:
+            NCError: if the reply is an rpc-error.
+            NCTimeoutError: if no reply arrived within the timeout.
+            ConnectionClosedError: if the session failed before the reply.
+        """
+        if not self.wait(timeout):
+            raise NCTimeoutError
+
+        if self.rpc.error is not None:
+            raise ConnectionClosedError(self.device)
+
+        parsing = time.time()
+        error = None
+        try:
+            rsp = self.rpc.reply
+            rsp.parse()
+            if rsp.error is not None:
+                raise NCError(rsp.error)
+
+            if self._extract:
+                return self._extract(rsp)
+
+            return rsp
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._report(parsing, error)
+
+    def _report(self, parsing, error):
+        """Record the RPC event, the first time the reply is read.
+        """
+        event, self._event = self._event, None
+        if event is None:
+            return
+
+        now = time.time()
+        event['error'] = error
+        event['seconds'] = now - self._sent
+        if self.device._monitor is not None:
+            self.device._measure_reply(event, self.message_id, self._sent)
+        event['parse_time'] = now - parsing
+        self.device._emit(event)
+
+    def iter_rows(self, row_tag, key_map=None, value_map={}, ns=HPDATA,
+                  timeout=None):
+        """Wait for the reply of a get and stream its table rows.
+
+        The raw reply is parsed incrementally instead of being turned
+        into a DOM tree, so memory use stays flat however many rows
+        the table has.
+
+        Args:
+            row_tag (str): tag of a table row, e.g. 'Unicast'
+            key_map (dict): OPTIONAL - dictionary keys to XML tags of a
+                row. Rows are yielded as dictionaries if given.
+            value_map (dict): OPTIONAL - see ``data_elem_to_dict``.
+            ns (str): OPTIONAL - namespace of the rows. Defaults to
+                the data namespace.
+
+        Returns:
+            A generator of row dictionaries, or of row ``etree.Element``
+            objects that are only valid until the next row is read.
+            The parse time of its RPC event includes the time spent
+            by the consumer between rows.
+
+        Raises:
+            NCError: if the reply is an rpc-error.
+            NCTimeoutError: if no reply arrived within the timeout.
+            ConnectionClosedError: if the session failed before the reply.
+        """
+        if not self.wait(timeout):
+            raise NCTimeoutError
+
+        if self.rpc.error is not None:
+            raise ConnectionClosedError(self.device)
+
+        error_tag = NETCONFBASE_C + 'rpc-error'
+        ns = '{' + ns + '}'
+        tags = [ns + row_tag, error_tag]
+        parsing = time.time()
+        error = None
+        try:
+            for elem in iter_elements(self.rpc.reply.xml, tags):
+                if elem.tag == error_tag:
+                    raise NCError(RPCError(copy.deepcopy(elem)))
+                if key_map is None:
+                    yield elem
+                else:
+                    yield elem_to_dict(elem, ns, key_map, value_map=value_map)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._report(parsing, error)
+
+
+class Pipeline(object):
+    """Send several RPCs back to back on one NETCONF session.
+
+    Every call is written to the session immediately and returns a
+    ``PendingReply``. Replies are matched to requests by message-id,
+    so the round trip latency of the queued RPCs overlaps instead of
+    adding up. Leaving the ``with`` block waits for every reply.
+
+    Args:
+        device (HPCOM7): connected instance of a ``HPCOM7`` object.
+        lock (bool): OPTIONAL - hold the NETCONF lock while the
+            pipeline is open. Required for write RPCs.
+
+    Attributes:
+        pending (list): the ``PendingReply`` of every RPC sent.
+    """
+    def __init__(self, device, lock=False):
+        self.device = device
+        self.lock = lock
+        self.pending = []
+        self._transaction = None
+
+    def __enter__(self):
+        if self.device.connected is not True:
+            raise ConnectionClosedError(self.device)
+
+        if self.lock:
+            self._transaction = self.device.transaction()
+            self._transaction.__enter__()
+
+        self.device.connection.async_mode = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.device.connection.async_mode = False
+        try:
+            for each in self.pending:
+                each.wait()
+        finally:
+            if self._transaction is not None:
+                self._transaction.__exit__(exc_type, exc_value, tb)
+                self._transaction = None
+
+        return False
+
+    def results(self):
+        """Wait for and return the result of every RPC, in order.
+        """
+        return [each.result() for each in self.pending]
+
+    def _send(self, operation, run_cmd_func, args=[], kwargs={},
+              read_only=False, extract=None, config=None):
+        if not read_only and not self.device._in_transaction:
+            raise ValueError('Write RPCs can only be pipelined while '
+                             + 'holding the lock, use pipeline(lock=True).')
+        event = new_event(operation, find_caller())
+        event['rpcs'] = 1
+        sent = time.time()
+        try:
+            rpc = run_cmd_func(*args, **kwargs)
+        except RPCError as e:
+            raise NCError(e)
+        except NcTransErrors.TransportError:
+            raise ConnectionClosedError(self.device)
+
+        monitor = self.device._monitor
+        if monitor is not None and monitor.last_sent[2] >= sent:
+            event['request_bytes'] = monitor.last_sent[1]
+
+        if not read_only:
+            self.device.invalidate_caches(config)
+
+        pending = PendingReply(self.device, rpc, extract=extract,
+                               event=event, sent=sent)
+        self.pending.append(pending)
+        return pending
+
+    def get(self, get_tuple=None):
+        """Pipelined ``HPCOM7.get``.
+        """
+        return self._send('get', self.device.connection.get, [get_tuple],
+                          read_only=True)
+
+    def get_bulk(self, top, count, config=False):
+        """Pipelined get-bulk of at most ``count`` rows of the table
+        in ``top``, see ``HPCOM7.iter_table``.
+        """
+        return self._send('get_bulk', self.device.connection.dispatch,
+                          [self.device._bulk_request(top, count, config=config)],
+                          read_only=True)
+
+    def action(self, element, read_only=False):
+        """Pipelined ``HPCOM7.action``.
+        """
+        return self._send('action', self.device.connection.action, [element],
+                          read_only=read_only, config=element)
+
+    def edit_config(self, config, target='running'):
+        """Pipelined ``HPCOM7.edit_config``.
+        """
+        return self._send('edit_config', self.device.connection.edit_config,
+                          kwargs=dict(target=target, config=config),
+                          config=config)
+
+    def cli_display(self, command):
+        """Pipelined ``HPCOM7.cli_display``. The result is the CLI text.
+        """
+        return self._send('cli_display', self.device.connection.cli_display,
+                          [command], read_only=self.device._is_read_only_cli(command),
+                          extract=self.device._extract_display, config=command)
+
+    def cli_config(self, command):
+        """Pipelined ``HPCOM7.cli_config``. The result is the CLI text.
+        """
+        return self._send('cli_config', self.device.connection.cli_config,
+                          [command], extract=self.device._parse_config, config=command)
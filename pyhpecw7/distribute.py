@@ -0,0 +1,217 @@
+"""Distribute OS images to many HPCOM7 devices.
+
+(c) Copyright 2016 Hewlett Packard Enterprise Development LP Licensed under the Apache License, Version 2.0
+(the "License"); you may not use this file except in compliance with the License. You may obtain a copy of the License
+at http://www.apache.org/licenses/LICENSE-2.0 Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing permissions and limitations under the License.
+
+"""
+import collections
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.features.file_copy import FileCopy, TransferSession, file_md5
+
+
+class ImageDistributor(object):
+    """This class stages image files, e.g. an IPE or boot and system
+    packages, on a fleet of devices.
+
+    Each image is hashed once on the controller for every device.
+    Devices are grouped by site: the first device of a site is seeded
+    from the controller, and the others then fetch the images from it
+    over SCP, so each image crosses the WAN once per site instead of
+    once per device. Uploads from the controller and device-to-device
+    copies each run with bounded parallelism. Devices whose seed failed
+    are uploaded to from the controller instead.
+
+    Args:
+        images (list): full paths of the local image files.
+        remote_dir (str): OPTIONAL - directory the images are copied
+            into on every device. Defaults to 'flash:/'.
+        max_parallel (int): OPTIONAL - devices uploaded to from the
+            controller at once. Defaults to 4.
+        max_pulls (int): OPTIONAL - devices fetching from their seed
+            at once. Defaults to 16.
+        progress (callable): OPTIONAL - called with the device's host,
+            the image path, the bytes of the image on the device so far,
+            the size of the image and the current rate in bytes per second.
+        timeout (int): OPTIONAL - NETCONF timeout of the sessions,
+            long enough for the device to hash or fetch an image.
+            Defaults to 1200.
+
+    Example::
+
+        distributor = ImageDistributor(['/images/5930-CMW710-R2432.ipe'])
+        results = distributor.distribute([
+            dict(host='10.1.1.1', username='hp', password='hp123', site='dc1'),
+            dict(host='10.1.1.2', username='hp', password='hp123', site='dc1',
+                 irf_members=['slot2#flash:/']),
+        ])
+    """
+    def __init__(self, images, remote_dir='flash:/', max_parallel=4,
+                 max_pulls=16, progress=None, timeout=1200):
+        self.images = list(images)
+        self.remote_dir = remote_dir
+        self.max_parallel = max_parallel
+        self.max_pulls = max_pulls
+        self.progress = progress
+        self.timeout = timeout
+
+    def distribute(self, targets):
+        """Stage the images on every target.
+
+        Args:
+            targets (list): one dictionary per device with the
+                following k/v pairs:
+
+                    :host (str): name or IP address of the device
+                    :username (str): username used to login to the device
+                    :password (str): password used to login to the device
+                    :port (int): OPTIONAL - NETCONF port. Default is 830.
+                    :ssh_port (int): OPTIONAL - SSH port. Default is 22.
+                    :look_for_keys (bool): OPTIONAL - Default is False.
+                    :site (str): OPTIONAL - devices of the same site are
+                        seeded from the first of them. Devices without a
+                        site are each uploaded to from the controller.
+                    :seed_address (str): OPTIONAL - address the other
+                        devices of the site reach this one at, if it
+                        isn't ``host``.
+                    :seed_identity_key (str): OPTIONAL - key pair type,
+                        e.g. 'rsa', the other devices of the site log in
+                        to this one with, instead of ``password``. The
+                        password is otherwise sent in clear text on
+                        their CLI, see ``FileCopy.pull_file``.
+                    :irf_members (list): OPTIONAL - file systems of IRF
+                        members the images are also copied to,
+                        e.g. ['slot2#flash:/'].
+
+        Returns:
+            An ordered dictionary of the results, by host, in the order
+            of ``targets``. Each result is a dictionary with the
+            following k/v pairs:
+
+                :source (str): 'controller', or the host of the seed
+                :transferred (bool): whether any image was copied
+                :bytes (int): bytes sent from the controller
+                :pulled_bytes (int): bytes fetched from the seed
+                :seconds (float): time spent on the device
+                :files (dict): per image, the ``TransferSession`` stats
+                    of its upload, if it was uploaded
+                :error (str): the error that stopped the device, or None
+        """
+        # hash each image once, before the threads need it
+        for image in self.images:
+            file_md5(image)
+
+        seeds = []
+        pulls = []
+        site_seed = {}
+        for target in targets:
+            site = target.get('site')
+            if site is None or site not in site_seed:
+                if site is not None:
+                    site_seed[site] = target
+                seeds.append(target)
+            else:
+                pulls.append((target, site_seed[site]))
+
+        results = collections.OrderedDict(
+            (target['host'], None) for target in targets)
+
+        with ThreadPoolExecutor(self.max_parallel) as pool:
+            for target, result in zip(seeds, pool.map(self._upload, seeds)):
+                results[target['host']] = result
+
+        fallback = []
+        ready = []
+        for target, seed in pulls:
+            if results[seed['host']]['error'] is None:
+                ready.append((target, seed))
+            else:
+                fallback.append(target)
+
+        with ThreadPoolExecutor(self.max_pulls) as pool:
+            pulled = pool.map(lambda pair: self._pull(*pair), ready)
+            for (target, _), result in zip(ready, pulled):
+                results[target['host']] = result
+
+        with ThreadPoolExecutor(self.max_parallel) as pool:
+            for target, result in zip(fallback, pool.map(self._upload, fallback)):
+                results[target['host']] = result
+
+        return results
+
+    def _upload(self, target):
+        session = TransferSession(
+            target['host'], target['username'], target['password'],
+            port=target.get('ssh_port', 22),
+            look_for_keys=target.get('look_for_keys', False))
+        try:
+            return self._stage(target, 'controller', session=session)
+        finally:
+            session.close()
+
+    def _pull(self, target, seed):
+        return self._stage(target, seed['host'], seed=seed)
+
+    def _stage(self, target, source, session=None, seed=None):
+        """Open a session to one device and copy every image
+        it doesn't have yet, from the controller or its seed.
+        """
+        host = target['host']
+        result = dict(source=source, transferred=False, bytes=0,
+                      pulled_bytes=0, seconds=0.0, files={}, error=None)
+        start = time.time()
+
+        device = HPCOM7(host=host, username=target['username'],
+                        password=target['password'],
+                        port=target.get('port', 830), timeout=self.timeout)
+        try:
+            device.open(look_for_keys=target.get('look_for_keys', False))
+            for image in self.images:
+                self._stage_image(device, target, image, result,
+                                  session=session, seed=seed)
+        except Exception as e:
+            result['error'] = str(e) or e.__class__.__name__
+        finally:
+            try:
+                device.close()
+            except Exception:
+                pass
+
+        result['seconds'] = time.time() - start
+        return result
+
+    def _stage_image(self, device, target, image, result, session=None, seed=None):
+        host = target['host']
+        size = os.path.getsize(image)
+        dst = self.remote_dir + os.path.basename(image)
+        file_copy = FileCopy(device, image, dst,
+                             port=target.get('ssh_port', 22))
+        if not file_copy.remote_dir_exists:
+            file_copy.create_remote_dir()
+
+        if not file_copy.file_already_exists():
+            if seed is None:
+                progress = None
+                if self.progress is not None:
+                    progress = lambda done, total, rate: \
+                        self.progress(host, image, done, total, rate)
+                file_copy.transfer_file(session=session, progress=progress)
+                result['files'][image] = file_copy.stats
+                result['bytes'] += file_copy.stats.get('sent', 0)
+            else:
+                file_copy.pull_file(seed.get('seed_address', seed['host']),
+                                    seed['username'], seed.get('password'),
+                                    identity_key=seed.get('seed_identity_key'))
+                result['pulled_bytes'] += size
+                if self.progress is not None:
+                    self.progress(host, image, size, size, 0.0)
+            result['transferred'] = True
+
+        for member_dir in target.get('irf_members', []):
+            if file_copy.copy_to(member_dir):
+                result['transferred'] = True
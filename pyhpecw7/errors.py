@@ -143,3 +143,20 @@ class ConnectionClosedError(ConnectionError):
     """When there's a connection closed error.
     """
     pass
+
+
+class PoolExhaustedError(PYHPError):
+    """When every pooled session for a device is in use.
+    """
+    def __init__(self, host, port, max_sessions):
+        super(PoolExhaustedError, self).__init__()
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+
+    def __repr__(self):
+        return '{0}: host: {1}, port: {2}'.format(
+            self.__class__.__name__, self.host, self.port) +\
+            ' All {0} pooled sessions are in use.'.format(self.max_sessions)
+
+    __str__ = __repr__
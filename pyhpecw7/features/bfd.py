@@ -16,13 +16,10 @@ class Bfd(object):
 
     def get_config(self):
         dampening_info = {}
-        commands = 'dis current-configuration | inc "bfd dampening"'
-        rsp = self.device.cli_display(commands)
-        by_line = rsp.split('\n')
-        if len(by_line)<3:
+        by_line = self.device.running_config.include('bfd dampening')
+        if not by_line:
             return dampening_info
-        # for each in by_line[1:]:
-        damp_info = by_line[1]
+        damp_info = by_line[0]
         if 'dampening' in damp_info:
             dampening = damp_info.split('dampening')[-1].strip()
             dampening_vars = dampening.split(' ')
@@ -5,6 +5,7 @@ from pyhpecw7.features.errors import BgpParamsError,InstanceParamsError,GroupPar
 BgpMissParamsError
 from pyhpecw7.features.interface import Interface
 from pyhpecw7.utils.xml.lib import *
+from pyhpecw7.utils.templates import cli
 
 
 class Bgp(object):
@@ -17,19 +18,18 @@ class Bgp(object):
 
     def get_config(self):
         existing = []
-        config = self.device.cli_display('display current-configuration | include bgp')
-        bgp_info = config.split('\r\n')
-        for line in bgp_info[1:]:
-            if re.search(r'^bgp',line):
-                bgp_name = line.split('bgp')[-1].strip(' ')
-                existing.append(bgp_name)
+        config = self.device.running_config.include('^bgp')
+        for each in cli.get_structured_data('bgp.tmpl', '\n'.join(config)):
+            bgp_name = each['as']
+            if each['instance']:
+                bgp_name += ' instance ' + each['instance']
+            existing.append(bgp_name)
         return existing
 
     def get_group_info(self,group):
-        command = 'display current-configuration | include "group {0}"'.format(group)
-        config = self.device.cli_display(command)
-        group_info = config.split('\r\n')
-        if len(group_info)>2:
+        group_info = self.device.running_config.include(
+            r'^\s*group {0}(\s|$)'.format(re.escape(group)))
+        if group_info:
             return True
         else:
             return False
@@ -26,38 +26,21 @@ class Compare(object):
             self.result=result
 
     def get_result(self):
-        Result = self.result
+        """Compare the output of the command with the result file.
 
+        Returns:
+            True if both have the same set of lines,
+            ignoring indentation and blank lines, else False.
+        """
         commands = '{0}'.format(self.cmd)
         res = self.device.cli_display(commands)
-        ele = res.split('\n')
-        element = ele[1:-1]
+        element = res.split('\n')[1:-1]
 
+        with open(self.result) as result_file:
+            alist = set(line.strip() for line in result_file if line.strip())
+        blist = set(line.strip() for line in element if line.strip())
 
-        with open('/root/ansible-hpe-cw7-master/gqy/gqy.txt', 'w+') as f:
-            for i in enumerate (element):
-                if i[0] != len(element)-1:
-                    f.write(i[1].lstrip() + '\n')
-                else:
-                    f.write(i[1].strip())
-
-
-        alist = []
-        blist = []
-
-        for line in open(Result):
-            alist.append(line)
-        for line in open('/root/ansible-hpe-cw7-master/gqy/gqy.txt'):
-            blist.append(line)
-
-        # print("a have  b not have")
-        # print(set(alist).difference(set(blist)))
-        # print("b have  a not have")
-        # print(set(blist).difference(set(alist)))
-        if set(alist) == set(blist):
+        if alist == blist:
             return True
         else:
             return False
-
-
-
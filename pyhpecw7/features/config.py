@@ -3,6 +3,7 @@
 import os
 import time
 from pyhpecw7.features.errors import InvalidConfigFile
+from pyhpecw7.utils.config_tree import diff_configs, format_diff, remediation
 from ncclient.operations.rpc import RPCError
 
 
@@ -30,15 +31,27 @@ class Config(object):
         self._switch_response = []
         self._original__diffs = []
         self._diffs = []
+        self._diff = None
+
+    def _get_new_config(self):
+        """Read the new config file, locally if it exists
+        on this host, else from the device.
+        """
+        if os.path.isfile(self.filename):
+            with open(self.filename) as config_file:
+                return config_file.read()
+
+        return self.device.cli_display('more {0}'.format(self.basename))
 
     def _get__diffs_from_switch(self):
         """Compare switch running config to desired new config file.
-        """
-        cmds = 'display diff current-configuration configfile {0}'.format(
-            self.basename)
 
-        # raw string output taken directly from the switch showing the diff
-        self._diff_response = self.device.cli_display(cmds)
+        The diff is computed locally against the shared running
+        config snapshot instead of with 'display diff' on the switch.
+        """
+        self._diff = diff_configs(self.device.running_config.blocks,
+                                  self._get_new_config())
+        self._diff_response = '\n'.join(format_diff(self._diff))
 
     def compare_config(self):
         """Compare new config file to the existing current running config
@@ -47,8 +60,8 @@ class Config(object):
             This returns a tuple of two elements that are both lists.
 
             The first element has a summary of diffs (self._diffs) and
-            the second element is the exact output from the 'display diff'
-            command, but as a list (self._original__diffs).
+            the second element is the full diff, with added and removed
+            lines indented as in the config, as a list (self._original__diffs).
         """
         self._diffs = []
         new_cfg = []
@@ -79,6 +92,16 @@ class Config(object):
 
         return self._diffs, self._original__diffs
 
+    def get_remediation(self):
+        """Get the CLI commands that turn the running config
+        into the new config file.
+
+        Returns:
+            A list of CLI commands to send from system-view.
+        """
+        return remediation(self.device.running_config.blocks,
+                           self._get_new_config())
+
 #    def activate_replacement_config(self):
 #        """Activate replacement config on host device
 #
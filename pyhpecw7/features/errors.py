@@ -127,6 +127,16 @@ class InterfaceRemoveError(InterfaceError):
     __str__ = __repr__
 
 
+class InterfaceRangeError(InterfaceError):
+    def __init__(self, if_name):
+        super(InterfaceRangeError, self).__init__(if_name)
+
+    def __repr__(self):
+        return '{0} is not a valid interface range.'.format(self.if_name)
+
+    __str__ = __repr__
+
+
 class InterfaceVlanMustExist(InterfaceError):
     def __init__(self, if_name, number):
         super(InterfaceVlanMustExist, self).__init__(if_name)
@@ -1,8 +1,139 @@
 """Gather device facts on HPCOM7 devices.
 """
 import collections
+import copy
+import json
+import os
+import tempfile
+import time
 from pyhpecw7.utils.xml.lib import *
 
+# fact subsets that can be selected with gather_subset
+FACT_SUBSETS = ('inventory', 'base', 'interfaces')
+
+# default seconds cached facts stay valid
+FACTS_TTL = 60
+
+
+def parse_gather_subset(gather_subset=None):
+    """Return the set of fact subsets selected by ``gather_subset``.
+
+    Args:
+        gather_subset (list): names from ``FACT_SUBSETS``, 'all', or
+            names prefixed with '!' to exclude them, e.g.
+            ['all', '!interfaces']. Defaults to ['all'].
+
+    Returns:
+        A tuple of subset names, in ``FACT_SUBSETS`` order.
+
+    Raises:
+        ValueError: if an unknown subset is given.
+    """
+    if not gather_subset:
+        gather_subset = ['all']
+    if isinstance(gather_subset, str):
+        gather_subset = [gather_subset]
+
+    selected = set()
+    excluded = set()
+    for subset in gather_subset:
+        exclude = subset.startswith('!')
+        name = subset.lstrip('!')
+        if name == 'all':
+            names = FACT_SUBSETS
+        elif name in FACT_SUBSETS:
+            names = (name,)
+        else:
+            raise ValueError('Invalid gather_subset {0}. Must be one of '
+                             '{1} or all'.format(subset, list(FACT_SUBSETS)))
+        if exclude:
+            excluded.update(names)
+        else:
+            selected.update(names)
+
+    if not selected:
+        selected = set(FACT_SUBSETS)
+
+    return tuple(name for name in FACT_SUBSETS
+                 if name in selected and name not in excluded)
+
+
+class FactsCache(object):
+    """Time based cache of device facts, optionally persisted to disk
+    so that it is shared between processes, e.g. Ansible forks.
+
+    ``HPCOM7`` invalidates its own cache after every config push, but
+    other processes can't see that: facts on disk only expire after
+    ``ttl``, even if the device was changed in the meantime.
+
+    Args:
+        ttl (int): OPTIONAL - seconds cached facts stay valid.
+            Default is ``FACTS_TTL``, 60.
+        cache_dir (str): OPTIONAL - directory of the on-disk cache, one
+            JSON file per device. Facts are only kept in memory if omitted.
+
+    """
+    def __init__(self, ttl=FACTS_TTL, cache_dir=None):
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._entries = {}
+
+    def _key(self, host, port, subsets):
+        return '{0}_{1}_{2}'.format(host, port, '-'.join(subsets))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key.replace(':', '_') + '.json')
+
+    def get(self, host, port, subsets):
+        """Return a copy of the cached facts of a device, or None if
+        there are no cached facts for these subsets or they are older
+        than ``ttl``. Callers can change the copy freely.
+        """
+        key = self._key(host, port, subsets)
+        entry = self._entries.get(key)
+
+        if entry is None and self.cache_dir:
+            try:
+                with open(self._path(key)) as f:
+                    entry = json.load(f, object_pairs_hook=collections.OrderedDict)
+            except (IOError, OSError, ValueError):
+                entry = None
+
+        if entry is None or time.time() - entry['timestamp'] > self.ttl:
+            return None
+
+        self._entries[key] = entry
+        return copy.deepcopy(entry['facts'])
+
+    def set(self, host, port, subsets, facts):
+        """Store a copy of the facts of a device.
+        """
+        key = self._key(host, port, subsets)
+        entry = dict(timestamp=time.time(), facts=copy.deepcopy(facts))
+        self._entries[key] = entry
+
+        if self.cache_dir:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp_path, self._path(key))
+
+    def invalidate(self, host, port):
+        """Drop every cached subset of a device.
+        """
+        prefix = '{0}_{1}_'.format(host, port)
+        for key in list(self._entries):
+            if key.startswith(prefix):
+                del self._entries[key]
+
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            file_prefix = prefix.replace(':', '_')
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(file_prefix) and name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
 
 class Facts(object):
     """Gather device facts from a HP Comware 7 device.
@@ -10,6 +141,12 @@ class Facts(object):
     Args:
         device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
             object.
+        gather_subset (list): OPTIONAL - fact subsets to collect, see
+            ``parse_gather_subset``. Defaults to all of ``FACT_SUBSETS``.
+        cache (FactsCache): OPTIONAL - cache to serve facts from and
+            store them in.
+        page_size (int): OPTIONAL - interfaces per get-bulk when
+            paging through the interface list. Defaults to 1000.
 
     Attributes:
         device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
@@ -18,9 +155,12 @@ class Facts(object):
             in ``get_facts``.
 
     """
-    def __init__(self, device):
+    def __init__(self, device, gather_subset=None, cache=None, page_size=1000):
         self.device = device
         self.em = data_element_maker()
+        self.subsets = parse_gather_subset(gather_subset)
+        self.cache = cache
+        self.page_size = page_size
 
     @property
     def facts(self):
@@ -29,6 +169,10 @@ class Facts(object):
     def get_facts(self):
         """Gather facts from the HP Comware 7 device
 
+        The selected subsets are combined into a single get. The
+        interface list is paged through with get-bulk, and its first
+        page is pipelined with that get.
+
         Returns:
             This returns a dictionary with several key/value
             pairs describing the device.  See example below.
@@ -48,35 +192,66 @@ class Facts(object):
                     'hardware': 'Ver.A'
                 }
         """
+        if self.cache is not None:
+            facts = self.cache.get(self.device.host, self.device.port, self.subsets)
+            if facts is not None:
+                return facts
+
+        tops = dict(inventory=self._inventory_top,
+                    base=self._base_top)
+        parsers = dict(inventory=self._parse_inventory,
+                       base=self._parse_base)
+
+        E = self.em
+        top = E.top()
+        for subset in self.subsets:
+            if subset in tops:
+                top.extend(tops[subset]().getchildren())
+
+        with self.device.pipeline() as pipe:
+            if len(top):
+                nc_get_reply = pipe.get(('subtree', top))
+            if 'interfaces' in self.subsets:
+                first_page = pipe.get_bulk(self._interface_list_top(),
+                                           self.page_size)
 
         facts = collections.OrderedDict()
-        facts.update(self._get_inventory())
-        facts.update(self._get_base())
-        facts.update(self._get_interface_list())
+        for subset in self.subsets:
+            if subset == 'interfaces':
+                facts.update(self._get_interface_list(first_page))
+            else:
+                facts.update(parsers[subset](nc_get_reply.result()))
+
+        if self.cache is not None:
+            self.cache.set(self.device.host, self.device.port, self.subsets, facts)
 
         return facts
 
-    def _get_interface_list(self):
+    def _get_interface_list(self, first_page=None):
         """Get interface list that will be added to facts.
         """
+        rows = self.device.iter_table(self._interface_list_top(), ['IfIndex'],
+                                      page_size=self.page_size,
+                                      key_map={'name': 'Name'},
+                                      first_page=first_page)
+        interfaces = [row['name'] for row in rows]
+        intfs = dict(interface_list=interfaces)
+
+        return intfs
+
+    def _interface_list_top(self):
         E = self.em
         top = E.top(
                 E.Ifmgr(
                     E.Interfaces(
                         E.Interface(
+                            E.IfIndex(),
                             E.Name()
                         )
                     )
                 )
             )
-
-        nc_get_reply = self.device.get(('subtree', top))
-
-        intfs_xml = findall_in_data('Name', nc_get_reply.data_ele)
-        interfaces = [intf.text for intf in intfs_xml]
-        intfs = dict(interface_list=interfaces)
-
-        return intfs
+        return top
 
     def _get_uptime(self, seconds):
         """Convert seconds to d, hr, min, sec format.
@@ -93,13 +268,10 @@ class Facts(object):
     def _get_inventory(self):
         """Get os, serial number, and model that will be added to facts.
         """
-        key_map = {
-            'os': 'SoftwareRev',
-            'serial_number': 'SerialNum',
-            'model': 'ModelName',
-            'hardware': 'HardwareRev'
-        }
+        nc_get_reply = self.device.get(('subtree', self._inventory_top()))
+        return self._parse_inventory(nc_get_reply)
 
+    def _inventory_top(self):
         E = self.em
         top = E.top(
             E.LLDP(
@@ -112,9 +284,20 @@ class Facts(object):
                 )
             )
         )
-        nc_get_reply = self.device.get(('subtree', top))
+        return top
 
-        inventory = data_elem_to_dict(nc_get_reply.data_ele, key_map)
+    def _parse_inventory(self, nc_get_reply):
+        key_map = {
+            'os': 'SoftwareRev',
+            'serial_number': 'SerialNum',
+            'model': 'ModelName',
+            'hardware': 'HardwareRev'
+        }
+
+        inventory = {}
+        inventory_ele = find_in_data('Inventory', nc_get_reply.data_ele)
+        if inventory_ele is not None:
+            inventory = data_elem_to_dict(inventory_ele, key_map)
         inventory['vendor'] = 'hp'
 
         return inventory
@@ -122,12 +305,10 @@ class Facts(object):
     def _get_base(self):
         """Get hostname, localtime, and uptime that will be added to facts.
         """
-        key_map = {
-            'hostname': 'HostName',
-            'localtime': 'LocalTime',
-            'uptime': 'Uptime'
-        }
+        nc_get_reply = self.device.get(('subtree', self._base_top()))
+        return self._parse_base(nc_get_reply)
 
+    def _base_top(self):
         E = self.em
         top = E.top(
             E.Device(
@@ -138,9 +319,19 @@ class Facts(object):
                 )
             )
         )
-        nc_get_reply = self.device.get(('subtree', top))
+        return top
+
+    def _parse_base(self, nc_get_reply):
+        key_map = {
+            'hostname': 'HostName',
+            'localtime': 'LocalTime',
+            'uptime': 'Uptime'
+        }
 
-        basefacts = data_elem_to_dict(nc_get_reply.data_ele, key_map)
+        basefacts = {}
+        base_ele = find_in_data('Base', nc_get_reply.data_ele)
+        if base_ele is not None:
+            basefacts = data_elem_to_dict(base_ele, key_map)
         basefacts['uptime'] = self._get_uptime(basefacts.get('uptime', 0))
 
         return basefacts
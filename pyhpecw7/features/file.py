@@ -4,6 +4,7 @@ from lxml import etree
 from ncclient.xml_ import qualify
 from pyhpecw7.utils.xml.namespaces import HPDATA, HPDATA_C, HPACTION
 from pyhpecw7.utils.xml.lib import *
+from pyhpecw7.utils.config_tree import diff_configs, format_diff
 
 
 class File(object):
@@ -52,12 +53,16 @@ class File(object):
 
     def _get__diffs_between_fies(self):
         """Compare difference between two rollback files
+
+        Both files are read in one pipelined round trip and
+        diffed locally instead of with 'display diff' on the switch.
         """
-        cmds = 'display diff configfile {0} configfile {1}'.format(
-            self.filename, self.comparefile)
+        with self.device.pipeline() as pipe:
+            file_text = pipe.cli_display('more {0}'.format(self.filename))
+            compare_text = pipe.cli_display('more {0}'.format(self.comparefile))
 
-        # raw string output taken directly from the switch showing the diff
-        self._diff_response = self.device.cli_display(cmds)
+        diff = diff_configs(file_text.result(), compare_text.result())
+        self._diff_response = '\n'.join(format_diff(diff))
 
     def compare_rollback_files(self):
         """Compare new config file to the existing current running config
@@ -66,8 +71,8 @@ class File(object):
             This returns a tuple of two elements that are both lists.
 
             The first element has a summary of diffs (self._diffs) and
-            the second element is the exact output from the 'display diff'
-            command, but as a list (self._original__diffs).
+            the second element is the full diff, with added and removed
+            lines indented as in the config, as a list (self._original__diffs).
         """
         self._diffs = []
         file_cfg = []
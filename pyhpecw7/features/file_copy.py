@@ -7,18 +7,265 @@ from pyhpecw7.utils.xml.lib import *
 from pyhpecw7.features.errors import FileNotEnoughSpaceError,\
     FileNotReadableError, FileRemoteDirDoesNotExist, FileTransferError, FileHashMismatchError
 from pyhpecw7.errors import NCError
+from pyhpecw7.utils.file_hash import HashCache, file_key
 from ftplib import FTP
 import paramiko
 import hashlib
+import socket
+import time
 import re
 import os
 
+# errors after which an upload is retried over a new connection
+_TRANSFER_ERRORS = (socket.error, EOFError, IOError, paramiko.SSHException)
+
+# digests of local files, shared by every FileCopy and cached on
+# disk, so an image is hashed once for every device and every run
+hash_cache = HashCache()
+
+
+def file_md5(path):
+    """Return the md5 sum of a local file, see ``HashCache``.
+    """
+    return hash_cache.get(path, 'md5')
+
+
+class TransferSession(object):
+    """This class holds one SSH connection to a device and uploads
+    files over it, so that several files, e.g. the boot and system
+    images, are staged without a new SSH handshake each.
+
+    Files are uploaded over SFTP. The local MD5 sum is computed while
+    the file is read for the upload, so the file is only read once.
+    If the device already has the beginning of the file, e.g. from an
+    upload that was cut off, the upload resumes where it stopped.
+    Uploads that fail because the connection dropped are resumed over
+    a new connection, up to ``retries`` times.
+
+    If the device refuses SFTP, files are uploaded over SCP instead,
+    without resuming.
+
+    Args:
+        hostname (str): the name or IP address of the device.
+        username (str): the SSH username for the device.
+        password (str): the SSH password for the device.
+        port (int): OPTIONAL - The SSH port. Defaults to 22.
+        look_for_keys (bool): OPTIONAL - Whether to search
+            for private key files in ~/.ssh/. Defaults to False.
+        blocksize (int): OPTIONAL - bytes read and sent at a time.
+            Defaults to 1 MiB.
+        retries (int): OPTIONAL - times an upload is resumed after
+            the connection drops. Defaults to 3.
+
+    Attributes:
+        stats (dict): statistics of the last upload, with the
+            following k/v pairs:
+
+                :size (int): size of the file in bytes
+                :offset (int): bytes the device already had
+                :sent (int): bytes sent
+                :seconds (float): time spent sending
+                :rate (float): bytes sent per second
+                :attempts (int): connections used
+    """
+    def __init__(self, hostname, username, password, port=22,
+                 look_for_keys=False, blocksize=2**20, retries=3):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.port = port
+        self.look_for_keys = look_for_keys
+        self.blocksize = blocksize
+        self.retries = retries
+        self.stats = {}
+
+        self._ssh = None
+        self._sftp = None
+        self._sftp_refused = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """Open the SSH connection, unless it is already open.
+        """
+        if self._ssh is not None:
+            transport = self._ssh.get_transport()
+            if transport is not None and transport.is_active():
+                return
+            self.close()
+
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect(
+            hostname=self.hostname,
+            username=self.username,
+            password=self.password,
+            port=self.port,
+            allow_agent=False,
+            look_for_keys=self.look_for_keys)
+        self._ssh = ssh
+
+    def close(self):
+        """Close the SSH connection.
+        """
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except _TRANSFER_ERRORS:
+                pass
+            self._sftp = None
+        if self._ssh is not None:
+            self._ssh.close()
+            self._ssh = None
+
+    def _get_sftp(self):
+        """Return the SFTP client of the connection,
+        or None if the device refuses SFTP.
+        """
+        self.open()
+        if self._sftp is None and not self._sftp_refused:
+            try:
+                self._sftp = self._ssh.open_sftp()
+            except paramiko.SSHException:
+                self._sftp_refused = True
+        return self._sftp
+
+    def remote_size(self, dst):
+        """Return the size of a remote file in bytes,
+        or 0 if it doesn't exist.
+        """
+        sftp = self._get_sftp()
+        if sftp is None:
+            return 0
+        try:
+            return sftp.stat(dst).st_size
+        except IOError:
+            return 0
+
+    def put(self, src, dst, progress=None, resume=True):
+        """Upload a file.
+
+        Args:
+            src (str): path of the local file.
+            dst (str): path of the remote file, e.g. 'flash:/file.bin'.
+            progress (callable): OPTIONAL - called after each block with
+                the bytes of the file on the device so far, the size of
+                the file and the current rate in bytes per second.
+            resume (bool): OPTIONAL - whether to keep the part of the file
+                the device already has. Defaults to True.
+
+        Returns:
+            The MD5 sum of the local file.
+
+        Raises:
+            FileTransferError: if the upload fails more
+                than ``retries`` times.
+        """
+        size = os.path.getsize(src)
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                if self._get_sftp() is None:
+                    src_hash = self._put_scp(src, dst, size, progress)
+                else:
+                    src_hash = self._put_sftp(src, dst, size, progress, resume)
+                self.stats['attempts'] = attempts
+                return src_hash
+            except _TRANSFER_ERRORS:
+                self.close()
+                if attempts > self.retries:
+                    raise FileTransferError(src, dst)
+                # whatever made it to the device is kept on the next attempt
+                resume = True
+
+    def _put_sftp(self, src, dst, size, progress, resume):
+        offset = self.remote_size(dst) if resume else 0
+        if offset > size:
+            offset = 0
+
+        m = hashlib.md5()
+        with open(src, 'rb') as f:
+            # hash the part already on the device without sending it
+            done = 0
+            while done < offset:
+                buf = f.read(min(self.blocksize, offset - done))
+                if not buf:
+                    break
+                m.update(buf)
+                done += len(buf)
+
+            remote = self._sftp.open(dst, 'r+b' if offset else 'wb')
+            try:
+                remote.set_pipelined(True)
+                if offset:
+                    remote.seek(offset)
+                self._send(f, remote.write, m, offset, size, progress)
+            finally:
+                remote.close()
+
+        return m.hexdigest()
+
+    def _put_scp(self, src, dst, size, progress):
+        m = hashlib.md5()
+        scp = SCPClient(self._ssh.get_transport())
+        try:
+            with open(src, 'rb') as f:
+                scp.putfo(_HashingReader(f, m), dst, size=size)
+        finally:
+            scp.close()
+
+        self.stats = dict(size=size, offset=0, sent=size,
+                          seconds=0.0, rate=0.0)
+        if progress is not None:
+            progress(size, size, 0.0)
+        return m.hexdigest()
+
+    def _send(self, f, write, m, offset, size, progress):
+        """Send the rest of a file from ``offset``, hashing each block.
+        """
+        start = time.time()
+        sent = 0
+        rate = 0.0
+        buf = f.read(self.blocksize)
+        while buf:
+            write(buf)
+            m.update(buf)
+            sent += len(buf)
+            elapsed = time.time() - start
+            if elapsed > 0:
+                rate = sent / elapsed
+            if progress is not None:
+                progress(offset + sent, size, rate)
+            buf = f.read(self.blocksize)
+
+        self.stats = dict(size=size, offset=offset, sent=sent,
+                          seconds=time.time() - start, rate=rate)
+
+
+class _HashingReader(object):
+    """File wrapper that hashes what is read from it.
+    """
+    def __init__(self, f, m):
+        self._f = f
+        self._m = m
+
+    def read(self, size=-1):
+        buf = self._f.read(size)
+        self._m.update(buf)
+        return buf
+
 
 class FileCopy(object):
     """This class is used to copy local files to a ``HPCOM7`` device.
 
     Note:
-        SCP should first be enabled on the device.
+        SFTP or SCP should first be enabled on the device.
 
     Note:
         When using this class, the passed in ``HPCOM7`` object should
@@ -71,6 +318,7 @@ class FileCopy(object):
             self.remote_dir_exists = self._remote_dir_exists()
 
         self.port = port
+        self.stats = {}
 
     def _get_flash_size(self):
         """Return the available space in the remote directory.
@@ -141,16 +389,16 @@ class FileCopy(object):
             if not self.file_already_exists():
                 self._enough_space()
 
-    def _get_remote_md5(self):
+    def _get_remote_md5(self, path=None):
         """Return the md5 sum of the remote file,
-        if it exists.
+        or of another file on the device, if it exists.
         """
         E = action_element_maker()
         top = E.top(
             E.FileSystem(
                 E.Files(
                     E.File(
-                        E.SrcName(self.dst),
+                        E.SrcName(path or self.dst),
                         E.Operations(
                             E.md5sum()
                         )
@@ -160,7 +408,7 @@ class FileCopy(object):
         )
 
 
-        nc_get_reply = self.device.action(top)
+        nc_get_reply = self.device.action(top, read_only=True)
         reply_ele = etree.fromstring(nc_get_reply.xml.encode('utf-8'))
         md5sum = find_in_action('md5sum', reply_ele)
 
@@ -169,15 +417,9 @@ class FileCopy(object):
 
     def _get_local_md5(self, blocksize=2**20):
         """Get the md5 sum of the local file,
-        if it exists.
+        if it exists. See ``file_md5``.
         """
-        m = hashlib.md5()
-        with open(self.src, "rb") as f:
-            buf = f.read(blocksize)
-            while buf:
-                m.update(buf)
-                buf = f.read(blocksize)
-        return m.hexdigest()
+        return file_md5(self.src)
 
     def _remote_dir_exists(self):
         """Check to see if the remote directory exists.
@@ -232,8 +474,16 @@ class FileCopy(object):
 
         self.remote_dir_exists = True
 
-    def transfer_file(self, hostname=None, username=None, password=None, look_for_keys=False):
-        """Transfer the file to the remote device over SCP.
+    def transfer_file(self, hostname=None, username=None, password=None,
+                      look_for_keys=False, session=None, progress=None,
+                      resume=True):
+        """Transfer the file to the remote device over SFTP,
+        or SCP if the device refuses SFTP.
+
+        See ``TransferSession`` for how the upload is hashed and resumed.
+        If a resumed upload doesn't match the local file, e.g. because
+        the device had the start of a different file, the file is sent
+        again from the beginning.
 
         Note:
             If any arguments are omitted, the corresponding attributes
@@ -246,6 +496,15 @@ class FileCopy(object):
                 for the remote device.
             password (str): OPTIONAL - The SSH password
                 for the remote device.
+            look_for_keys (bool): OPTIONAL - Whether to search
+                for private key files in ~/.ssh/.
+            session (TransferSession): OPTIONAL - open connection to upload
+                over, e.g. one shared by several ``FileCopy`` objects.
+                ``hostname``, ``username`` and ``password`` are ignored
+                if it is given.
+            progress (callable): OPTIONAL - see ``TransferSession.put``.
+            resume (bool): OPTIONAL - whether to keep the part of the file
+                the device already has. Defaults to True.
 
         Raises:
             FileTransferError: if an error occurs during the file transfer.
@@ -257,33 +516,166 @@ class FileCopy(object):
         """
         self._safety_checks()
 
-        hostname = hostname or self.device.host
-        username = username or self.device.username
-        password = password or self.device.password
+        own_session = session is None
+        if own_session:
+            session = TransferSession(
+                hostname or self.device.host,
+                username or self.device.username,
+                password or self.device.password,
+                port=self.port,
+                look_for_keys=look_for_keys)
 
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(
-            hostname=hostname,
-            username=username,
-            password=password,
-            port=self.port,
-            allow_agent=False,
-            look_for_keys=look_for_keys)
+        try:
+            key = file_key(self.src)
+            src_hash = session.put(self.src, self.dst,
+                                   progress=progress, resume=resume)
+            self.stats = dict(session.stats)
+            dst_hash = self._get_remote_md5()
+
+            if src_hash != dst_hash and self.stats.get('offset'):
+                src_hash = session.put(self.src, self.dst,
+                                       progress=progress, resume=False)
+                self.stats = dict(session.stats)
+                dst_hash = self._get_remote_md5()
+        finally:
+            if own_session:
+                session.close()
+
+        hash_cache.set(key, dict(md5=src_hash))
+
+        if src_hash != dst_hash:
+            raise FileHashMismatchError(self.src, self.dst, src_hash, dst_hash)
+
+    def pull_file(self, peer, username, password=None, src=None,
+                  identity_key=None):
+        """Have the device fetch the file over SCP from a peer that
+        already has it, e.g. the first switch of a site, instead of
+        uploading it from the controller.
+
+        Note:
+            The command runs on the device's CLI. A password is sent
+            as ``password simple``, so it shows in clear text in the
+            device's command history and logs. Prefer ``identity_key``,
+            which logs in to the peer with a key pair of the device
+            and puts no secret on the CLI.
+
+            A different file already at ``dst`` is deleted first, so
+            the device doesn't stop at an overwrite prompt. Nothing is
+            fetched if ``dst`` already matches the local file.
+
+        Args:
+            peer (str): The name or IP address of the peer,
+                as reachable from the device.
+            username (str): The SSH username for the peer.
+            password (str): OPTIONAL - The SSH password for the peer.
+            src (str): OPTIONAL - Path of the file on the peer.
+                Defaults to ``dst``.
+            identity_key (str): OPTIONAL - Type of the device's key pair
+                to log in to the peer with, e.g. 'rsa', instead of
+                ``password``.
 
-        scp = SCPClient(ssh.get_transport())
+        Raises:
+            FileTransferError: if the device couldn't fetch the file.
+            FileHashMismatchError: if the source and
+                destination hashes don't match.
+            FileNotReadableError: if the local file doesn't exist or isn't readable.
+            FileNotEnoughSpaceError: if there isn't enough space on the device.
+            FileRemoteDirDoesNotExist: if the remote directory doesn't exist.
+        """
+        self._safety_checks()
+        if not self._remove_stale(self.dst):
+            return
+
+        command = 'scp {0} get {1} {2}'.format(peer, src or self.dst, self.dst)
+        if identity_key:
+            command += ' identity-key {0}'.format(identity_key)
+        command += ' user {0}'.format(username)
+        if password and not identity_key:
+            command += ' password simple {0}'.format(password)
         try:
-            scp.put(self.src, self.dst)
-        except:
-            raise FileTransferError
+            self.device.cli_display(command)
+        except NCError:
+            raise FileTransferError(self.src, self.dst)
+
+        self._check_remote_md5(self.dst)
+
+    def copy_to(self, dst):
+        """Copy the file from ``dst`` to another file system of the
+        device, e.g. 'slot2#flash:/' of an IRF member, unless it
+        is already there.
+
+        A different file already at the destination is deleted
+        first, so the device doesn't stop at an overwrite prompt.
+
+        Args:
+            dst (str): Full path of the copy, or its directory
+                if it ends with '/'.
+
+        Returns:
+            ``True`` if the file was copied, ``False`` if the
+            copy already existed.
 
-        scp.close()
+        Raises:
+            FileTransferError: if the device couldn't copy the file.
+            FileHashMismatchError: if the source and
+                destination hashes don't match.
+        """
+        if dst.endswith('/'):
+            dst += self.dst.split('/')[-1]
+
+        if not self._remove_stale(dst):
+            return False
+
+        try:
+            self.device.cli_display('copy {0} {1}'.format(self.dst, dst))
+        except NCError:
+            raise FileTransferError(self.dst, dst)
+
+        self._check_remote_md5(dst)
+        return True
+
+    def _remove_stale(self, path):
+        """Delete a file on the device unless it already matches the
+        local file.
+
+        Returns:
+            ``False`` if the file matches the local file, else ``True``.
+        """
+        try:
+            remote_hash = self._get_remote_md5(path)
+        except NCError:
+            return True
+
+        if remote_hash is None:
+            return True
+        if remote_hash == self._get_local_md5():
+            return False
+
+        E = action_element_maker()
+        top = E.top(
+            E.FileSystem(
+                E.Files(
+                    E.File(
+                        E.SrcName(path),
+                        E.Operations(
+                            E.Delete()
+                        )
+                    )
+                )
+            )
+        )
+        self.device.action(top)
+        return True
 
+    def _check_remote_md5(self, dst):
         src_hash = self._get_local_md5()
-        dst_hash = self._get_remote_md5()
+        try:
+            dst_hash = self._get_remote_md5(dst)
+        except NCError:
+            dst_hash = None
 
         if src_hash != dst_hash:
-            raise FileHashMismatchError(self.src, self.dst, src_hash, dst_hash)
+            raise FileHashMismatchError(self.src, dst, src_hash, dst_hash)
 
     def ftp_file(self, hostname=None, username=None, password=None):
         """Transfer the file to the remote device over FTP.
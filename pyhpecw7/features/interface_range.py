@@ -0,0 +1,215 @@
+"""Manage the same feature on many interfaces of HPCOM7 devices.
+"""
+import collections
+import re
+from pyhpecw7.features.errors import InterfaceRangeError
+
+# the first and last interface of a Comware range, e.g.
+# 'Ten-GigabitEthernet1/0/1' and '1/0/48' or 'XGE1/0/48'
+_FIRST_RE = re.compile(r'^([A-Za-z][A-Za-z\-]*?)\s*((?:\d+/)*)(\d+)$')
+_LAST_RE = re.compile(r'^([A-Za-z][A-Za-z\-]*?)?\s*((?:\d+/)*)(\d+)$')
+
+_TO_RE = re.compile(r'\s+to\s+', re.IGNORECASE)
+
+
+def expand_interfaces(interfaces):
+    """Return the interface names of a list of interfaces and
+    Comware-style ranges.
+
+    Args:
+        interfaces: a list, or a comma separated string, of interface
+            names and ranges, e.g. ['Ten-GigabitEthernet1/0/1 to 1/0/4',
+            'FortyGigE1/0/49']. The last interface of a range may
+            repeat the type, e.g. 'XGE1/0/1 to XGE1/0/4', and has to
+            be on the same slot.
+
+    Returns:
+        A list of interface names, in the order given, without
+        duplicates.
+
+    Raises:
+        InterfaceRangeError: if a range is malformed or descending.
+    """
+    if isinstance(interfaces, str):
+        interfaces = interfaces.split(',')
+
+    names = []
+    for item in interfaces:
+        item = item.strip()
+        if not item:
+            continue
+
+        bounds = _TO_RE.split(item)
+        if len(bounds) == 1:
+            names.append(item)
+        elif len(bounds) == 2:
+            names.extend(_expand_range(item, *bounds))
+        else:
+            raise InterfaceRangeError(item)
+
+    return list(collections.OrderedDict.fromkeys(names))
+
+
+def _expand_range(item, first, last):
+    first_match = _FIRST_RE.match(first.strip())
+    last_match = _LAST_RE.match(last.strip())
+    if first_match is None or last_match is None:
+        raise InterfaceRangeError(item)
+
+    if_type, prefix, start = first_match.groups()
+    last_type, last_prefix, end = last_match.groups()
+    if last_type and last_type.lower() != if_type.lower():
+        raise InterfaceRangeError(item)
+    if last_prefix and last_prefix != prefix:
+        raise InterfaceRangeError(item)
+    if int(end) < int(start):
+        raise InterfaceRangeError(item)
+
+    return [if_type + prefix + str(number)
+            for number in range(int(start), int(end) + 1)]
+
+
+class InterfaceRange(object):
+    """This class is used to get and build the same feature, e.g.
+    ``Switchport``, on many interfaces at once.
+
+    The existing configuration of every interface is read inside
+    ``HPCOM7.table_cache()``, so each table is fetched once for all
+    of them, and the changes of every interface are pushed together
+    by ``HPCOM7.execute_staged``, which merges them into as few
+    edit_config and cli_config RPCs as possible.
+
+    Args:
+        device (HPCOM7): connected instance of a
+            ``pyhpecw7.comware.HPCOM7`` object.
+        feature_cls: the per-interface feature class, called as
+            ``feature_cls(device, interface, *args, **kvargs)``.
+        interfaces: interface names and ranges, see ``expand_interfaces``.
+        *args: OPTIONAL - more arguments of ``feature_cls``.
+        **kvargs: OPTIONAL - more keyword arguments of ``feature_cls``.
+
+    Attributes:
+        device (HPCOM7): connected instance of a
+            ``pyhpecw7.comware.HPCOM7`` object.
+        interfaces (list): the interface names, as expanded.
+        features (OrderedDict): the feature object of every interface,
+            by interface name.
+    """
+    def __init__(self, device, feature_cls, interfaces, *args, **kvargs):
+        self.device = device
+        self.interfaces = expand_interfaces(interfaces)
+        self.features = collections.OrderedDict()
+        for name in self.interfaces:
+            self.features[name] = feature_cls(device, name, *args, **kvargs)
+
+    def each(self):
+        """Yield the (name, feature) of every interface, to stage
+        their changes in a loop.
+
+        Once the loop ends, what was staged is reordered so that the
+        first items staged for every interface come first, then the
+        second items, and so on. Each interface keeps its own order,
+        and ``HPCOM7.execute_staged`` can merge the items of every
+        interface into one RPC, e.g. a cli_config followed by an
+        edit_config per interface becomes one of each.
+        """
+        staged = self.device.staged
+        start = len(staged)
+        chunks = []
+        for name, feature in self.features.items():
+            before = len(staged)
+            yield name, feature
+            chunks.append(staged[before:])
+
+        del staged[start:]
+        for position in range(max([len(chunk) for chunk in chunks] or [0])):
+            staged.extend(chunk[position] for chunk in chunks
+                          if position < len(chunk))
+
+    def call(self, method, *args, **kwargs):
+        """Call a method of the feature object of every interface,
+        inside ``HPCOM7.table_cache()``.
+
+        Returns:
+            An OrderedDict of what the method returned, by interface name.
+        """
+        results = collections.OrderedDict()
+        with self.device.table_cache():
+            for name, feature in self.features.items():
+                results[name] = getattr(feature, method)(*args, **kwargs)
+        return results
+
+    def get_config(self, method='get_config'):
+        """Return the current configuration of every interface,
+        fetching each table once.
+
+        Args:
+            method (str): OPTIONAL - the method of the feature class
+                returning the configuration. Defaults to 'get_config'.
+
+        Returns:
+            An OrderedDict of configuration dictionaries, by interface name.
+        """
+        return self.call(method)
+
+    def get_delta(self, proposed, existing=None, keep=()):
+        """Return the parameters of ``proposed`` that differ from
+        the existing configuration of every interface.
+
+        Args:
+            proposed (dict): the parameters wanted on every interface.
+            existing (dict): OPTIONAL - the configuration by interface
+                name, as returned by ``get_config``. Fetched if None.
+            keep (tuple): OPTIONAL - parameters of ``proposed`` added to
+                the delta of every interface that needs a change, e.g.
+                'link_type' for ``Switchport.build``.
+
+        Returns:
+            An OrderedDict of the parameters to change, by interface name,
+            with only the interfaces that need a change.
+        """
+        if existing is None:
+            existing = self.get_config()
+
+        deltas = collections.OrderedDict()
+        for name in self.interfaces:
+            config = existing.get(name) or {}
+            delta = dict((key, value) for key, value in proposed.items()
+                         if config.get(key) != value)
+            if delta:
+                for key in keep:
+                    if key in proposed:
+                        delta[key] = proposed[key]
+                deltas[name] = delta
+        return deltas
+
+    def build(self, deltas, stage=False, method='build'):
+        """Stage or execute the changes of every interface, as one batch.
+
+        Args:
+            deltas (dict): the keyword arguments of ``method`` by
+                interface name, e.g. as returned by ``get_delta``.
+                Interfaces not listed aren't changed.
+            stage (bool): whether to stage the commands or execute immediately
+            method (str): OPTIONAL - the method of the feature class
+                staging the change. Defaults to 'build'.
+
+        Returns:
+            True if stage=True and successfully staged
+            List of etree.Element XML responses if immediate execution
+        """
+        if stage:
+            self._stage(deltas, method)
+            return True
+
+        staged, self.device.staged = self.device.staged, []
+        try:
+            self._stage(deltas, method)
+            return self.device.execute_staged()
+        finally:
+            self.device.staged = staged
+
+    def _stage(self, deltas, method):
+        for name, feature in self.each():
+            if name in deltas:
+                getattr(feature, method)(stage=True, **deltas[name])
@@ -0,0 +1,172 @@
+"""Device-wide interface name and IfIndex table for HPCOM7 devices.
+"""
+from pyhpecw7.utils.xml.lib import *
+
+
+class InterfaceTable(object):
+    """This class holds the name, IfIndex, type and port layer of every
+    interface on a device, fetched with a single get and shared by all
+    feature classes through ``HPCOM7.interface_table``.
+
+    The table is loaded on first use and is invalidated by the device
+    whenever a logical interface or sub interface is created or removed,
+    or the port layer of an interface is changed.
+
+    Args:
+        device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
+            object.
+
+    Attributes:
+        device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
+            object.
+    """
+    def __init__(self, device):
+        self.device = device
+
+        self.key_map = {
+            'name': 'Name',
+            'index': 'IfIndex',
+            'type': 'ifType',
+            'port_layer': 'PortLayer'
+        }
+
+        self._by_name = None
+        self._by_lower_name = None
+        self._by_index = None
+
+    def gen_top(self):
+        E = data_element_maker()
+        top = E.top(
+            E.Ifmgr(
+                E.Interfaces(
+                    E.Interface(
+                        E.IfIndex(),
+                        E.Name(),
+                        E.ifType(),
+                        E.PortLayer()
+                    )
+                )
+            )
+        )
+
+        return top
+
+    def refresh(self):
+        """Fetch the interface table from the device.
+        """
+        nc_get_reply = self.device.get(('subtree', self.gen_top()))
+        self.load(nc_get_reply)
+
+    def load(self, nc_get_reply):
+        """Fill the table from the reply to a get of ``gen_top()``.
+
+        Lets callers pipeline the interface get with their own gets.
+        """
+        by_name = {}
+        by_index = {}
+        for entry in rows_to_dicts(nc_get_reply, 'Interface', self.key_map):
+            if entry.get('name') and entry.get('index'):
+                by_name[entry['name']] = entry
+                by_index[entry['index']] = entry
+
+        self._by_name = by_name
+        self._by_lower_name = dict(
+            (name.lower(), entry) for name, entry in by_name.items())
+        self._by_index = by_index
+
+    def queue(self, pipe):
+        """Queue the interface table get on a ``Pipeline``
+        if the table isn't loaded yet.
+
+        Returns:
+            The ``PendingReply`` whose result is passed to ``load()``
+            once the pipeline is closed, or None if the table is loaded.
+        """
+        if self.loaded:
+            return None
+        return pipe.get(('subtree', self.gen_top()))
+
+    def get_many_with_table(self, get_tuples):
+        """Run the given gets, pipelining the interface table get
+        alongside them if the table isn't loaded yet.
+
+        Args:
+            get_tuples (list): tuples as sent to ``HPCOM7.get()``
+
+        Returns:
+            A list of the replies to ``get_tuples``, in order.
+        """
+        with self.device.pipeline() as pipe:
+            replies = [pipe.get(get_tuple) for get_tuple in get_tuples]
+            table_reply = self.queue(pipe)
+
+        if table_reply is not None:
+            self.load(table_reply.result())
+
+        return [reply.result() for reply in replies]
+
+    def invalidate(self):
+        """Drop the cached table. The next lookup fetches it again.
+        """
+        self._by_name = None
+        self._by_lower_name = None
+        self._by_index = None
+
+    @property
+    def loaded(self):
+        return self._by_name is not None
+
+    @property
+    def by_name(self):
+        """Dictionary of interface name to entry. Each entry is a
+        dictionary with 'name', 'index', 'type' and 'port_layer' keys.
+        """
+        if not self.loaded:
+            self.refresh()
+        return self._by_name
+
+    @property
+    def by_index(self):
+        """Dictionary of IfIndex (str) to entry.
+        """
+        if not self.loaded:
+            self.refresh()
+        return self._by_index
+
+    def get(self, name):
+        """Return the entry for an interface name, or None.
+
+        The exact name is tried first, then a case insensitive match.
+        """
+        entry = self.by_name.get(name)
+        if entry is None and name:
+            entry = self._by_lower_name.get(name.lower())
+        return entry
+
+    def index(self, name):
+        """Return the IfIndex of an interface name,
+        or the empty string if it doesn't exist.
+        """
+        entry = self.get(name)
+        if entry is None:
+            return ''
+        return entry['index']
+
+    def name(self, index):
+        """Return the interface name of an IfIndex, or None.
+        """
+        entry = self.by_index.get(str(index))
+        if entry is None:
+            return None
+        return entry['name']
+
+    def names(self, indexes):
+        """Return the interface names of several IfIndexes, in order.
+        Unknown indexes map to None.
+        """
+        by_index = self.by_index
+        names = []
+        for index in indexes:
+            entry = by_index.get(str(index))
+            names.append(entry['name'] if entry else None)
+        return names
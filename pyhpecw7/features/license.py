@@ -6,6 +6,7 @@ from pyhpecw7.features.errors import InterfaceCreateError, InterfaceTypeError,\
     InterfaceAbsentError, InterfaceParamsError, InterfaceVlanMustExist, StpParamsError
 from pyhpecw7.features.interface import Interface
 from pyhpecw7.utils.xml.lib import *
+from pyhpecw7.utils.templates import cli
 import re
 
 
@@ -16,15 +17,13 @@ class License(object):
         self.device = device
 
     def get_config(self):
-        license = {}
         commands = 'display license'
         rsp = self.device.cli_display(commands)
-        rsp_line = rsp.split('\n')
-        for each in rsp_line[1:]:
-            if each.split(':')[0].strip().lower() == 'flash':
-                license['license'] = each.split(':')[1].strip()
-            if each.split(':')[0].strip().lower() == 'current state':
-                license['license_state'] = each.split(':')[1].strip()
+        key_map = {
+            'license': 'flash',
+            'license_state': 'current state'
+        }
+        license = cli.get_key_values(rsp.split('\n', 1)[-1], key_map)
 
         return license
 
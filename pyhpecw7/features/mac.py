@@ -1,4 +1,8 @@
+"""Gather the MAC address table from HPCOM7 devices.
+"""
 from pyhpecw7.utils.xml.lib import *
+
+
 class MacUnicastTable(object):
 
     """This class is used to get MacUnicastTable
@@ -11,12 +15,29 @@ class MacUnicastTable(object):
     def __init__(self, device):
         self.device = device
 
-    def getMacTableTop(self):        
+        # XML tags of a Unicast row to dictionary keys
+        self.key_map = {
+            'VLANID': 'vlanID',
+            'MacAddress': 'macAdd',
+            'PortIndex': 'portIndex',
+            'Status': 'status',
+            'Aging': 'aging'
+        }
+
+        self.status_map = {
+            '0': 'Other',
+            '1': 'Security',
+            '2': 'Learned',
+            '3': 'Static',
+            '4': 'Blackhole'
+        }
+
+    def getMacTableTop(self):
         """Build XML object for MacTable
 
         Returns:
             XML object for MacTable data
-        """        
+        """
         E = data_element_maker()
         top = E.top(
             E.MAC(
@@ -27,55 +48,55 @@ class MacUnicastTable(object):
         )
         return top
 
-    def getMacList(self):        
-        """get macList 
-        
+    def getMacList(self, page_size=1000):
+        """get macList
+
+        The MAC table is paged through with get-bulk, and the first
+        page is fetched in the same pipelined round trip as the
+        interface table, unless the device already has it cached.
+        Rows are joined with the interface table as they arrive.
+
+        Args:
+            page_size (int): OPTIONAL - MAC entries per get-bulk.
+                Defaults to 1000.
+
         Returns:
-            macList(list)
+            macList(list): one dict per MAC entry with the keys
+                'vlanID', 'macAdd', 'status', 'aging' and 'name'
         """
+        top = self.getMacTableTop()
+        iface_table = self.device.interface_table
+        with self.device.pipeline() as pipe:
+            first_page = pipe.get_bulk(top, page_size)
+            table_reply = iface_table.queue(pipe)
+
+        if table_reply is not None:
+            iface_table.load(table_reply.result())
+
+        by_index = iface_table.by_index
+        key_map = dict((v, k) for k, v in self.key_map.items())
+        status_map = self.status_map
+
         macList = []
-        macMap = {}
-        macTableTop = self.getMacTableTop()
-        ruleTop = self.device.get(('subtree', macTableTop))
-        vlanIDList = findall_in_data('VLANID', ruleTop.data_ele)
-        macAddList = findall_in_data('MacAddress', ruleTop.data_ele)
-        portIndexList = findall_in_data('PortIndex', ruleTop.data_ele)
-        statusList = findall_in_data('Status', ruleTop.data_ele)
-        agingList = findall_in_data('Aging', ruleTop.data_ele)
-        
-        for vlanID,macAdd,portIndex,status,aging in zip(vlanIDList,macAddList,portIndexList,statusList,agingList):
-            macMap['vlanID'] = vlanID.text
-            macMap['macAdd'] = macAdd.text
-            macMap['portIndex'] = portIndex.text
-            macMap['status'] = status.text
-            macMap['aging'] = aging.text 
-            macList.append(macMap.copy())
-            macMap.clear()    
-        
-        for macTable in macList: 
-            ifIndexMap = self.getIfIndexMap(macTable.get('portIndex'))  
-            macTable['name'] = ifIndexMap.get('Name')
-            if macTable['status'] == '0':
-                macTable['status'] = 'Other'
-            elif macTable['status'] == '1':
-                macTable['status'] = 'Security'
-            elif macTable['status'] == '2':
-                macTable['status'] = 'Learned'
-            elif macTable['status'] == '3':
-                macTable['status'] = 'Static'
-            elif macTable['status'] == '4':
-                macTable['status'] = 'Blackhole'  
-            del macTable['portIndex']
-        
-        
+        rows = self.device.iter_table(top, ['VLANID', 'MacAddress'],
+                                      page_size=page_size,
+                                      key_map=key_map,
+                                      first_page=first_page)
+        for macTable in rows:
+            iface = by_index.get(macTable.pop('portIndex', None))
+            macTable['name'] = iface['name'] if iface else None
+            status = macTable.get('status')
+            macTable['status'] = status_map.get(status, status)
+            macList.append(macTable)
+
         return macList
 
-    def getIfIndexTop(self,ifIndex):        
+    def getIfIndexTop(self, ifIndex):
         """Build XML object for IfIndex data
 
         Returns:
             XML object for IfIndex data
-        """        
+        """
         E = data_element_maker()
         top = E.top(
             E.Ifmgr(
@@ -86,32 +107,15 @@ class MacUnicastTable(object):
                 )
             )
         )
-        return top 
-    
-    def getIfIndexMap(self,ifIndex):        
-        """get ifIndexMap 
-        
+        return top
+
+    def getIfIndexMap(self, ifIndex):
+        """get ifIndexMap
+
         Returns:
             ifIndexMap(map)
         """
-        allIfIndexList = []
         ifIndexMap = {}
-        ifIndexTop = self.getIfIndexTop(ifIndex)
-        ruleTop = self.device.get(('subtree', ifIndexTop))
-        ifIndexList = findall_in_data('IfIndex', ruleTop.data_ele)
-        nameList = findall_in_data('Name', ruleTop.data_ele) 
-        
-        ifIndexMap['IfIndex'] = ifIndexList[0].text
-        ifIndexMap['Name'] = nameList[0].text  
+        ifIndexMap['IfIndex'] = ifIndex
+        ifIndexMap['Name'] = self.device.interface_table.name(ifIndex)
         return ifIndexMap
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
\ No newline at end of file
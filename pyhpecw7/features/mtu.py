@@ -125,63 +125,20 @@ class Mtu(object):
 
     def _get_iface_index(self):
         """Return the interface index given the self.interface_name
-        attribute by asking the device. If the interface doesn't exist,
-        return the empty string.
+        attribute from the device's shared interface table.
+        If the interface doesn't exist, return the empty string.
         """
-        E = data_element_maker()
-        top = E.top(
-            E.Ifmgr(
-                E.Interfaces(
-                    E.Interface(
-                        E.Name(self.interface_name)
-                    )
-                )
-            )
-        )
-
-        nc_get_reply = self.device.get(('subtree', top))
-        reply_data = find_in_data(
-            self._iface_index_name, nc_get_reply.data_ele)
-
-        if reply_data is None:
-            return ''
-
-        return reply_data.text
+        return self.device.interface_table.index(self.interface_name)
 
     def _is_ethernet_is_routed(self):
         """Return whether the interface is ethernet and whether
         it is routed. If the interface doesn't exist,
         return False.
         """
-        E = data_element_maker()
-        top = E.top(
-            E.Ifmgr(
-                E.Interfaces(
-                    E.Interface(
-                        E.IfIndex(self.iface_index)
-                    )
-                )
-            )
-        )
-
-        nc_get_reply = self.device.get(('subtree', top))
-        reply_data = find_in_data('ifType', nc_get_reply.data_ele)
+        entry = self.device.interface_table.by_index.get(self.iface_index) or {}
 
-        routed_reply_data = find_in_data('PortLayer', nc_get_reply.data_ele)
-
-        is_ethernet = False
-        is_routed = False
-        try:
-            if reply_data.text == '6':
-                is_ethernet = True
-        except AttributeError:
-            pass
-
-        try:
-            if routed_reply_data.text == '2':
-                is_routed = True
-        except AttributeError:
-            pass
+        is_ethernet = entry.get('type') == '6'
+        is_routed = entry.get('port_layer') == '2'
 
         return is_ethernet, is_routed
 
@@ -201,6 +158,10 @@ class Mtu(object):
             commands to create an interface.
          """
         if_index = self._get_iface_index()
+        if not if_index:
+            # the interface may have been created outside this session
+            self.device.interface_table.refresh()
+            if_index = self._get_iface_index()
         if not if_index:
             raise InterfaceCreateError(self.interface_name)
         self.iface_index = if_index
@@ -1,17 +1,23 @@
 """Gather LLDP neighbor information from HPCOM7 devices.
 """
-from lxml import etree
-from ncclient.xml_ import qualify
-from pyhpecw7.utils.xml.namespaces import HPDATA, HPDATA_C
 from pyhpecw7.utils.xml.lib import *
 
 
 class Neighbors(object):
     """Gather LLDP neighbor information from a HP COM7 switch.
 
+    Neighbors of every requested protocol are fetched together with the
+    device's interface table in one pipelined round trip and joined
+    locally, so the cost doesn't grow with the number of neighbors.
+
     Args:
         device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
             object.
+        ntypes (list): OPTIONAL - protocols to collect, "lldp" and/or
+            "cdp". Defaults to both.
+        fields (list): OPTIONAL - keys to return for each neighbor, from
+            ``lldp_key_map`` or ``cdp_key_map``. 'local_intf' is always
+            returned. Defaults to 'neighbor' and 'neighbor_intf'.
 
     Attributes:
         device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
@@ -20,59 +26,71 @@ class Neighbors(object):
         cdp (cdp): dictionary containing CDP neighbors
 
     """
-    def __init__(self, device):
+    def __init__(self, device, ntypes=('lldp', 'cdp'), fields=None):
 
         self.device = device
-
-        self.lldp = self._get_neighbors(ntype='lldp')
-        self.cdp = self._get_neighbors(ntype='cdp')
+        self.ntypes = list(ntypes)
+        self.fields = list(fields or ['neighbor', 'neighbor_intf'])
+
+        # dictionary keys to XML tags of each neighbor row
+        self.lldp_key_map = {
+            'neighbor': 'SystemName',
+            'neighbor_intf': 'PortId',
+            'neighbor_intf_descr': 'PortDescription',
+            'chassis_id': 'ChassisId',
+            'system_descr': 'SystemDescription',
+        }
+        self.cdp_key_map = {
+            'neighbor': 'ManageAdress',
+            'neighbor_intf': 'PortId',
+        }
+
+        self.lldp = []
+        self.cdp = []
+        self.refresh()
 
     def _get_interface_from_index(self, index):
         """ Returns interface name based on a given ifindex
         """
-        E = data_element_maker()
-        top = E.top(
-            E.Ifmgr(
-                E.Interfaces(
-                    E.Interface(
-                        E.IfIndex(index),
-                        E.Name()
-                    )
-                )
-            )
-        )
-        nc_get_reply = self.device.get(('subtree', top))
-        interface_name = find_in_data('Name', nc_get_reply.data_ele).text
-
-        return interface_name
+        return self.device.interface_table.name(index)
 
     def refresh(self):
         """Refreshes the "ldp" and "cdp" attributes of the class
+
+        Only the protocols in ``ntypes`` are fetched. The interface
+        table is fetched alongside them unless the device already
+        has it cached.
         """
+        get_tuples = [('subtree', self._gen_top(ntype))
+                      for ntype in self.ntypes]
+        replies = self.device.interface_table.get_many_with_table(get_tuples)
 
-        self.lldp = self._get_neighbors(ntype='lldp')
-        self.cdp = self._get_neighbors(ntype='cdp')
+        for ntype, nc_get_reply in zip(self.ntypes, replies):
+            setattr(self, ntype,
+                    self._build_response(nc_get_reply.data_ele, ntype=ntype))
 
-    def _get_neighbors(self, ntype='lldp'):
-        """Gets neighbors of device (HPCOM7)
+    def _key_map(self, ntype):
+        if ntype == 'cdp':
+            key_map = self.cdp_key_map
+        else:
+            key_map = self.lldp_key_map
 
-            Args:
-                ntype (str): must be "lldp" or "cdp"
+        return dict((k, v) for k, v in key_map.items() if k in self.fields)
 
-            Returns:
-                List of dicts with the following k/v pairs:
-                    :local_intf (str): local interface of HP device
-                    :neighbor_intf (str): remote interface of the neighbor
-                        device
-                    :neighbor (str): hostname of the neighbor device for lldp
-                        and mgmt IP addr when cdp
+    def _gen_top(self, ntype='lldp'):
+        """Build the get filter for one protocol, asking only
+        for the columns needed by ``fields``.
         """
         E = data_element_maker()
+        columns = [E.IfIndex()]
+        for xml_tag in self._key_map(ntype).values():
+            columns.append(getattr(E, xml_tag)())
+
         if ntype == 'cdp':
             top = E.top(
                 E.LLDP(
                     E.CDPNeighbors(
-                        E.CDPNeighbor()
+                        E.CDPNeighbor(*columns)
                     )
                 )
             )
@@ -80,12 +98,28 @@ class Neighbors(object):
             top = E.top(
                 E.LLDP(
                     E.LLDPNeighbors(
-                        E.LLDPNeighbor()
+                        E.LLDPNeighbor(*columns)
                     )
                 )
             )
 
-        nc_get_reply = self.device.get(('subtree', top))
+        return top
+
+    def _get_neighbors(self, ntype='lldp'):
+        """Gets neighbors of device (HPCOM7)
+
+            Args:
+                ntype (str): must be "lldp" or "cdp"
+
+            Returns:
+                List of dicts with the following k/v pairs:
+                    :local_intf (str): local interface of HP device
+                    :neighbor_intf (str): remote interface of the neighbor
+                        device
+                    :neighbor (str): hostname of the neighbor device for lldp
+                        and mgmt IP addr when cdp
+        """
+        nc_get_reply = self.device.get(('subtree', self._gen_top(ntype)))
         return self._build_response(nc_get_reply.data_ele, ntype=ntype)
 
     def _build_response(self, nc_reply, ntype='lldp'):
@@ -105,32 +139,19 @@ class Neighbors(object):
                 :neighbor (str): hostname of the neighbor device for lldp
                     and mgmt IP addr when cdp
         """
-
         if ntype == 'lldp':
-            key_map = {
-                'neighbor': 'SystemName',
-                'neighbor_intf': 'PortId',
-            }
-            neighbors = findall_in_data('LLDPNeighbor', nc_reply)
+            row_tag = 'LLDPNeighbor'
         else:
-            key_map = {
-                'neighbor': 'ManageAdress',
-                'neighbor_intf': 'PortId',
-            }
-            neighbors = findall_in_data('CDPNeighbor', nc_reply)
-
-        return_neigh = []
-
-        for neigh in neighbors:
-            temp = {}
-            index = find_in_data('IfIndex', neigh).text
-            interface = self._get_interface_from_index(index)
-            temp['local_intf'] = interface
-            for new_key, xml_tag in key_map.items():
-                obj = find_in_data(xml_tag, neigh)
-                if obj is not None:
-                    value = obj.text
-                    temp[new_key] = value
-            return_neigh.append(temp)
+            row_tag = 'CDPNeighbor'
+
+        key_map = self._key_map(ntype)
+        key_map['local_intf'] = 'IfIndex'
+        by_index = self.device.interface_table.by_index
+
+        return_neigh = rows_to_dicts(nc_reply, row_tag, key_map)
+        for neigh in return_neigh:
+            if 'local_intf' in neigh:
+                iface = by_index.get(neigh['local_intf'])
+                neigh['local_intf'] = iface['name'] if iface else None
 
         return return_neigh
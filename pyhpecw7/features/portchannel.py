@@ -3,8 +3,8 @@
 from pyhpecw7.features.errors import InvalidPortType, AggregationGroupError
 from pyhpecw7.utils.xml.lib import *
 from pyhpecw7.features.interface import Interface
-import base64
-import binascii
+from pyhpecw7.utils.bitmap import bitmap_to_indexes, indexes_to_bitmap
+from pyhpecw7.utils.templates import cli
 
 
 class Portchannel(object):
@@ -185,9 +185,10 @@ class Portchannel(object):
                     self._members_map_interface_key[each.lower()] = \
                         members_by_index[count]
 
-                for memb in members_by_name:
-                    mode = self.get_lacp_mode_by_name(name=memb)
-                    temp = dict(interface=memb, lacp_mode=mode)
+                lagg_members = self._get_lagg_members()
+                for count, memb in enumerate(members_by_name):
+                    row = lagg_members.get(str(members_by_index[count]), {})
+                    temp = dict(interface=memb, lacp_mode=row.get('lacp_mode'))
                     members.append(temp)
 
             return_pc['members'] = members_by_name
@@ -225,30 +226,18 @@ class Portchannel(object):
                         a portchannel config'd.
                     if list_type is misconfigured, an error string is returned.
         """
-        E = data_element_maker()
-        top = E.top(
-            E.LAGG(
-                E.LAGGMembers(
-                    E.LAGGMember(
-                        E.IfIndex(),
-                        E.GroupId()
-                    )
-                )
-            )
-        )
-
-        nc_get_reply = self.device.get(('subtree', top))
-        data = findall_in_data('LAGGMember', nc_get_reply.data_ele)
+        lagg_members = self._get_lagg_members()
+        by_index = self.device.interface_table.by_index
 
         members_as_index = []
         members_as_name = []
 
-        for each in data:
-            index = find_in_data('IfIndex', each).text
-            group = find_in_data('GroupId', each).text
-            if group != '0':
+        for index, row in lagg_members.items():
+            group = row.get('groupid')
+            if group and group != '0':
                 members_as_index.append(index)
-                name = self.get_interface_from_index(index)
+                iface = by_index.get(index)
+                name = iface['name'] if iface else None
                 members_as_name.append(name)
                 self._members_groups[name] = group
 
@@ -261,6 +250,91 @@ class Portchannel(object):
         else:
             return 'invalid value for list_type'
 
+    def _get_lagg_members(self):
+        """Get every LAGG member row with a single get.
+
+        The shared interface table is fetched in the same round trip
+        if the device doesn't have it cached yet.
+
+        Returns:
+            A dictionary of IfIndex to a dictionary with the keys
+            'groupid', 'intf_index' and 'lacp_mode'.
+        """
+        E = data_element_maker()
+        top = E.top(
+            E.LAGG(
+                E.LAGGMembers(
+                    E.LAGGMember(
+                        E.IfIndex(),
+                        E.GroupId(),
+                        E.LacpMode()
+                    )
+                )
+            )
+        )
+
+        iface_table = self.device.interface_table
+        nc_get_reply, = iface_table.get_many_with_table([('subtree', top)])
+
+        lagg_members = {}
+        rows = rows_to_dicts(nc_get_reply, 'LAGGMember', self.LACP,
+                             value_map=self.lacp_value_map)
+        for row in rows:
+            if row.get('intf_index'):
+                lagg_members[row['intf_index']] = row
+
+        return lagg_members
+
+    def get_all_portchannel_members(self):
+        """Get the members of every portchannel on the switch.
+
+        Member bitmaps are decoded locally and resolved against the
+        shared interface table, so this takes one or two gets no
+        matter how many portchannels and members there are.
+
+        Returns:
+            A dictionary keyed by the INTERNAL group ID (see ``get_config``)
+            with values that are dictionaries with the following k/v pairs:
+
+                :groupid (str): user facing group ID of the portchannel
+                :pc_type (str): "bridged" or "routed"
+                :members (list): list of current members by interface name
+        """
+        E = data_element_maker()
+        top = E.top(
+            E.LAGG(
+                E.LAGGGroups(
+                    E.LAGGGroup(
+                        E.GroupId(),
+                        E.MemberList()
+                    )
+                )
+            )
+        )
+
+        iface_table = self.device.interface_table
+        nc_get_reply, = iface_table.get_many_with_table([('subtree', top)])
+
+        portchannels = {}
+        for row in rows_to_dicts(nc_get_reply, 'LAGGGroup', self.PORTCHANNEL):
+            xgroupid = row.get('groupid')
+            if not xgroupid:
+                continue
+
+            group = int(xgroupid)
+            if group > 16384:
+                groupid, pc_type = str(group - 16384), 'routed'
+            else:
+                groupid, pc_type = xgroupid, 'bridged'
+
+            portchannels[xgroupid] = dict(
+                groupid=groupid,
+                pc_type=pc_type,
+                members=iface_table.names(bitmap_to_indexes(row.get('members')))
+            )
+
+        return portchannels
+
     def get_lacp_mode_by_name(self, name):
         """Get current LACP mode for a given interface
 
@@ -296,82 +370,47 @@ class Portchannel(object):
                 bitmap (str): memberlist as base64 as retrieved via NETCONF
 
             Returns:
-                This returns a list of interface names.
+                This returns a list of IfIndexes and a list of
+                interface names, in the same order. The interface
+                table is fetched again once if it misses an IfIndex,
+                and IfIndexes still unknown after that are left out
+                of both lists.
 
         """
+        table = self.device.interface_table
+        indexes = bitmap_to_indexes(bitmap)
+        names = table.names(indexes)
+        if None in names:
+            table.refresh()
+            names = table.names(indexes)
 
-        # hex_value = base64.b64decode(bitmap).decode('utf-8')
-        print('bitmap = ', bitmap)
-        # bitmap = str(base64.b64encode(bitmap.encode("utf-8")), "utf-8")
-        # hex_value = str(base64.b64decode(bitmap), "utf-8")
-        hex_value = base64.b64decode(bitmap).hex()
-        print('hex_value = ', hex_value)
-        h_size = len(hex_value) * 4
-        binary_value = (bin(int(hex_value, 16))[2:]).zfill(h_size)
-
-        print('binary_value = ', binary_value)
         members_by_index = []
-        for index, bit in enumerate(binary_value):
-            port = index + 1
-            if bit == '1':
-                members_by_index.append(port)
         members_by_name = []
-        for index in members_by_index:
-            members_by_name.append(self.get_interface_from_index(str(index)))
+        for index, name in zip(indexes, names):
+            if name is not None:
+                members_by_index.append(index)
+                members_by_name.append(name)
 
         return members_by_index, members_by_name
-#    def _get_bitmap_from_members(self, members):
-#        """Return bitmap given a list of interface names
-#           Not used, but kept, just in case :)
-#        """
-#        index_list = []
-#        for member in members:
-#            index = self.get_index_from_interface(member)
-#            index_list.append(int(index))
-#
-#        index_list.sort()
-#        binary = ''
-#        start = 1
-#        for finish in index_list:
-#            for num in range(start, finish):
-#                binary += '0'
-#            binary += '1'
-#            start = finish + 1
-#
-#        lenbinary = len(binary)
-#        start = 8
-#        while (start % lenbinary) == start:
-#            start += 8
-#        newfill = start - len(binary)
-#        binary += newfill * '0'
-#
-#        # chr only goes up to 255!!! fixed in py3!!! ugh
-#        # bitmap = base64.b64encode(chr(int(binary, 2)))
-#        hexa = hex(int(binary, 2))[2:]
-#        if len(hexa) % 2 != 0:
-#            hexa += '0'
-#        converted_to_ascii = binascii.a2b_hex(hexa)
-#        bitmap = base64.b64encode(converted_to_ascii)
-#
-#        return bitmap
-    def get_interface_from_index(self, index):
-        """Return interface name based on a given ifindex
+
+    def _get_bitmap_from_members(self, members):
+        """Return bitmap given a list of interface names
+
+            Args:
+                members (list): interface names
+
+            Returns:
+                The memberlist as base64, as expected via NETCONF.
         """
-        E = data_element_maker()
-        top = E.top(
-            E.Ifmgr(
-                E.Interfaces(
-                    E.Interface(
-                        E.IfIndex(index)
-                    )
-                )
-            )
-        )
+        index_list = [self.get_index_from_interface(member)
+                      for member in members]
 
-        nc_get_reply = self.device.get(('subtree', top))
-        interface_name = find_in_data('Name', nc_get_reply.data_ele).text
+        return indexes_to_bitmap(index_list)
 
-        return interface_name
+    def get_interface_from_index(self, index):
+        """Return interface name based on a given ifindex
+        """
+        return self.device.interface_table.name(index)
 
     def _pc_group_mapping(self):
         """Map user input for portchannel group to the internal integer
@@ -395,13 +434,13 @@ class Portchannel(object):
         elif self.pc_type == 'routed':
             self.fulltype = 'Route-Aggregation'
 
-        text = self.device.cli_display(
-            'display current-configuration interface {0} {1}'.format(
-                self.fulltype, self.groupid))
+        block = self.device.running_config.interface(
+            '{0}{1}'.format(self.fulltype, self.groupid))
 
-        text_as_list = text.split('\n')
-
-        self.raw_config = text_as_list
+        if block is None:
+            self.raw_config = []
+        else:
+            self.raw_config = block.lines()
 
     def get_selected_port_min(self):
         """Get selected port min configuration
@@ -411,16 +450,8 @@ class Portchannel(object):
                 configured value on the switch, else it returns None
 
         """
-        if not self.raw_config:
-            self._get_pc_config_raw()
+        return self._get_selected_ports().get('min')
 
-        find = 'selected-port minimum'
-        for each in self.raw_config:
-            if find in each:
-                min_value = each.split(find)[-1].strip()
-                return min_value
-
-        return None
     def get_selected_port_max(self):
         """Get selected port max configuration
 
@@ -428,15 +459,22 @@ class Portchannel(object):
                 This returns the selected-port maximum
                 configured value on the switch, else it returns None
         """
+        return self._get_selected_ports().get('max')
+
+    def _get_selected_ports(self):
+        """Parse the selected-port limits from the raw config.
+        Limits that aren't configured are None.
+        """
         if not self.raw_config:
             self._get_pc_config_raw()
 
-        find = 'selected-port maximum'
-        for each in self.raw_config:
-            if find in each:
-                max_value = each.split(find)[-1].strip()
-                return max_value
-        return None
+        parsed = cli.get_structured_data('lagg_selected_port.tmpl',
+                                         '\n'.join(self.raw_config))
+        if not parsed:
+            return {}
+
+        return dict((k, v or None) for k, v in parsed[0].items())
+
 #gqy
     def get_smlag(self):
         if not self.raw_config:
@@ -705,6 +743,7 @@ class Portchannel(object):
         """
         if portchannel.get('members'):
             members = portchannel.get('members')
+            member_dict = self.get_all_members(asdict=True)
             for each in members:
                 interf = Interface(self.device, each)
                 configured_type = interf.get_config().get('type')
@@ -713,7 +752,6 @@ class Portchannel(object):
                 if configured_type != self.pc_type:
                     raise InvalidPortType(each, configured_type,
                                           self.pc_type)
-                member_dict = self.get_all_members(asdict=True)
                 existing_group = member_dict.get(each)
                 if existing_group:
                     if existing_group != self._xgroupid:
@@ -0,0 +1,128 @@
+"""Shared, parsed running configuration of HPCOM7 devices.
+"""
+import re
+from pyhpecw7.utils.config_tree import parse_config
+
+# splits an interface name into its type and number, e.g. Vlan-interface10
+_IFACE_RE = re.compile(r'^([A-Za-z][A-Za-z\-]*?)\s*(\d\S*)$')
+
+
+class RunningConfig(object):
+    """This class holds the running configuration of a device, fetched
+    with one ``display current-configuration`` and parsed into blocks,
+    so that CLI-scraping feature classes don't each have to fetch and
+    parse their own slice of it. It is shared through
+    ``HPCOM7.running_config``.
+
+    The snapshot is loaded on first use and is dropped by the device
+    whenever the session changes the configuration.
+
+    Args:
+        device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
+            object.
+
+    Attributes:
+        device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
+            object.
+    """
+    def __init__(self, device):
+        self.device = device
+
+        self._blocks = None
+        self._by_command = None
+        self._interfaces = None
+
+    def refresh(self):
+        """Fetch the running configuration from the device.
+        """
+        text = self.device.cli_display('display current-configuration')
+        self.load(text)
+
+    def load(self, text):
+        """Parse the output of ``display current-configuration``,
+        see ``parse_config``.
+        """
+        blocks = parse_config(text)
+
+        by_command = {}
+        interfaces = {}
+        for block in blocks:
+            key = ' '.join(block.command.split()).lower()
+            by_command.setdefault(key, block)
+            if key.startswith('interface '):
+                interfaces.setdefault(key.split()[1], block)
+
+        self._blocks = blocks
+        self._by_command = by_command
+        self._interfaces = interfaces
+
+    def invalidate(self):
+        """Drop the snapshot. The next lookup fetches it again.
+        """
+        self._blocks = None
+        self._by_command = None
+        self._interfaces = None
+
+    @property
+    def loaded(self):
+        return self._blocks is not None
+
+    @property
+    def blocks(self):
+        """The ``ConfigBlock`` of every top level command, in order.
+        """
+        if not self.loaded:
+            self.refresh()
+        return self._blocks
+
+    def block(self, command):
+        """Return the top level block of a command, e.g. 'bgp 100',
+        or None. Case and repeated spaces are ignored.
+        """
+        if not self.loaded:
+            self.refresh()
+        return self._by_command.get(' '.join(command.split()).lower())
+
+    def find(self, prefix):
+        """Return the top level blocks whose command
+        starts with ``prefix``, e.g. 'ip vpn-instance'.
+        """
+        return [block for block in self.blocks
+                if block.command.startswith(prefix)]
+
+    def include(self, pattern):
+        """Return every line of the configuration matching a
+        regular expression, like ``| include`` on the CLI.
+        Lines keep their indentation.
+        """
+        regex = re.compile(pattern)
+        lines = []
+        for block in self.blocks:
+            lines.extend(line for line in block.lines() if regex.search(line))
+        return lines
+
+    def interface(self, name):
+        """Return the block of an interface, or None.
+
+        The name may be abbreviated as on the CLI and may contain
+        a space, e.g. 'vlan 10' for 'interface Vlan-interface10'.
+        """
+        if not self.loaded:
+            self.refresh()
+
+        key = name.replace(' ', '').lower()
+        block = self._interfaces.get(key)
+        if block is not None:
+            return block
+
+        match = _IFACE_RE.match(key)
+        if match is None:
+            return None
+        prefix, number = match.groups()
+        for iface, block in self._interfaces.items():
+            iface_match = _IFACE_RE.match(iface)
+            if iface_match and iface_match.group(2) == number \
+                    and iface_match.group(1).startswith(prefix):
+                return block
+
+        return None
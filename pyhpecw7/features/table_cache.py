@@ -0,0 +1,146 @@
+"""Whole-table cache serving single-row gets of HPCOM7 devices.
+"""
+import copy
+from pyhpecw7.utils.xml.lib import *
+
+
+class CachedReply(object):
+    """A get reply built from cached rows, with the attributes of
+    ncclient's ``GetReply`` that feature classes read.
+
+    Attributes:
+        data_ele (etree.Element): the <data> element of the reply.
+    """
+    def __init__(self, data_ele):
+        self.data_ele = data_ele
+
+    @property
+    def data_xml(self):
+        return etree.tostring(self.data_ele)
+
+    xml = data_xml
+
+
+class TableCache(object):
+    """This class fetches whole tables of a device, e.g. VLAN/Interfaces,
+    with one get each and answers the single-row gets that feature
+    classes send, e.g. the row of one IfIndex, from those tables.
+
+    Configuring the same feature on many interfaces then costs one get
+    per table instead of one get per interface. It is used through
+    ``HPCOM7.table_cache()``, which routes ``HPCOM7.get`` through it.
+
+    Only subtree filters of the form top/Module/Table/Row, where the
+    row has leaves only and at least one of them holds a value to
+    match, are served. Every column of the matching rows is returned,
+    the same as a filter without selection leaves would return.
+    Anything else is sent to the device.
+
+    Args:
+        device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
+            object.
+
+    Attributes:
+        device (HPCOM7): connected instance of a ``pyhpecw7.comware.HPCOM7``
+            object.
+        hits (int): gets answered from the cache.
+    """
+    def __init__(self, device):
+        self.device = device
+        self.hits = 0
+
+        # (module, table, row) -> list of row elements
+        self._tables = {}
+        # (module, table, row, match tags) -> {match values: [rows]}
+        self._indexes = {}
+
+    def invalidate(self):
+        """Drop every table. The next get fetches them again.
+        """
+        self._tables = {}
+        self._indexes = {}
+
+    def get(self, get_tuple):
+        """Return the reply to a get from the cache, or None if the
+        filter isn't a single-row filter of a table.
+
+        Args:
+            get_tuple: The tuple sent to ``HPCOM7.get``,
+                e.g: ('subtree', <etree.Element>)
+        """
+        parsed = self._parse(get_tuple)
+        if parsed is None:
+            return None
+        key, matches = parsed
+
+        tags = tuple(tag for tag, _ in matches)
+        index = self._index(key, tags)
+        rows = index.get(tuple(value for _, value in matches), [])
+        self.hits += 1
+
+        return CachedReply(self._reply(key, rows))
+
+    def _parse(self, get_tuple):
+        """Return the (module, table, row) tags of a single-row filter
+        and its (tag, value) pairs to match, or None.
+        """
+        if not isinstance(get_tuple, tuple) or len(get_tuple) != 2 \
+                or get_tuple[0] != 'subtree':
+            return None
+
+        path = [get_tuple[1]]
+        for _ in range(3):
+            if len(path[-1]) != 1:
+                return None
+            path.append(path[-1][0])
+        top, module, table, row = path
+        if etree.QName(top).localname != 'top' or not len(row):
+            return None
+
+        matches = []
+        for leaf in row:
+            if len(leaf) or not isinstance(leaf.tag, str):
+                return None
+            if leaf.text and leaf.text.strip():
+                matches.append((leaf.tag, leaf.text.strip()))
+        if not matches:
+            return None
+
+        return (module.tag, table.tag, row.tag), sorted(matches)
+
+    def _table(self, key):
+        rows = self._tables.get(key)
+        if rows is None:
+            module, table, row = key
+            top = data_element_maker().top()
+            etree.SubElement(etree.SubElement(
+                etree.SubElement(top, module), table), row)
+
+            nc_get_reply = self.device.get(('subtree', top))
+            rows = nc_get_reply.data_ele.findall('.//' + row)
+            self._tables[key] = rows
+        return rows
+
+    def _index(self, key, tags):
+        index = self._indexes.get(key + (tags,))
+        if index is None:
+            index = {}
+            for row in self._table(key):
+                values = []
+                for tag in tags:
+                    leaf = row.find(tag)
+                    if leaf is None or leaf.text is None:
+                        break
+                    values.append(leaf.text.strip())
+                else:
+                    index.setdefault(tuple(values), []).append(row)
+            self._indexes[key + (tags,)] = index
+        return index
+
+    def _reply(self, key, rows):
+        module, table, _ = key
+        data = nc_element_maker().data(data_element_maker().top())
+        table_ele = etree.SubElement(etree.SubElement(data[0], module), table)
+        for row in rows:
+            table_ele.append(copy.deepcopy(row))
+        return data
@@ -1,5 +1,6 @@
 """Manage VLANS on HPCOM7 devices.
 """
+import collections
 from pyhpecw7.features.errors import LengthOfStringError, VlanIDError
 from pyhpecw7.utils.xml.lib import *
 
@@ -42,19 +43,175 @@ class Vlan(object):
 
         return top
 
-    def get_vlan_list(self):
+    def get_vlan_list(self, page_size=1000):
         """Get a list of VLAN IDs that exist on the switch.
 
+        The VLAN table is paged through with get-bulk.
+
+        Args:
+            page_size (int): OPTIONAL - VLANs per get-bulk.
+                Defaults to 1000.
+
         Returns:
             It returns a list of VLAN IDs as strings.
         """
-        top = self.gen_top()
-        nc_get_reply = self.device.get(('subtree', top))
-        vlans_xml = findall_in_data('ID', nc_get_reply.data_ele)
-        vlans = [vlan.text for vlan in vlans_xml]
+        E = data_element_maker()
+        top = E.top(
+            E.VLAN(
+                E.VLANs(
+                    E.VLANID(
+                        E.ID()
+                    )
+                )
+            )
+        )
+        rows = self.device.iter_table(top, ['ID'], page_size=page_size,
+                                      key_map={'vlanid': 'ID'})
+        vlans = [row['vlanid'] for row in rows]
 
         return vlans
 
+    def get_vlan_table(self, page_size=1000):
+        """Get the configuration of every VLAN on the switch.
+
+        The VLAN table is paged through with get-bulk, so any number
+        of VLANs costs one get-bulk per ``page_size`` VLANs.
+
+        Args:
+            page_size (int): OPTIONAL - VLANs per get-bulk.
+                Defaults to 1000.
+
+        Returns:
+            An ordered dictionary of VLAN configurations, as returned
+            by ``get_config``, keyed by VLAN ID.
+        """
+        E = data_element_maker()
+        top = E.top(
+            E.VLAN(
+                E.VLANs(
+                    E.VLANID(
+                        E.ID(),
+                        E.Name(),
+                        E.Description()
+                    )
+                )
+            )
+        )
+        rows = self.device.iter_table(top, ['ID'], page_size=page_size,
+                                      key_map=self.vlan_key_map)
+        table = collections.OrderedDict()
+        for row in rows:
+            table[row['vlanid']] = row
+
+        return table
+
+    def get_bulk_delta(self, vlans, state='present', existing=None):
+        """Compare many VLANs with the VLAN table of the switch.
+
+        Args:
+            vlans (list): dictionaries of the VLANs, each with a 'vlanid'
+                and optionally a 'name' and 'descr'.
+            state (str): OPTIONAL - "present" or "absent".
+                Defaults to "present".
+            existing (dict): OPTIONAL - the VLAN table, as returned by
+                ``get_vlan_table``. Fetched if not given.
+
+        Returns:
+            A list of the dictionaries of the VLANs to create or change,
+            each with its 'vlanid' and only the keys that differ, or of
+            the VLANs to remove, each with its 'vlanid' and
+            'state': 'absent', so ``build_bulk`` removes them.
+        """
+        if existing is None:
+            existing = self.get_vlan_table()
+
+        delta = []
+        for vlan in vlans:
+            vlanid = str(vlan['vlanid'])
+            current = existing.get(vlanid)
+            if state == 'absent':
+                if current:
+                    delta.append(dict(vlanid=vlanid, state='absent'))
+                continue
+
+            changes = dict((k, v) for k, v in vlan.items()
+                           if k != 'vlanid' and v is not None
+                           and (current or {}).get(k) != v)
+            if changes or not current:
+                changes['vlanid'] = vlanid
+                delta.append(changes)
+
+        return delta
+
+    def build_bulk(self, delta, stage=False, chunk_size=1000):
+        """Stage or execute the XML objects configuring many VLANs at once.
+
+        The VLANs are sent in one edit_config per ``chunk_size`` VLANs,
+        instead of one per VLAN. VLANs with 'state': 'absent' are
+        removed, every other VLAN is created or changed, in the order
+        of ``delta``.
+
+        Args:
+            delta (list): VLAN dictionaries, as returned by
+                ``get_bulk_delta``.
+            stage (bool): whether to stage the commands or execute immediately
+            chunk_size (int): OPTIONAL - VLANs per edit_config.
+                Defaults to 1000.
+
+        Returns:
+            True if stage=True and successfully staged
+            List of etree.Element XML responses if immediate execution
+        """
+        # consecutive VLANs with the same state, as (state, vlans)
+        runs = []
+        for vlan in delta:
+            state = vlan.get('state', 'present')
+            if not runs or runs[-1][0] != state:
+                runs.append((state, []))
+            runs[-1][1].append(vlan)
+
+        configs = []
+        for state, vlans in runs:
+            for start in range(0, len(vlans), chunk_size):
+                configs.append(self._build_bulk_config(
+                    vlans[start:start + chunk_size], state))
+
+        if stage:
+            for config in configs:
+                self.device.stage_config(config, 'edit_config')
+            return True
+
+        with self.device.transaction():
+            return [self.device.edit_config(config) for config in configs]
+
+    def _build_bulk_config(self, delta, state):
+        """Build the XML object configuring several VLANs.
+        """
+        operation = 'delete' if state == 'absent' else 'merge'
+
+        EC = nc_element_maker()
+        E = config_element_maker()
+
+        rows = []
+        for vlan in delta:
+            params = [('vlanid', vlan['vlanid'])]
+            if state != 'absent':
+                params += [(k, v) for k, v in vlan.items()
+                           if k not in ('vlanid', 'state')]
+            rows.append(E.VLANID(
+                *config_params(collections.OrderedDict(params), self.vlan_key_map)))
+
+        config = EC.config(
+            E.top(
+                E.VLAN(
+                    E.VLANs(*rows),
+                    **operation_kwarg(operation)
+                )
+            )
+        )
+
+        return config
+
     def get_config(self):
         """Gets current configuration for a given VLAN ID
 
@@ -6,6 +6,7 @@ from pyhpecw7.utils.xml.lib import reverse_value_map
 from pyhpecw7.features.errors import BgpRelyParamsError,BgpMissParamsError
 from pyhpecw7.features.interface import Interface
 from pyhpecw7.utils.xml.lib import *
+from pyhpecw7.utils.templates import cli
 
 
 class Instance(object):
@@ -16,13 +17,9 @@ class Instance(object):
         self.vpn_instance = vpn_instance
 
     def get_config(self):
-        existing = []
-        config = self.device.cli_display('display current-configuration | include vpn-instance')
-        instance_config = config.split('\r\n')
-        for line in instance_config[1:]:
-            if re.search(r'instance',line):
-                vsi_name = line.split('instance')[-1]
-                existing.append(vsi_name)
+        config = self.device.running_config.include('vpn-instance')
+        parsed = cli.get_structured_data('vpn_instance.tmpl', '\n'.join(config))
+        existing = [each['name'] for each in parsed]
         return existing
 
     def build_vpn(self, stage=False, **kvargs):
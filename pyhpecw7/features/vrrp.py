@@ -62,12 +62,7 @@ class VRRP(object):
 
         """
         auth = {}
-        commands = 'display current-configuration interface' \
-                   + ' {0} | inc "vrid {1} auth"'.format(self.interface,
-                                                         self.vrid)
-        rsp = self.device.cli_display(commands)
-        by_line = rsp.split('\n')
-        for each in by_line[1:]:
+        for each in self._interface_include('vrid {0} auth'.format(self.vrid)):
             if 'authentication-mode' in each:
                 auth = each.split('authentication-mode')[-1].strip()
                 auth_vars = auth.split(' ')
@@ -93,12 +88,7 @@ class VRRP(object):
 
         """
         track = {}
-        commands = 'display current-configuration interface' \
-                   + ' {0} | inc "vrid {1} track"'.format(self.interface,
-                                                         self.vrid)
-        rsp = self.device.cli_display(commands)
-        by_line = rsp.split('\n')
-        for each in by_line[1:]:
+        for each in self._interface_include('vrid {0} track'.format(self.vrid)):
             if 'track' in each:
                 track = each.split('track')[-1].strip()
                 track_vars = track.split(' ')
@@ -108,6 +98,14 @@ class VRRP(object):
                     track = dict(track=track, switch=switch,)
         return track
 
+    def _interface_include(self, pattern):
+        """Lines of the interface's running config matching a pattern.
+        """
+        block = self.device.running_config.interface(self.interface)
+        if block is None:
+            return []
+        return block.include(pattern)
+
     def _apply_value_maps(self, existing):
         """Manipulating value for preempt
         """
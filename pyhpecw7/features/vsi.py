@@ -1,6 +1,5 @@
 """Manage VXLAN configurations on HPCOM7 devices.
 """
-import re
 from lxml import etree
 from pyhpecw7.utils.xml.lib import *
 from pyhpecw7.utils.templates import cli
@@ -28,12 +27,9 @@ class Vsi(object):
 
         """
         existing = []
-        config = self.device.cli_display('display current-configuration | include vsi')
-        vsi_config = config.split('\r\n')
-        for line in vsi_config[1:]:
-            if re.search(r'^vsi',line):
-                vsi_name = line.split('vsi')[-1]
-                existing.append(vsi_name)
+        for block in self.device.running_config.find('vsi'):
+            vsi_name = block.line.split('vsi')[-1]
+            existing.append(vsi_name)
         return existing
 
     def build(self, stage=False, **kvargs):
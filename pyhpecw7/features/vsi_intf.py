@@ -22,9 +22,8 @@ class Vsi(object):
 
     def get_vpn_config(self):
         existing_vpn = []
-        config = self.device.cli_display('display current-configuration | include vpn-instance')
-        vpn_config = config.split('\r\n')
-        for line in vpn_config[1:]:
+        vpn_config = self.device.running_config.include('vpn-instance')
+        for line in vpn_config:
             if len(line) > 2:
                 vpn = line.split('vpn-instance')[1].strip(' ')
                 existing_vpn.append(vpn)
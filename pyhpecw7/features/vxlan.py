@@ -44,11 +44,12 @@ class Tunnel(object):
 
         """
         existing = {}
-        config = self.device.cli_display(
-            'display current-configuration interface Tunnel {0}'.format(
-                self.tunnel))
+        block = self.device.running_config.interface(
+            'Tunnel{0}'.format(self.tunnel))
+        if block is None:
+            return existing
 
-        parsed = cli.get_structured_data('tunnel.tmpl', config)
+        parsed = cli.get_structured_data('tunnel.tmpl', block.text())
 
         if not parsed:
             existing = {}  # i.e, does not exist
@@ -65,16 +66,11 @@ class Tunnel(object):
             String that is the global source IP address on the switch
         """
         address = None
-        config = self.device.cli_display(
-            'display current-configuration | inc "tunnel global source"')
-        config_list = config.split('\n')
-        if len(config_list) == 2:
-            return None
-        else:
-            for each in config_list:
-                if 'tunnel global' in each:
-                    address = each.split(
-                        'tunnel global source-address')[-1].strip()
+        config_list = self.device.running_config.include(
+            'tunnel global source')
+        for each in config_list:
+            address = each.split(
+                'tunnel global source-address')[-1].strip()
         return address
 
     def build(self, stage=False, **kvargs):
@@ -789,19 +785,6 @@ class L2EthService(object):
         """
         interface_name = None
         if index:
-            E = data_element_maker()
-            top = E.top(
-                E.Ifmgr(
-                    E.Interfaces(
-                        E.Interface(
-                            E.IfIndex(index),
-                            E.Name()
-                        )
-                    )
-                )
-            )
-
-            nc_get_reply = self.device.get(('subtree', top))
-            interface_name = find_in_data('Name', nc_get_reply.data_ele).text
+            interface_name = self.device.interface_table.name(index)
 
         return interface_name
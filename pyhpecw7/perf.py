@@ -0,0 +1,224 @@
+"""Instrument the NETCONF RPCs sent by HPCOM7 devices.
+
+(c) Copyright 2016 Hewlett Packard Enterprise Development LP Licensed under the Apache License, Version 2.0
+(the "License"); you may not use this file except in compliance with the License. You may obtain a copy of the License
+at http://www.apache.org/licenses/LICENSE-2.0 Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing permissions and limitations under the License.
+
+"""
+import collections
+import contextlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+# structured log of every RPC event, at DEBUG level
+logger = logging.getLogger('pyhpecw7.perf')
+
+# set to a true value, e.g. in a play's ``environment``, to add a
+# ``perf`` summary to the results of the comware_* modules
+PERF_ENV = 'PYHPECW7_PERF'
+
+# numeric fields of an event, summed up by ``PerfRecorder``
+EVENT_TOTALS = ('rpcs', 'seconds', 'request_bytes', 'reply_bytes',
+                'lock_wait', 'latency', 'parse_time')
+
+_MESSAGE_ID = re.compile(r'message-id="([^"]*)"')
+
+# frames of these files are skipped when looking for the caller of an RPC
+_INTERNAL_FILES = set([contextlib.__file__])
+for _name in ('comware.py', 'perf.py'):
+    _INTERNAL_FILES.add(os.path.join(os.path.dirname(__file__), _name))
+    _INTERNAL_FILES.add(os.path.join(os.path.dirname(os.path.abspath(__file__)), _name))
+
+
+def find_caller():
+    """Return what sent the current RPC, e.g. 'Vlan.get_config' or
+    'comware_vlan.main': the first function outside ``HPCOM7``.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename in _INTERNAL_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return None
+
+    name = frame.f_code.co_name
+    instance = frame.f_locals.get('self')
+    if instance is not None:
+        return type(instance).__name__ + '.' + name
+
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return module + '.' + name
+
+
+def new_event(operation, caller=None):
+    """Return an RPC event with every field zeroed.
+
+    Args:
+        operation (str): the NETCONF operation, e.g. 'get', 'edit_config',
+            or 'open' and 'close' for the session itself.
+        caller (str): OPTIONAL - see ``find_caller``.
+
+    Returns:
+        A dictionary with the following k/v pairs:
+
+            :operation (str): the NETCONF operation
+            :caller (str): the function that sent it
+            :host (str): the device
+            :rpcs (int): RPCs sent, including lock and unlock
+            :seconds (float): wall time of the whole call
+            :request_bytes (int): bytes of the request sent
+            :reply_bytes (int): bytes of the reply received
+            :lock_wait (float): seconds spent taking the NETCONF lock
+            :latency (float): seconds from sending the request to
+                receiving its reply
+            :parse_time (float): seconds from receiving the reply to
+                returning the result
+            :error (str): the exception raised, or None
+    """
+    return dict(operation=operation, caller=caller, host=None, rpcs=0,
+                seconds=0.0, request_bytes=0, reply_bytes=0, lock_wait=0.0,
+                latency=0.0, parse_time=0.0, error=None)
+
+
+class SessionMonitor(object):
+    """This class times and sizes the messages of an ncclient session.
+
+    It wraps the session's ``send`` and ``_dispatch_message`` so every
+    request is measured on the calling thread and every reply as soon
+    as the transport thread reads it, before ncclient parses it.
+
+    Args:
+        session: the ncclient transport session, i.e.
+            ``manager.connect(...)._session``.
+
+    Attributes:
+        last_sent (tuple): (message-id, bytes, time) of the last request
+            sent.
+    """
+    # replies nobody collected are dropped past this many
+    MAX_REPLIES = 1024
+
+    def __init__(self, session):
+        self.last_sent = (None, 0, 0.0)
+        self._replies = {}
+
+        send = session.send
+        dispatch = session._dispatch_message
+
+        def send_message(message):
+            self.last_sent = (self._message_id(message), len(message), time.time())
+            return send(message)
+
+        def dispatch_message(raw):
+            if len(self._replies) >= self.MAX_REPLIES:
+                self._replies.clear()
+            self._replies[self._message_id(raw)] = (time.time(), len(raw))
+            return dispatch(raw)
+
+        session.send = send_message
+        session._dispatch_message = dispatch_message
+
+    def _message_id(self, message):
+        match = _MESSAGE_ID.search(message, 0, 512)
+        if match:
+            return match.group(1)
+        return None
+
+    def reply(self, message_id):
+        """Return and forget the (time received, bytes) of the reply
+        to a request, or (None, 0) if it hasn't been received.
+        """
+        return self._replies.pop(message_id, (None, 0))
+
+
+class PerfRecorder(object):
+    """This class sums up the RPC events of a device, overall, by
+    operation and by caller.
+
+    ``HPCOM7`` feeds every event to its ``perf`` recorder; other
+    recorders can be added as hooks, e.g. one per Ansible task.
+
+    Args:
+        enabled (bool): OPTIONAL - whether the summary is wanted in
+            module results. Defaults to the ``PYHPECW7_PERF``
+            environment variable.
+        keep_events (bool): OPTIONAL - keep every event in ``events``.
+            Defaults to False.
+
+    Attributes:
+        events (list): the events recorded, if ``keep_events``.
+    """
+    def __init__(self, enabled=None, keep_events=False):
+        if enabled is None:
+            enabled = os.environ.get(PERF_ENV, '').lower() not in ('', '0', 'false', 'no')
+        self.enabled = enabled
+        self.keep_events = keep_events
+        self.reset()
+
+    def __call__(self, event):
+        self.record(event)
+
+    def reset(self):
+        """Forget every event recorded so far.
+        """
+        self.events = []
+        self._totals = self._zero()
+        self._operations = collections.OrderedDict()
+        self._callers = collections.OrderedDict()
+
+    def _zero(self):
+        totals = dict((key, 0) for key in EVENT_TOTALS)
+        totals['count'] = 0
+        totals['errors'] = 0
+        return totals
+
+    def record(self, event):
+        """Add an event, see ``new_event``.
+        """
+        if self.keep_events:
+            self.events.append(event)
+
+        groups = [self._totals,
+                  self._operations.setdefault(event['operation'], self._zero())]
+        if event['caller']:
+            groups.append(self._callers.setdefault(event['caller'], self._zero()))
+
+        for totals in groups:
+            totals['count'] += 1
+            if event['error']:
+                totals['errors'] += 1
+            for key in EVENT_TOTALS:
+                totals[key] += event[key]
+
+    def summary(self):
+        """Return the totals of the events recorded.
+
+        Returns:
+            A dictionary of the ``EVENT_TOTALS`` summed over every event,
+            plus 'count' and 'errors' (events and failed events), with
+            the same totals by operation under 'operations' and by caller
+            under 'callers'. Seconds are rounded to the microsecond.
+        """
+        summary = self._rounded(self._totals)
+        summary['operations'] = dict(
+            (name, self._rounded(totals)) for name, totals in self._operations.items())
+        summary['callers'] = dict(
+            (name, self._rounded(totals)) for name, totals in self._callers.items())
+        return summary
+
+    def _rounded(self, totals):
+        return dict((key, round(value, 6) if isinstance(value, float) else value)
+                    for key, value in totals.items())
+
+
+def log_event(event):
+    """Write an event to the ``pyhpecw7.perf`` log as one JSON object,
+    also attached to the log record as ``perf``.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('%s', json.dumps(event, sort_keys=True), extra={'perf': event})
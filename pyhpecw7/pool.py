@@ -0,0 +1,266 @@
+"""Pool NETCONF sessions to HPCOM7 devices.
+
+(c) Copyright 2016 Hewlett Packard Enterprise Development LP Licensed under the Apache License, Version 2.0
+(the "License"); you may not use this file except in compliance with the License. You may obtain a copy of the License
+at http://www.apache.org/licenses/LICENSE-2.0 Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing permissions and limitations under the License.
+
+"""
+import contextlib
+import threading
+import time
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.utils.xml.lib import data_element_maker
+from pyhpecw7.errors import PYHPError, PoolExhaustedError
+
+
+class SessionPool(object):
+    """This class keeps open ``HPCOM7`` sessions around so that
+    long running callers don't pay for SSH and NETCONF setup
+    on every operation.
+
+    Sessions are keyed by (host, port, username). Idle sessions are
+    health checked with a small ``get`` before being handed out and
+    on a keepalive timer, and are transparently reopened if the
+    NETCONF session has dropped.
+
+    Args:
+        max_sessions (int): OPTIONAL - maximum number of open sessions
+            per device. Default is 4.
+        keepalive (int): OPTIONAL - seconds between keepalive RPCs on
+            idle sessions. ``0`` or ``None`` disables the keepalive timer.
+            Default is 60.
+        max_idle (int): OPTIONAL - seconds after which an idle session is
+            closed instead of kept alive. ``None`` keeps idle sessions
+            forever. Default is None.
+        wait (int): OPTIONAL - seconds ``acquire`` blocks waiting for
+            a free session when ``max_sessions`` is reached. Default is 30.
+
+    Example::
+
+        pool = SessionPool(max_sessions=2)
+        with pool.session(host='10.1.1.1', username='hp',
+                          password='hp123') as device:
+            vlans = Vlan(device).get_vlan_list()
+    """
+    def __init__(self, max_sessions=4, keepalive=60, max_idle=None, wait=30):
+        self.max_sessions = max_sessions
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self.wait = wait
+
+        self._cond = threading.Condition()
+        # key -> list of (HPCOM7, time released) tuples
+        self._idle = {}
+        # key -> number of sessions handed out
+        self._busy = {}
+        self._closed = False
+        self._stopped = threading.Event()
+
+        self._timer = None
+        if self.keepalive:
+            self._timer = threading.Thread(target=self._keepalive_loop)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _key(self, host, port, username):
+        return (host, int(port or 830), username)
+
+    def acquire(self, host, username, password=None, port=830,
+                timeout=None, open_kwargs=None, **kvargs):
+        """Return an open ``HPCOM7`` session for the given device.
+
+        Args:
+            host (str): hostname or IP address of the switch.
+            username (str): username used to login to the switch.
+            password (str): password used to login to the switch.
+            port (int): OPTIONAL - NETCONF port. Default is 830.
+            timeout (int): OPTIONAL - RPC timeout of newly opened sessions.
+            open_kwargs (dict): OPTIONAL - keyword arguments passed to
+                ``HPCOM7.open()``, e.g. ``look_for_keys``.
+            **kvargs: passed to the ``HPCOM7`` constructor.
+
+        Returns:
+            A connected ``HPCOM7`` object. It must be given back with
+            ``release()``.
+
+        Raises:
+            PoolExhaustedError: if ``max_sessions`` sessions are already
+                in use and none is released within ``wait`` seconds.
+            ConnectionError: if a new session cannot be opened.
+        """
+        key = self._key(host, port, username)
+        deadline = time.time() + (self.wait or 0)
+
+        with self._cond:
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    device = idle.pop()[0]
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    break
+                if self._busy.get(key, 0) < self.max_sessions:
+                    device = None
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolExhaustedError(host, port, self.max_sessions)
+                self._cond.wait(remaining)
+
+        try:
+            if device is None:
+                device = HPCOM7(host=host, username=username,
+                                password=password, port=port,
+                                timeout=timeout, open_delay=0, **kvargs)
+                device._pool_key = key
+                device._pool_open_kwargs = open_kwargs or {}
+                device.open(**device._pool_open_kwargs)
+            elif not self._is_alive(device):
+                self._reopen(device)
+        except Exception:
+            self._forget(key)
+            raise
+
+        return device
+
+    def release(self, device, discard=False):
+        """Give a session back to the pool.
+
+        Anything left in the session's staging area is dropped, and so
+        is its cached device state, e.g. the interface table and the
+        running config snapshot, so the next user starts fresh.
+
+        Args:
+            device (HPCOM7): a session returned by ``acquire()``.
+            discard (bool): OPTIONAL - close the session instead of
+                keeping it for reuse.
+        """
+        key = device._pool_key
+        del device.staged[:]
+        device.invalidate_caches()
+
+        if discard or self._closed or not device.connected:
+            self._close_quietly(device)
+            self._forget(key)
+            return
+
+        with self._cond:
+            self._busy[key] -= 1
+            self._idle.setdefault(key, []).append((device, time.time()))
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def session(self, **kvargs):
+        """Context manager around ``acquire()`` and ``release()``.
+
+        A session is discarded instead of reused if the block raises
+        an error that isn't a ``PYHPError``.
+        """
+        device = self.acquire(**kvargs)
+        discard = False
+        try:
+            yield device
+        except PYHPError:
+            raise
+        except Exception:
+            discard = True
+            raise
+        finally:
+            self.release(device, discard=discard)
+
+    def close(self):
+        """Close every idle session and stop the keepalive timer.
+
+        Sessions still handed out are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = {}
+            self._cond.notify_all()
+        self._stopped.set()
+
+        for sessions in idle.values():
+            for device, _ in sessions:
+                self._close_quietly(device)
+
+    def _forget(self, key):
+        with self._cond:
+            self._busy[key] -= 1
+            self._cond.notify()
+
+    def _is_alive(self, device):
+        """Return whether the session answers a small ``get``.
+        """
+        if not device.connected:
+            return False
+
+        E = data_element_maker()
+        top = E.top(
+            E.Device(
+                E.Base(
+                    E.HostName()
+                )
+            )
+        )
+        try:
+            device.get(('subtree', top))
+        except PYHPError:
+            return False
+
+        return True
+
+    def _reopen(self, device):
+        self._close_quietly(device)
+        device.open(**device._pool_open_kwargs)
+
+    def _close_quietly(self, device):
+        try:
+            device.close()
+        except Exception:
+            pass
+
+    def _keepalive_loop(self):
+        while not self._stopped.wait(self.keepalive):
+            self._keepalive()
+
+    def _keepalive(self):
+        """Health check idle sessions, reopening dropped ones and
+        closing the ones idle longer than ``max_idle``.
+
+        Sessions checked while the pool is closed are closed
+        instead of put back.
+        """
+        now = time.time()
+        with self._cond:
+            checkout = {}
+            for key, sessions in self._idle.items():
+                checkout[key] = list(sessions)
+                self._busy[key] = self._busy.get(key, 0) + len(sessions)
+                del sessions[:]
+
+        for key, sessions in checkout.items():
+            for device, released in sessions:
+                if self.max_idle and now - released > self.max_idle:
+                    self._close_quietly(device)
+                    self._forget(key)
+                    continue
+
+                try:
+                    if not self._is_alive(device):
+                        self._reopen(device)
+                except Exception:
+                    self._close_quietly(device)
+                    self._forget(key)
+                    continue
+
+                with self._cond:
+                    self._busy[key] -= 1
+                    closed = self._closed
+                    if not closed:
+                        self._idle.setdefault(key, []).append((device, released))
+                    self._cond.notify()
+                if closed:
+                    self._close_quietly(device)
@@ -0,0 +1,36 @@
+"""Run the stand-in Comware 7 NETCONF server from the command line, e.g.
+
+    python -m pyhpecw7.standin --port 8300 --interfaces 4000 --macs 60000
+"""
+import argparse
+from pyhpecw7.standin.model import DeviceModel
+from pyhpecw7.standin.server import StandInServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Stand-in Comware 7 NETCONF server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8300)
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--interfaces', type=int, default=48)
+    parser.add_argument('--vlans', type=int, default=1)
+    parser.add_argument('--macs', type=int, default=0)
+    parser.add_argument('--neighbors', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds added before each reply')
+    args = parser.parse_args()
+
+    model = DeviceModel.build(interfaces=args.interfaces, vlans=args.vlans,
+                              macs=args.macs, neighbors=args.neighbors)
+    server = StandInServer(model, host=args.host, port=args.port,
+                           username=args.username, password=args.password,
+                           latency=args.latency)
+    print('Serving {0} interfaces, {1} VLANs and {2} MACs on {3}:{4}'.format(
+        args.interfaces, args.vlans, args.macs, args.host, args.port))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
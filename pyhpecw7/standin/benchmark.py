@@ -0,0 +1,366 @@
+"""Benchmarks of ``pyhpecw7`` operations against the stand-in device,
+with RPC-count budgets.
+
+Each benchmark runs one operation at several scales and records its
+wall time, the RPCs and bytes the device received and sent, and the
+peak Python memory of the process. Runs fail when an operation needs
+more RPCs than its budget in ``budgets.json``, or when it fails, so the
+cost of each operation stays visible as the code changes.
+
+Only the operations the stand-in can serve are covered: the features
+reading the interface, VLAN, MAC and LLDP tables, facts and the running
+config, and the comware_facts, comware_vlan and comware_interface
+modules. Other feature classes and modules need tables the stand-in
+doesn't model, and are left to the playbooks in ``test-pbs``. Module
+benchmarks are skipped when Ansible is not installed.
+
+Run it with ``python -m pyhpecw7.standin.benchmark``, or with
+``--record`` to write the RPC counts of this run as the new budgets.
+"""
+import argparse
+import collections
+import json
+import os
+import runpy
+import sys
+import time
+import tracemalloc
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.standin.model import DeviceModel
+from pyhpecw7.standin.server import StandInServer
+
+# device sizes the benchmarks run at
+SCALES = collections.OrderedDict([
+    ('48', dict(interfaces=48, vlans=100, macs=1000, neighbors=48)),
+    ('384', dict(interfaces=384, vlans=100, macs=8000, neighbors=384)),
+    ('4000', dict(interfaces=4000, vlans=4000, macs=60000, neighbors=4000)),
+])
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+LIBRARY_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'library')
+
+# name -> (function, kind), in registration order
+BENCHMARKS = collections.OrderedDict()
+
+
+def benchmark(name, kind='feature'):
+    """Register a benchmark. Feature benchmarks are called with a
+    connected ``HPCOM7``; module benchmarks with the keyword arguments
+    of the stand-in's connection parameters.
+    """
+    def register(func):
+        BENCHMARKS[name] = (func, kind)
+        return func
+    return register
+
+
+def last_port(device):
+    return device.interface_table.by_index[
+        max(device.interface_table.by_index, key=int)]['name']
+
+
+@benchmark('facts')
+def _facts(device):
+    from pyhpecw7.features.facts import Facts
+    Facts(device).get_facts()
+
+
+@benchmark('interface_table')
+def _interface_table(device):
+    device.interface_table.name('1')
+
+
+@benchmark('vlan_list')
+def _vlan_list(device):
+    from pyhpecw7.features.vlan import Vlan
+    Vlan(device, '1').get_vlan_list()
+
+
+@benchmark('vlan_get_config')
+def _vlan_get_config(device):
+    from pyhpecw7.features.vlan import Vlan
+    Vlan(device, '1').get_config()
+
+
+@benchmark('vlan_build')
+def _vlan_build(device):
+    from pyhpecw7.features.vlan import Vlan
+    Vlan(device, '4094').build(stage=True, name='benchmark')
+    device.execute_staged()
+
+
+@benchmark('vlan_bulk')
+def _vlan_bulk(device):
+    from pyhpecw7.features.vlan import Vlan
+    vlan = Vlan(device)
+    vlans = [dict(vlanid=str(vlanid), name='benchmark{0}'.format(vlanid))
+             for vlanid in range(2, 4095)]
+    vlan.build_bulk(vlan.get_bulk_delta(vlans), stage=True)
+    device.execute_staged(coalesce=False)
+
+
+@benchmark('interface_get_config')
+def _interface_get_config(device):
+    from pyhpecw7.features.interface import Interface
+    Interface(device, last_port(device)).get_config()
+
+
+@benchmark('interface_build')
+def _interface_build(device):
+    from pyhpecw7.features.interface import Interface
+    Interface(device, last_port(device)).build(stage=True, description='benchmark')
+    device.execute_staged()
+
+
+@benchmark('switchport_get_config')
+def _switchport_get_config(device):
+    from pyhpecw7.features.switchport import Switchport
+    Switchport(device, last_port(device)).get_config()
+
+
+@benchmark('switchport_range')
+def _switchport_range(device):
+    from pyhpecw7.features.interface_range import InterfaceRange
+    from pyhpecw7.features.switchport import Switchport
+    names = [row['name'] for row in device.interface_table.by_index.values()]
+    switchports = InterfaceRange(device, Switchport, names)
+    proposed = dict(link_type='access', pvid='2')
+    switchports.build(switchports.get_delta(proposed, keep=('link_type',)))
+
+
+@benchmark('mac_table')
+def _mac_table(device):
+    from pyhpecw7.features.mac import MacUnicastTable
+    MacUnicastTable(device).getMacList()
+
+
+@benchmark('neighbors')
+def _neighbors(device):
+    from pyhpecw7.features.neighbor import Neighbors
+    Neighbors(device)
+
+
+@benchmark('running_config')
+def _running_config(device):
+    device.running_config.interface(last_port(device))
+
+
+@benchmark('comware_facts', kind='module')
+def _comware_facts(**params):
+    run_module('comware_facts', params)
+
+
+@benchmark('comware_vlan', kind='module')
+def _comware_vlan(**params):
+    run_module('comware_vlan', dict(params, vlanid='100-150', name='benchmark'))
+
+
+@benchmark('comware_interface', kind='module')
+def _comware_interface(**params):
+    run_module('comware_interface',
+               dict(params, name='Ten-GigabitEthernet1/0/1', description='benchmark'))
+
+
+def run_module(name, params):
+    """Run an Ansible module of ``library`` in this process.
+
+    Raises:
+        RuntimeError: if the module fails.
+    """
+    from ansible.module_utils import basic
+
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=params)).encode('utf-8')
+    stdout = sys.stdout
+    sys.stdout = collections.namedtuple('Sink', 'write flush')(
+        lambda text: None, lambda: None)
+    try:
+        runpy.run_path(os.path.join(LIBRARY_DIR, name + '.py'),
+                       run_name='__main__')
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError('{0} failed'.format(name))
+    finally:
+        sys.stdout = stdout
+
+
+def run(names=None, scales=None, latency=0):
+    """Run benchmarks against a stand-in device.
+
+    Every benchmark gets a new device of each scale and a new session.
+
+    Args:
+        names (list): OPTIONAL - benchmarks to run. Defaults to all.
+        scales (list): OPTIONAL - names of ``SCALES`` to run at.
+            Defaults to all.
+        latency (float): OPTIONAL - seconds the stand-in adds before
+            each reply. Defaults to 0.
+
+    Returns:
+        A list of dictionaries with the following k/v pairs:
+
+            :name (str): the benchmark
+            :scale (str): the scale
+            :seconds (float): wall time of the operation
+            :rpcs (int): RPCs the device received
+            :bytes_in (int): bytes the device received
+            :bytes_out (int): bytes the device sent
+            :peak_memory (int): peak bytes of Python memory allocated
+            :error (str): why the benchmark failed or was skipped, or None
+            :skipped (bool): whether the benchmark was skipped
+    """
+    names = names or list(BENCHMARKS)
+    scales = scales or list(SCALES)
+
+    results = []
+    with StandInServer(latency=latency) as server:
+        for scale in scales:
+            for name in names:
+                server.model = DeviceModel.build(**SCALES[scale])
+                results.append(_run_one(server, name, scale))
+
+    return results
+
+
+def _run_one(server, name, scale):
+    func, kind = BENCHMARKS[name]
+    result = dict(name=name, scale=scale, seconds=0.0, rpcs=0,
+                  bytes_in=0, bytes_out=0, peak_memory=0, error=None,
+                  skipped=False)
+
+    device = None
+    if kind == 'feature':
+        device = HPCOM7(host=server.host, port=server.port,
+                        username=server.username, password=server.password,
+                        timeout=600)
+        device.open()
+    else:
+        try:
+            import ansible
+        except ImportError:
+            result['error'] = 'skipped, ansible is not installed'
+            result['skipped'] = True
+            return result
+        params = dict(hostname=server.host, port=server.port,
+                      username=server.username, password=server.password)
+
+    server.model.rpc_counts.clear()
+    bytes_in, bytes_out = server.bytes_in, server.bytes_out
+    tracemalloc.start()
+    start = time.time()
+    try:
+        if device is not None:
+            func(device)
+        else:
+            func(**params)
+    except Exception as e:
+        result['error'] = str(e) or e.__class__.__name__
+    finally:
+        result['seconds'] = time.time() - start
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if device is not None:
+            device.close()
+
+    result['rpcs'] = sum(server.model.rpc_counts.values())
+    result['bytes_in'] = server.bytes_in - bytes_in
+    result['bytes_out'] = server.bytes_out - bytes_out
+    return result
+
+
+def load_budgets(path=BUDGETS_FILE):
+    """Return the RPC budgets, by benchmark and scale.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return {}
+
+
+def record_budgets(results, path=BUDGETS_FILE):
+    """Write the RPC counts of successful results as the budgets,
+    keeping the budgets of benchmarks that weren't run.
+    """
+    budgets = load_budgets(path)
+    for result in results:
+        if result['error'] is None:
+            budgets.setdefault(result['name'], {})[result['scale']] = result['rpcs']
+    with open(path, 'w') as f:
+        json.dump(budgets, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def failed(results):
+    """Return the results of benchmarks that failed, not counting
+    the skipped ones.
+    """
+    return [result for result in results
+            if result['error'] is not None and not result['skipped']]
+
+
+def over_budget(results, budgets):
+    """Return the results that needed more RPCs than their budget.
+    """
+    over = []
+    for result in results:
+        budget = budgets.get(result['name'], {}).get(result['scale'])
+        if budget is not None and result['rpcs'] > budget:
+            over.append(dict(result, budget=budget))
+    return over
+
+
+def format_results(results, budgets):
+    lines = ['{0:<24}{1:>6}{2:>10}{3:>7}{4:>8}{5:>12}{6:>12}{7:>10}'.format(
+        'benchmark', 'scale', 'seconds', 'rpcs', 'budget', 'bytes in',
+        'bytes out', 'peak KB')]
+    for result in results:
+        budget = budgets.get(result['name'], {}).get(result['scale'], '')
+        line = '{0:<24}{1:>6}{2:>10.3f}{3:>7}{4:>8}{5:>12}{6:>12}{7:>10}'.format(
+            result['name'], result['scale'], result['seconds'], result['rpcs'],
+            budget, result['bytes_in'], result['bytes_out'],
+            result['peak_memory'] // 1024)
+        if result['error']:
+            line += '  ' + result['error']
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark pyhpecw7 against the stand-in device.')
+    parser.add_argument('names', nargs='*', metavar='benchmark',
+                        help='benchmarks to run, default all: '
+                        + ', '.join(BENCHMARKS))
+    parser.add_argument('--scale', action='append', choices=list(SCALES),
+                        help='scales to run at, default all')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds the stand-in adds before each reply')
+    parser.add_argument('--budgets', default=BUDGETS_FILE,
+                        help='RPC budgets file')
+    parser.add_argument('--record', action='store_true',
+                        help='write the RPC counts of this run as the budgets')
+    args = parser.parse_args()
+
+    results = run(args.names, args.scale, args.latency)
+    if args.record:
+        record_budgets(results, args.budgets)
+
+    budgets = load_budgets(args.budgets)
+    print(format_results(results, budgets))
+
+    over = over_budget(results, budgets)
+    for result in over:
+        print('{0} at scale {1} needed {2} RPCs, over its budget of {3}'.format(
+            result['name'], result['scale'], result['rpcs'], result['budget']))
+    errors = failed(results)
+    for result in errors:
+        print('{0} at scale {1} failed: {2}'.format(
+            result['name'], result['scale'], result['error']))
+    sys.exit(1 if over or errors else 0)
+
+
+if __name__ == '__main__':
+    main()
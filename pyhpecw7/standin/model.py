@@ -0,0 +1,531 @@
+"""In-memory model of a Comware 7 device for the stand-in NETCONF server.
+
+The model holds the HP data tree (top/Module/Table/Row) and answers
+the operations ``HPCOM7`` sends: subtree-filtered get and get-config,
+get-bulk paging, edit-config, FileSystem actions and CLI commands.
+"""
+import bisect
+import copy
+import hashlib
+import re
+from lxml import etree
+from pyhpecw7.utils.xml.namespaces import HPDATA, HPDATA_C,\
+    HPACTION, HPACTION_C, HPBASE_C, NETCONFBASE_C
+
+# index columns of table rows, by row tag
+ROW_INDEXES = {
+    'Interface': ('IfIndex',),
+    'VLANID': ('ID',),
+    'LAGGGroup': ('GroupId',),
+    'LAGGMember': ('IfIndex',),
+    'Unicast': ('VLANID', 'MacAddress'),
+    'LLDPNeighbor': ('IfIndex', 'AgentID', 'NeighborIndex'),
+    'CDPNeighbor': ('IfIndex',),
+    'File': ('Name',),
+    'BootList': ('BootType',),
+}
+
+# ports per slot of generated interface names
+PORTS_PER_SLOT = 48
+
+
+class StandInError(Exception):
+    """An operation the stand-in device rejects,
+    answered with an rpc-error.
+
+    Args:
+        tag (str): the NETCONF error-tag, e.g. 'invalid-value'.
+        message (str): the error-message.
+    """
+    def __init__(self, tag, message=''):
+        super(StandInError, self).__init__(message)
+        self.tag = tag
+        self.message = message
+
+
+def localname(elem):
+    return etree.QName(elem).localname
+
+
+def natural_key(value):
+    """Sort key of index values, numbers by their value.
+    """
+    return tuple(int(part) if part.isdigit() else part
+                 for part in re.split(r'(\d+)', value or ''))
+
+
+def retag(elem, ns):
+    """Return a copy of an element with every tag moved to namespace ``ns``.
+    """
+    elem = copy.deepcopy(elem)
+    for each in elem.iter(etree.Element):
+        each.tag = '{%s}%s' % (ns, localname(each))
+    etree.cleanup_namespaces(elem)
+    return elem
+
+
+def _leaf(elem):
+    return len(elem) == 0
+
+
+def _row_key(row, index):
+    return tuple(row.findtext(HPDATA_C + tag) for tag in index)
+
+
+def _row_index(row):
+    index = ROW_INDEXES.get(localname(row))
+    if index is None:
+        leaves = [child for child in row if _leaf(child)]
+        index = (localname(leaves[0]),) if leaves else ()
+    return index
+
+
+def subtree_filter(data, filt):
+    """Apply a NETCONF subtree filter to one data element whose
+    tag matches the filter element's local name.
+
+    Args:
+        data (etree.Element): element of the model.
+        filt (etree.Element): element of the filter.
+
+    Returns:
+        The filtered copy of ``data``, or None if it doesn't match.
+    """
+    if not len(filt):
+        if filt.text and filt.text.strip():
+            if (data.text or '').strip() != filt.text.strip():
+                return None
+        return copy.deepcopy(data)
+
+    content = []
+    select = []
+    for child in filt:
+        if not isinstance(child.tag, str):
+            continue
+        if _leaf(child) and child.text and child.text.strip():
+            content.append(child)
+        else:
+            select.append(child)
+
+    for child in content:
+        found = data.find(HPDATA_C + localname(child))
+        if found is None or (found.text or '').strip() != child.text.strip():
+            return None
+
+    if not select:
+        return copy.deepcopy(data)
+
+    result = etree.Element(data.tag)
+    for child in content:
+        result.append(copy.deepcopy(data.find(HPDATA_C + localname(child))))
+
+    matched = False
+    for child in select:
+        for each in data.findall(HPDATA_C + localname(child)):
+            filtered = subtree_filter(each, child)
+            if filtered is not None:
+                result.append(filtered)
+                matched = True
+
+    if not matched and not content and len(data):
+        return None
+
+    return result
+
+
+class DeviceModel(object):
+    """In-memory Comware 7 device.
+
+    Args:
+        hostname (str): OPTIONAL - sysname of the device.
+        flash_size (int): OPTIONAL - free bytes reported on flash:/.
+
+    Attributes:
+        top (etree.Element): the data tree, in the HP data namespace.
+        files (dict): file contents by path, e.g. 'flash:/startup.cfg'.
+        cli_handlers (dict): output, or callables returning output, of
+            CLI commands by the start of the command. The longest
+            matching start wins.
+        cli_log (list): every CLI command received, in order.
+        rpc_counts (dict): number of RPCs received, by operation.
+    """
+    def __init__(self, hostname='standin', flash_size=2**30):
+        self.hostname = hostname
+        self.flash_size = flash_size
+        self.top = etree.Element(HPDATA_C + 'top', nsmap={None: HPDATA})
+        self.files = {}
+        self.cli_handlers = {
+            'display current-configuration': self._display_running,
+            'display version': self._display_version,
+            'dir': self._dir,
+            'more': self._more,
+        }
+        self.cli_log = []
+        self.rpc_counts = {}
+
+        self._sorted = {}
+
+        base = self.container('Device', 'Base')
+        for tag, text in (('HostName', hostname),
+                          ('LocalTime', '2016-01-30T01:47:07'),
+                          ('Uptime', '604800')):
+            etree.SubElement(base, HPDATA_C + tag).text = text
+        inventory = self.container('LLDP', 'Inventory')
+        for tag, text in (('SoftwareRev', '7.1.045 Release 2418P01'),
+                          ('SerialNum', 'CN00000000'),
+                          ('ModelName', 'HPE FF 5930-32QSFP+ Switch'),
+                          ('HardwareRev', 'Ver.A')):
+            etree.SubElement(inventory, HPDATA_C + tag).text = text
+
+    @classmethod
+    def build(cls, interfaces=48, vlans=1, macs=0, neighbors=0, **kvargs):
+        """Return a device of the given scale.
+
+        Args:
+            interfaces (int): OPTIONAL - Ten-GigabitEthernet ports,
+                48 per slot. Defaults to 48.
+            vlans (int): OPTIONAL - VLANs, from VLAN 1. Defaults to 1.
+            macs (int): OPTIONAL - learned MAC addresses, spread
+                over the VLANs and ports. Defaults to 0.
+            neighbors (int): OPTIONAL - LLDP neighbors, one per port
+                from the first port. Defaults to 0.
+            **kvargs: passed to the constructor.
+        """
+        device = cls(**kvargs)
+
+        ifaces = device.table('Ifmgr', 'Interfaces')
+        ports = device.table('VLAN', 'Interfaces')
+        for index in range(1, interfaces + 1):
+            slot, port = divmod(index - 1, PORTS_PER_SLOT)
+            name = 'Ten-GigabitEthernet{0}/0/{1}'.format(slot + 1, port + 1)
+            device.add_row(ifaces, 'Interface', IfIndex=index, Name=name,
+                           AbbreviatedName='XGE{0}/0/{1}'.format(slot + 1, port + 1),
+                           PortIndex=index, ifTypeExt=1, ifType=6,
+                           Description='{0} Interface'.format(name),
+                           AdminStatus=1, OperStatus=1, ConfigSpeed=1,
+                           ActualSpeed=10000000, ConfigDuplex=3,
+                           ActualDuplex=1, PortLayer=1)
+            device.add_row(ports, 'Interface', IfIndex=index, LinkType=1,
+                           PVID=1, UntaggedVlanList=1)
+
+        vlan_table = device.table('VLAN', 'VLANs')
+        for vlanid in range(1, vlans + 1):
+            device.add_row(vlan_table, 'VLANID', ID=vlanid,
+                           Name='VLAN {0:04d}'.format(vlanid),
+                           Description='VLAN {0:04d}'.format(vlanid))
+
+        mac_table = device.table('MAC', 'MacUnicastTable')
+        for count in range(macs):
+            mac = '00-00-{0:02x}-{1:02x}-{2:02x}-{3:02x}'.format(
+                *bytearray(count.to_bytes(4, 'big')))
+            device.add_row(mac_table, 'Unicast',
+                           VLANID=count % max(vlans, 1) + 1, MacAddress=mac,
+                           PortIndex=count % max(interfaces, 1) + 1,
+                           Status=2, Aging='true')
+
+        lldp_table = device.table('LLDP', 'LLDPNeighbors')
+        for index in range(1, min(neighbors, interfaces) + 1):
+            device.add_row(lldp_table, 'LLDPNeighbor', IfIndex=index,
+                           AgentID=1, NeighborIndex=1,
+                           ChassisId='00-00-00-00-00-01',
+                           PortId='Ten-GigabitEthernet1/0/{0}'.format(index),
+                           PortDescription='uplink',
+                           SystemName='peer{0}'.format(index),
+                           SystemDescription='stand-in peer')
+
+        return device
+
+    def container(self, *path):
+        """Return the element at a path of tags below top, creating it.
+        """
+        elem = self.top
+        for tag in path:
+            child = elem.find(HPDATA_C + tag)
+            if child is None:
+                child = etree.SubElement(elem, HPDATA_C + tag)
+            elem = child
+        return elem
+
+    def table(self, module, table):
+        return self.container(module, table)
+
+    def add_row(self, table, row_tag, **columns):
+        """Append a row to a table, e.g.
+        ``add_row(table, 'VLANID', ID=10, Name='ten')``.
+        """
+        row = etree.SubElement(table, HPDATA_C + row_tag)
+        for tag, value in columns.items():
+            etree.SubElement(row, HPDATA_C + tag).text = str(value)
+        self._sorted.pop(id(table), None)
+        return row
+
+    def rows(self, module, table):
+        """Return the rows of a table.
+        """
+        elem = self.top.find('{0}{1}/{0}{2}'.format(HPDATA_C, module, table))
+        return list(elem) if elem is not None else []
+
+    def count(self, operation):
+        self.rpc_counts[operation] = self.rpc_counts.get(operation, 0) + 1
+
+    # NETCONF operations
+
+    def get(self, filt=None, ns=HPDATA):
+        """Return the data matching a subtree filter whose root is top,
+        in namespace ``ns``.
+        """
+        if filt is None:
+            return retag(self.top, ns)
+
+        result = subtree_filter(self.top, filt)
+        if result is None:
+            result = etree.Element(HPDATA_C + 'top')
+        return retag(result, ns)
+
+    def get_bulk(self, filt, ns=HPDATA):
+        """Return at most ``count`` rows of the table of a get-bulk
+        filter. Index values in the row filter give the row
+        the page starts after.
+        """
+        module_filt = filt[0]
+        table_filt = module_filt[0]
+        count = int(table_filt.get(HPBASE_C + 'count', '0') or 0)
+        table = self.top.find('{0}{1}/{0}{2}'.format(
+            HPDATA_C, localname(module_filt), localname(table_filt)))
+
+        module = etree.Element(HPDATA_C + localname(module_filt))
+        page = etree.SubElement(module, HPDATA_C + localname(table_filt))
+        if table is None or not len(table_filt):
+            return self._wrap(module, ns)
+
+        row_filt = copy.deepcopy(table_filt[0])
+        index = ROW_INDEXES.get(localname(row_filt), ())
+        start = None
+        for tag in index:
+            column = row_filt.find(HPDATA_C + tag)
+            if column is None:
+                column = row_filt.find('{%s}%s' % (
+                    etree.QName(row_filt).namespace, tag))
+            if column is not None and column.text:
+                start = start or []
+                start.append(column.text)
+                column.text = None
+        if start is not None and len(start) != len(index):
+            start = None
+
+        keys, rows = self._sorted_rows(table, index)
+        position = 0
+        if start is not None:
+            position = bisect.bisect_right(
+                keys, tuple(natural_key(value) for value in start))
+
+        for row in rows[position:]:
+            if localname(row) != localname(row_filt):
+                continue
+            filtered = subtree_filter(row, row_filt)
+            if filtered is not None:
+                page.append(filtered)
+                if count and len(page) >= count:
+                    break
+
+        return self._wrap(module, ns)
+
+    def _sorted_rows(self, table, index):
+        cached = self._sorted.get(id(table))
+        if cached is None or cached[0] is not table:
+            pairs = sorted(
+                ((tuple(natural_key(value) for value in _row_key(row, index)), row)
+                 for row in table),
+                key=lambda pair: pair[0])
+            cached = (table, [key for key, _ in pairs], [row for _, row in pairs])
+            self._sorted[id(table)] = cached
+        return cached[1], cached[2]
+
+    def _wrap(self, module, ns):
+        top = etree.Element(HPDATA_C + 'top')
+        top.append(module)
+        return retag(top, ns)
+
+    def edit_config(self, config):
+        """Apply the top element of an edit-config, in the config
+        namespace. Rows are matched by their index columns and
+        merged, replaced, created or removed according to the
+        inherited NETCONF operation.
+
+        Raises:
+            StandInError: if a row to delete doesn't exist.
+        """
+        config = retag(config, HPDATA)
+        for module in config:
+            operation = module.get(NETCONFBASE_C + 'operation', 'merge')
+            target = self.container(localname(module))
+            for table in module:
+                table_op = table.get(NETCONFBASE_C + 'operation', operation)
+                table_target = self.container(localname(module), localname(table))
+                if all(_leaf(child) for child in table):
+                    self._merge_leaves(table_target, table, table_op)
+                    continue
+                # rows of the table by index, built once per edit
+                rows_by_key = {}
+                for row in table:
+                    row_op = row.get(NETCONFBASE_C + 'operation', table_op)
+                    self._edit_row(table_target, row, row_op, rows_by_key)
+                self._sorted.pop(id(table_target), None)
+            if not len(module) and operation in ('delete', 'remove'):
+                self.top.remove(target)
+
+    def _merge_leaves(self, target, source, operation):
+        for leaf in source:
+            existing = target.find(leaf.tag)
+            if operation in ('delete', 'remove'):
+                if existing is not None:
+                    target.remove(existing)
+                continue
+            if existing is None:
+                existing = etree.SubElement(target, leaf.tag)
+            existing.text = leaf.text
+
+    def _edit_row(self, table, row, operation, rows_by_key):
+        index = _row_index(row)
+        rows = rows_by_key.get((row.tag, index))
+        if rows is None:
+            rows = rows_by_key[(row.tag, index)] = {}
+            for candidate in table.iterchildren(row.tag):
+                rows.setdefault(_row_key(candidate, index), candidate)
+        key = _row_key(row, index)
+        existing = rows.get(key)
+
+        if operation in ('delete', 'remove'):
+            if existing is None:
+                if operation == 'delete':
+                    raise StandInError('data-missing',
+                                       'The row to delete does not exist.')
+                return
+            table.remove(existing)
+            del rows[key]
+        elif operation == 'replace' or existing is None:
+            new = copy.deepcopy(row)
+            new.attrib.pop(NETCONFBASE_C + 'operation', None)
+            if existing is None:
+                table.append(new)
+            else:
+                table.replace(existing, new)
+            rows[key] = new
+        else:
+            self._merge_leaves(existing, [child for child in row if _leaf(child)],
+                               'merge')
+
+    def action(self, top):
+        """Run the FileSystem actions of an action request.
+
+        Returns:
+            The reply's top element, in the action namespace.
+
+        Raises:
+            StandInError: if a file to hash doesn't exist.
+        """
+        reply = etree.Element(HPACTION_C + 'top', nsmap={None: HPACTION})
+        for files in top.iter(HPACTION_C + 'Files'):
+            reply_files = etree.SubElement(
+                etree.SubElement(reply, HPACTION_C + 'FileSystem'),
+                HPACTION_C + 'Files')
+            for file_ele in files:
+                name = file_ele.findtext(HPACTION_C + 'SrcName')
+                ops = file_ele.find(HPACTION_C + 'Operations')
+                reply_file = etree.SubElement(reply_files, HPACTION_C + 'File')
+                etree.SubElement(reply_file, HPACTION_C + 'SrcName').text = name
+                reply_ops = etree.SubElement(reply_file, HPACTION_C + 'Operations')
+                for op in (ops if ops is not None else []):
+                    self._file_operation(localname(op), name, reply_ops)
+        return reply
+
+    def _file_operation(self, operation, name, reply_ops):
+        path = self._path(name)
+        if operation == 'md5sum':
+            if path not in self.files:
+                raise StandInError('invalid-value',
+                                   'The file {0} does not exist.'.format(name))
+            etree.SubElement(reply_ops, HPACTION_C + 'md5sum').text = \
+                hashlib.md5(self.files[path]).hexdigest()
+        elif operation == 'MkDir':
+            table = self.table('FileSystem', 'Files')
+            self.add_row(table, 'File', Name=path.rstrip('/'), IsDirectory='true')
+        elif operation == 'Delete':
+            self.files.pop(path, None)
+
+    def _path(self, name):
+        if ':/' not in name:
+            name = 'flash:/' + name.lstrip('/')
+        return name
+
+    def cli(self, text, config=False):
+        """Run CLI commands, one per line.
+
+        Returns:
+            The output of the commands.
+        """
+        output = []
+        for command in text.splitlines():
+            command = command.strip()
+            if not command:
+                continue
+            self.cli_log.append(command)
+            if config:
+                continue
+            handler = None
+            for start in sorted(self.cli_handlers, key=len, reverse=True):
+                if command.startswith(start):
+                    handler = self.cli_handlers[start]
+                    break
+            if callable(handler):
+                output.append(handler(command))
+            elif handler is not None:
+                output.append(handler)
+        return '\n'.join(output)
+
+    def _display_version(self, command):
+        inventory = self.container('LLDP', 'Inventory')
+        return ('HPE Comware Software, Version {0}\n{1} uptime is 1 week\n'.format(
+            inventory.findtext(HPDATA_C + 'SoftwareRev'),
+            inventory.findtext(HPDATA_C + 'ModelName')))
+
+    def _dir(self, command):
+        lines = ['Directory of flash:']
+        for number, path in enumerate(sorted(self.files)):
+            lines.append('   {0} -rw- {1} Jan 30 2016 01:47:07   {2}'.format(
+                number, len(self.files[path]), path.split('/')[-1]))
+        lines.append('')
+        lines.append('{0} KB total ({1} KB free)'.format(
+            (self.flash_size * 2) // 1000, self.flash_size // 1000))
+        return '\n'.join(lines)
+
+    def _more(self, command):
+        path = self._path(command.split(None, 1)[1])
+        return self.files.get(path, b'').decode('utf-8', 'replace')
+
+    def _display_running(self, command):
+        lines = ['#', ' version 7.1.045, Release 2418P01', '#',
+                 ' sysname {0}'.format(self.hostname), '#']
+        for vlan in self.rows('VLAN', 'VLANs'):
+            lines.append('vlan {0}'.format(vlan.findtext(HPDATA_C + 'ID')))
+            name = vlan.findtext(HPDATA_C + 'Name')
+            if name:
+                lines.append(' name {0}'.format(name))
+            descr = vlan.findtext(HPDATA_C + 'Description')
+            if descr:
+                lines.append(' description {0}'.format(descr))
+            lines.append('#')
+        for iface in self.rows('Ifmgr', 'Interfaces'):
+            lines.append('interface {0}'.format(iface.findtext(HPDATA_C + 'Name')))
+            if iface.findtext(HPDATA_C + 'PortLayer') == '2':
+                lines.append(' port link-mode route')
+            else:
+                lines.append(' port link-mode bridge')
+            descr = iface.findtext(HPDATA_C + 'Description')
+            if descr:
+                lines.append(' description {0}'.format(descr))
+            if iface.findtext(HPDATA_C + 'AdminStatus') == '2':
+                lines.append(' shutdown')
+            lines.append('#')
+        lines.append('return')
+        return '\n'.join(lines)
@@ -0,0 +1,305 @@
+"""Stand-in Comware 7 NETCONF server over SSH, for benchmarking and
+testing ``pyhpecw7`` without a switch.
+
+Example::
+
+    from pyhpecw7.comware import HPCOM7
+    from pyhpecw7.standin.model import DeviceModel
+    from pyhpecw7.standin.server import StandInServer
+
+    model = DeviceModel.build(interfaces=4000, vlans=4000, macs=60000)
+    with StandInServer(model, latency=0.005) as server:
+        device = HPCOM7(host='127.0.0.1', port=server.port,
+                        username='admin', password='admin')
+        device.open()
+
+It can also be run as ``python -m pyhpecw7.standin``.
+"""
+import socket
+import threading
+import time
+import paramiko
+from lxml import etree
+from pyhpecw7.standin.model import DeviceModel, StandInError, localname
+from pyhpecw7.utils.xml.namespaces import HPDATA, HPCONFIG, NETCONFBASE,\
+    NETCONFBASE_C
+
+MSG_DELIM = b']]>]]>'
+
+CAPABILITIES = (
+    'urn:ietf:params:netconf:base:1.0',
+    'urn:ietf:params:netconf:capability:writable-running:1.0',
+    'urn:ietf:params:netconf:capability:rollback-on-error:1.0',
+    'urn:hp:params:netconf:capability:hp-netconf-ext:1.0',
+    'urn:hp:params:netconf:capability:hp-save-point:1.0',
+)
+
+
+class StandInServer(object):
+    """This class serves a ``DeviceModel`` over SSH and NETCONF on
+    localhost, in the dialect ``HPCOM7.open()`` negotiates.
+
+    Every session shares the model and the running datastore lock.
+
+    Args:
+        model (DeviceModel): OPTIONAL - the device served. Defaults to
+            ``DeviceModel.build()``.
+        host (str): OPTIONAL - address to listen on. Defaults to 127.0.0.1.
+        port (int): OPTIONAL - port to listen on. Defaults to a free port.
+        username (str): OPTIONAL - accepted username. Defaults to 'admin'.
+        password (str): OPTIONAL - accepted password. Defaults to 'admin'.
+        latency (float or dict): OPTIONAL - seconds added before each
+            reply, or seconds by operation, e.g. {'get': .01,
+            'edit-config': .05}. Unlisted operations use the 'default'
+            key. Defaults to 0.
+
+    Attributes:
+        model (DeviceModel): the device served.
+        port (int): the port listened on, once started.
+        bytes_in (int): bytes of NETCONF messages received.
+        bytes_out (int): bytes of NETCONF messages sent.
+    """
+    def __init__(self, model=None, host='127.0.0.1', port=0,
+                 username='admin', password='admin', latency=0):
+        self.model = model or DeviceModel.build()
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.latency = latency
+
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.lock_owner = None
+        self.model_lock = threading.RLock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        self._socket = None
+        self._thread = None
+        self._transports = []
+        self._session_ids = 0
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Listen and accept connections in a background thread.
+        """
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(32)
+        self.port = self._socket.getsockname()[1]
+        self._running = True
+
+        self._thread = threading.Thread(target=self._accept_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop listening and close every session.
+        """
+        self._running = False
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        for transport in self._transports:
+            transport.close()
+        del self._transports[:]
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while self._running:
+                time.sleep(1)
+        finally:
+            self.stop()
+
+    def delay(self, operation):
+        """Return the latency of an operation.
+        """
+        if isinstance(self.latency, dict):
+            return self.latency.get(operation, self.latency.get('default', 0))
+        return self.latency or 0
+
+    def next_session_id(self):
+        with self.model_lock:
+            self._session_ids += 1
+            return self._session_ids
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._socket.accept()
+            except (OSError, AttributeError):
+                break
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler('netconf', _NetconfSubsystem, self)
+            try:
+                transport.start_server(server=_SSHServer(self))
+            except paramiko.SSHException:
+                transport.close()
+                continue
+            self._transports.append(transport)
+
+
+class _SSHServer(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if username == self.server.username \
+                and password == self.server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class _NetconfSubsystem(paramiko.SubsystemHandler):
+    """One NETCONF session, framed with the base:1.0 end-of-message
+    delimiter.
+    """
+    def __init__(self, channel, name, server, standin):
+        super(_NetconfSubsystem, self).__init__(channel, name, server)
+        self.standin = standin
+        self.session_id = standin.next_session_id()
+
+    def start_subsystem(self, name, transport, channel):
+        hello = etree.Element('{%s}hello' % NETCONFBASE, nsmap={None: NETCONFBASE})
+        caps = etree.SubElement(hello, '{%s}capabilities' % NETCONFBASE)
+        for cap in CAPABILITIES:
+            etree.SubElement(caps, '{%s}capability' % NETCONFBASE).text = cap
+        etree.SubElement(hello, '{%s}session-id' % NETCONFBASE).text = \
+            str(self.session_id)
+        self._send(channel, hello)
+
+        buf = b''
+        try:
+            while transport.is_active():
+                data = channel.recv(65536)
+                if not data:
+                    break
+                self.standin.bytes_in += len(data)
+                buf += data
+                while MSG_DELIM in buf:
+                    msg, buf = buf.split(MSG_DELIM, 1)
+                    if not self._handle(channel, msg):
+                        return
+        except (socket.error, EOFError):
+            pass
+        finally:
+            self._release_lock()
+            channel.close()
+
+    def _send(self, channel, elem):
+        msg = etree.tostring(elem, xml_declaration=True,
+                             encoding='UTF-8') + MSG_DELIM
+        self.standin.bytes_out += len(msg)
+        channel.sendall(msg)
+
+    def _release_lock(self):
+        with self.standin.model_lock:
+            if self.standin.lock_owner == self.session_id:
+                self.standin.lock_owner = None
+
+    def _handle(self, channel, msg):
+        """Answer one message. Return False once the session closes.
+        """
+        msg = msg.strip()
+        if not msg:
+            return True
+        root = etree.fromstring(msg)
+        if localname(root) != 'rpc':
+            return True
+
+        operation = root[0]
+        name = localname(operation)
+        reply = etree.Element('{%s}rpc-reply' % NETCONFBASE,
+                              nsmap={None: NETCONFBASE})
+        reply.set('message-id', root.get('message-id', ''))
+
+        with self.standin.model_lock:
+            self.standin.model.count(name)
+            try:
+                self._dispatch(name, operation, reply)
+            except StandInError as e:
+                reply.clear()
+                reply.set('message-id', root.get('message-id', ''))
+                self._error(reply, e.tag, e.message)
+
+        delay = self.standin.delay(name)
+        if delay:
+            time.sleep(delay)
+
+        self._send(channel, reply)
+        return name != 'close-session'
+
+    def _dispatch(self, name, operation, reply):
+        model = self.standin.model
+        if name in ('get', 'get-config', 'get-bulk', 'get-bulk-config'):
+            ns = HPCONFIG if name.endswith('config') else HPDATA
+            data = etree.SubElement(reply, NETCONFBASE_C + 'data')
+            filt = operation.find(NETCONFBASE_C + 'filter')
+            top = filt[0] if filt is not None and len(filt) else None
+            if name.startswith('get-bulk') and top is not None:
+                data.append(model.get_bulk(top, ns=ns))
+            else:
+                data.append(model.get(top, ns=ns))
+        elif name == 'edit-config':
+            self._check_lock()
+            config = operation.find(NETCONFBASE_C + 'config')
+            for top in (config if config is not None else []):
+                model.edit_config(top)
+            etree.SubElement(reply, NETCONFBASE_C + 'ok')
+        elif name == 'lock':
+            if self.standin.lock_owner not in (None, self.session_id):
+                raise StandInError('lock-denied', 'Lock failed, lock is already held.')
+            self.standin.lock_owner = self.session_id
+            etree.SubElement(reply, NETCONFBASE_C + 'ok')
+        elif name == 'unlock':
+            if self.standin.lock_owner != self.session_id:
+                raise StandInError('operation-failed', 'Unlock Failed')
+            self.standin.lock_owner = None
+            etree.SubElement(reply, NETCONFBASE_C + 'ok')
+        elif name == 'action':
+            data = etree.SubElement(reply, NETCONFBASE_C + 'data')
+            for top in operation:
+                data.append(model.action(top))
+        elif name == 'CLI':
+            cli = etree.SubElement(reply, NETCONFBASE_C + 'CLI')
+            for command in operation:
+                kind = localname(command)
+                output = model.cli(command.text or '',
+                                   config=(kind == 'Configuration'))
+                out = etree.SubElement(cli, NETCONFBASE_C + kind)
+                out.text = etree.CDATA('\n' + output + '\n')
+        elif name in ('save', 'rollback', 'close-session'):
+            etree.SubElement(reply, NETCONFBASE_C + 'ok')
+        else:
+            raise StandInError('operation-not-supported',
+                               'The stand-in does not support {0}.'.format(name))
+
+    def _check_lock(self):
+        if self.standin.lock_owner not in (None, self.session_id):
+            raise StandInError('in-use', 'The running datastore is locked.')
+
+    def _error(self, reply, tag, message):
+        error = etree.SubElement(reply, NETCONFBASE_C + 'rpc-error')
+        for child, text in (('error-type', 'application'),
+                            ('error-tag', tag),
+                            ('error-severity', 'error'),
+                            ('error-message', message)):
+            etree.SubElement(error, NETCONFBASE_C + child).text = text
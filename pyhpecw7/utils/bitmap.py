@@ -0,0 +1,65 @@
+"""This module provides functions for the base64 encoded
+port bitmaps used by Comware, e.g. the ``MemberList`` of a
+LAGG group. Bit 1 is the most significant bit of the first
+byte and corresponds to IfIndex 1.
+"""
+import base64
+
+# set bit offsets (0 = most significant bit) of every byte value
+_BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if value & (0x80 >> bit))
+    for value in range(256)
+)
+
+
+def bitmap_to_indexes(bitmap):
+    """Return the sorted list of indexes set in a bitmap.
+
+    Args:
+        bitmap (str, bytes or list): base64 encoded bitmap as retrieved
+            via NETCONF, or the already decoded raw bytes, or a list of
+            byte values.
+
+    Returns:
+        A list of integers.
+    """
+    if not bitmap:
+        return []
+
+    if isinstance(bitmap, str):
+        raw = bytearray(base64.b64decode(bitmap))
+    else:
+        raw = bytearray(bitmap)
+
+    indexes = []
+    for byte_num, value in enumerate(raw):
+        if value:
+            base = byte_num * 8 + 1
+            indexes.extend(base + bit for bit in _BYTE_BITS[value])
+
+    return indexes
+
+
+def indexes_to_bitmap(indexes, length=None):
+    """Return the base64 encoded bitmap with the given indexes set.
+
+    Args:
+        indexes (list): integers (or strings of integers), starting at 1.
+        length (int): OPTIONAL - length of the bitmap in bytes. Defaults
+            to the smallest length holding the highest index.
+
+    Returns:
+        The bitmap as a base64 string.
+    """
+    indexes = [int(index) for index in indexes]
+    if length is None:
+        length = (max(indexes) + 7) // 8 if indexes else 0
+
+    raw = bytearray(length)
+    for index in indexes:
+        if index < 1 or index > length * 8:
+            raise ValueError('Index {0} does not fit in a {1} byte bitmap'.format(
+                index, length))
+        raw[(index - 1) // 8] |= 0x80 >> ((index - 1) % 8)
+
+    return base64.b64encode(bytes(raw)).decode('ascii')
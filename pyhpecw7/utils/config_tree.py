@@ -0,0 +1,299 @@
+"""This module parses Comware configurations into a tree of
+command blocks and diffs two of them locally, including the
+ordered CLI commands that turn one into the other.
+"""
+import re
+
+# commands that can't be changed or undone from system-view
+IGNORED_COMMANDS = ('version',)
+
+# keywords of commands that hold one value per view, so a new value
+# overwrites the old one and 'undo <keyword>' removes it, e.g.
+# 'description <text>' or 'sysname <name>'
+SINGLE_VALUE_COMMANDS = (
+    'sysname', 'clock timezone', 'description', 'name',
+    'ip address', 'mtu', 'jumboframe enable', 'speed', 'duplex',
+    'port link-mode', 'port link-type', 'port access vlan',
+    'port trunk pvid vlan', 'port hybrid pvid vlan',
+    'link-aggregation mode', 'stp mode', 'stp priority',
+    'ospf cost', 'ospf network-type', 'isis cost', 'router id',
+    'info-center logbuffer size', 'scheduler logfile size',
+)
+
+_SINGLE_VALUE_WORDS = sorted((tuple(keyword.split())
+                              for keyword in SINGLE_VALUE_COMMANDS),
+                             key=len, reverse=True)
+
+
+class ConfigBlock(object):
+    """One command of a configuration
+    and the commands nested under it.
+
+    Args:
+        line (str): the command as shown in the configuration,
+            including its indentation.
+
+    Attributes:
+        line (str): the command as shown in the configuration.
+        children (list): the ``ConfigBlock`` of every nested command.
+    """
+    def __init__(self, line):
+        self.line = line
+        self.children = []
+
+    @property
+    def command(self):
+        """The command without its indentation.
+        """
+        return self.line.strip()
+
+    def lines(self):
+        """Return the command and every nested command, in order.
+        """
+        lines = [self.line]
+        for child in self.children:
+            lines.extend(child.lines())
+        return lines
+
+    def text(self):
+        """Return the block as the CLI shows it.
+        """
+        return '\n'.join(self.lines())
+
+    def include(self, pattern):
+        """Return the lines of the block matching a regular
+        expression, like ``| include`` on the CLI.
+        """
+        regex = re.compile(pattern)
+        return [line for line in self.lines() if regex.search(line)]
+
+
+def parse_config(text):
+    """Parse a configuration, e.g. the output of
+    ``display current-configuration`` or of ``more`` on a .cfg file.
+
+    Lines are nested by their indentation. A '#' at the start of a
+    line closes every open view, since Comware shows global commands
+    with one leading space, e.g. ' stp global enable' after an
+    interface block. Echoed commands and prompts, '#' separators and
+    'return' are skipped.
+
+    Args:
+        text (str): the configuration.
+
+    Returns:
+        A list of the ``ConfigBlock`` of every top level command.
+    """
+    blocks = []
+    stack = []
+    for line in text.splitlines():
+        command = line.strip()
+        if command == '#' and line.startswith('#'):
+            stack = []
+            continue
+        if not command or command in ('#', 'return'):
+            continue
+        if command.startswith('<') and '>' in command:
+            continue
+
+        depth = len(line) - len(line.lstrip())
+        block = ConfigBlock(line.rstrip())
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        if stack:
+            stack[-1][1].children.append(block)
+        else:
+            blocks.append(block)
+        stack.append((depth, block))
+
+    return blocks
+
+
+def command_keyword(command):
+    """Return the keyword of a single-value command, e.g.
+    'description' for 'description uplink', or None if the command
+    isn't one of ``SINGLE_VALUE_COMMANDS``. Secondary addresses,
+    'ip address ... sub', are not single-value.
+    """
+    words = tuple(command.split())
+    if words[-1:] == ('sub',):
+        return None
+    for keyword in _SINGLE_VALUE_WORDS:
+        if words[:len(keyword)] == keyword:
+            return ' '.join(keyword)
+    return None
+
+
+def _index(blocks):
+    """Map the keys of sibling blocks to the blocks, in order.
+    Single-value commands are keyed by their keyword, every other
+    command by its text. Repeated keys keep their first block.
+    """
+    index = {}
+    order = []
+    for block in blocks:
+        command = ' '.join(block.command.split())
+        if command.startswith(IGNORED_COMMANDS):
+            continue
+        key = command_keyword(command) or command
+        if key in index:
+            continue
+        index[key] = block
+        order.append(key)
+    return index, order
+
+
+def diff_configs(current, desired):
+    """Diff two configurations.
+
+    Sibling commands are matched by their text with a dictionary
+    lookup, so the diff takes linear time in the size of both.
+    Single-value commands, see ``SINGLE_VALUE_COMMANDS``, are matched
+    by their keyword instead, so a new value is a "change" rather
+    than a removal and an addition.
+
+    Args:
+        current (str or list): the existing configuration, as text or
+            as the blocks returned by ``parse_config``.
+        desired (str or list): the configuration to end up with.
+
+    Returns:
+        A list of dictionaries, in configuration order, with the
+        following k/v pairs:
+
+            :action (str): "remove", "add" or "change"
+            :parents (list): commands of the views the command is in,
+                outermost first
+            :command (str): the command removed, added or changed to
+            :previous (str): for changed commands, the command
+                changed from
+            :children (list): for added and changed commands, the
+                ``ConfigBlock`` objects nested under it
+    """
+    if not isinstance(current, list):
+        current = parse_config(current)
+    if not isinstance(desired, list):
+        desired = parse_config(desired)
+
+    diff = []
+    _diff_level(current, desired, [], diff)
+    return diff
+
+
+def _diff_level(current, desired, parents, diff):
+    current_index, current_order = _index(current)
+    desired_index, desired_order = _index(desired)
+
+    for key in current_order:
+        if key not in desired_index:
+            diff.append(dict(action='remove', parents=parents,
+                             command=_text(current_index[key]), children=[]))
+
+    for key in desired_order:
+        block = desired_index[key]
+        command = _text(block)
+        existing = current_index.get(key)
+        if existing is None:
+            diff.append(dict(action='add', parents=parents,
+                             command=command, children=block.children))
+        elif _text(existing) != command:
+            diff.append(dict(action='change', parents=parents,
+                             command=command, previous=_text(existing),
+                             children=block.children))
+        elif existing.children or block.children:
+            _diff_level(existing.children, block.children,
+                        parents + [command], diff)
+
+
+def _text(block):
+    return ' '.join(block.command.split())
+
+
+def format_diff(diff):
+    """Return a diff as '+'/'-' lines, indented like the configuration.
+    The views a change is in are shown as ' ' context lines, and added
+    blocks are shown with every nested command.
+    """
+    lines = []
+    view = []
+    for entry in diff:
+        parents = entry['parents']
+        common = _common_depth(view, parents)
+        for depth in range(common, len(parents)):
+            lines.append(' ' + ' ' * depth + parents[depth])
+        view = parents
+
+        indent = ' ' * len(parents)
+        if entry['action'] == 'remove':
+            lines.append('-' + indent + entry['command'])
+        else:
+            if entry['action'] == 'change':
+                lines.append('-' + indent + entry['previous'])
+            lines.append('+' + indent + entry['command'])
+            for child in entry['children']:
+                lines.extend('+' + line for line in child.lines())
+    return lines
+
+
+def _common_depth(view, parents):
+    """Number of leading views two parent paths share.
+    """
+    common = 0
+    while common < len(view) and common < len(parents) \
+            and view[common] == parents[common]:
+        common += 1
+    return common
+
+
+def undo_command(command):
+    """Return the command that removes ``command``. Single-value
+    commands are undone by their keyword, e.g. 'undo description'.
+    """
+    if command.startswith('undo '):
+        return command[len('undo '):]
+    return 'undo ' + (command_keyword(command) or command)
+
+
+def remediation(current, desired):
+    """Return the ordered CLI commands, from system-view, that
+    turn the current configuration into the desired one.
+
+    Removed commands are undone before commands are added,
+    and views are entered and left with 'quit' around them. A
+    changed single-value command is sent with its new value only,
+    which overwrites the old one.
+
+    Args:
+        current (str or list): see ``diff_configs``.
+        desired (str or list): see ``diff_configs``.
+
+    Returns:
+        A list of CLI commands.
+    """
+    commands = []
+    view = []
+    for entry in diff_configs(current, desired):
+        parents = entry['parents']
+        common = _common_depth(view, parents)
+        commands.extend(['quit'] * (len(view) - common))
+        commands.extend(parents[common:])
+        view = list(parents)
+
+        if entry['action'] == 'remove':
+            commands.append(undo_command(entry['command']))
+        else:
+            commands.append(entry['command'])
+            if entry['children']:
+                _add_children(entry['children'], commands)
+                commands.append('quit')
+
+    commands.extend(['quit'] * len(view))
+    return commands
+
+
+def _add_children(blocks, commands):
+    for block in blocks:
+        commands.append(block.command)
+        if block.children:
+            _add_children(block.children, commands)
+            commands.append('quit')
@@ -0,0 +1,160 @@
+"""This module hashes local files, e.g. OS images and configuration
+files, and caches their digests on disk so they are computed once
+across runs and processes.
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+
+# digests computed together in one read of a file
+ALGORITHMS = ('md5', 'sha256')
+
+# on-disk cache directory, overridden with PYHPECW7_HASH_CACHE;
+# set it to an empty string to only cache in memory
+DEFAULT_CACHE_DIR = os.environ.get(
+    'PYHPECW7_HASH_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'pyhpecw7', 'hashes'))
+
+
+def file_key(path):
+    """Return what identifies a version of a local file:
+    its absolute path, size, modification time and inode.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def hash_file(path, algorithms=ALGORITHMS, blocksize=2**22):
+    """Compute several digests of a file in one read.
+
+    The file is memory mapped, so blocks are hashed
+    from the page cache without being copied.
+
+    Args:
+        path (str): path of the local file.
+        algorithms (tuple): OPTIONAL - names of ``hashlib`` algorithms.
+            Defaults to ``ALGORITHMS``.
+        blocksize (int): OPTIONAL - bytes hashed at a time.
+
+    Returns:
+        A dictionary of the hex digests, by algorithm.
+    """
+    hashers = [(name, hashlib.new(name)) for name in algorithms]
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                view = memoryview(mm)
+                try:
+                    for start in range(0, len(mm), blocksize):
+                        block = view[start:start + blocksize]
+                        for _, hasher in hashers:
+                            hasher.update(block)
+                        block.release()
+                finally:
+                    view.release()
+            finally:
+                mm.close()
+
+    return dict((name, hasher.hexdigest()) for name, hasher in hashers)
+
+
+class HashCache(object):
+    """Cache of file digests, kept in memory and in a directory shared
+    by every process, e.g. Ansible forks and later runs.
+
+    Entries are keyed by ``file_key``, so a file is hashed again
+    as soon as it is replaced or modified.
+
+    Args:
+        cache_dir (str): OPTIONAL - directory of the on-disk cache, one
+            JSON file per local file. Defaults to ``DEFAULT_CACHE_DIR``.
+            Digests are only kept in memory if empty.
+        algorithms (tuple): OPTIONAL - digests computed whenever a file
+            is hashed. Defaults to ``ALGORITHMS``.
+
+    """
+    def __init__(self, cache_dir=None, algorithms=ALGORITHMS):
+        if cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR
+        self.cache_dir = cache_dir
+        self.algorithms = tuple(algorithms)
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        name = hashlib.sha1(key[0].encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + '.json')
+
+    def _load(self, key):
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            try:
+                with open(self._path(key)) as f:
+                    stored = json.load(f)
+                if tuple(stored['key']) == key:
+                    entry = stored['digests']
+            except (IOError, OSError, ValueError, KeyError):
+                entry = None
+        return entry
+
+    def _store(self, key, digests):
+        self._entries[key] = digests
+        if not self.cache_dir:
+            return
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(key=key, digests=digests), f)
+            os.rename(tmp_path, self._path(key))
+        except (IOError, OSError):
+            # the cache is only an optimization
+            pass
+
+    def get(self, path, algorithm='md5'):
+        """Return a digest of a file, hashing it only
+        if it isn't cached for its current version.
+
+        Args:
+            path (str): path of the local file.
+            algorithm (str): OPTIONAL - name of the digest.
+                Defaults to 'md5'.
+
+        Returns:
+            The hex digest.
+        """
+        key = file_key(path)
+        with self._lock:
+            entry = self._load(key)
+            if entry is None or algorithm not in entry:
+                algorithms = self.algorithms
+                if algorithm not in algorithms:
+                    algorithms += (algorithm,)
+                digests = dict(entry or {})
+                digests.update(hash_file(path, algorithms))
+                self._store(key, digests)
+                entry = digests
+            else:
+                self._entries[key] = entry
+
+        return entry[algorithm]
+
+    def set(self, key, digests):
+        """Cache digests computed elsewhere, e.g. while uploading.
+
+        Args:
+            key (tuple): the ``file_key`` of the file version
+                the digests were computed from.
+            digests (dict): hex digests, by algorithm.
+        """
+        with self._lock:
+            entry = dict(self._load(key) or {})
+            entry.update(digests)
+            self._store(key, entry)
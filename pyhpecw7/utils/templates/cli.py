@@ -15,31 +15,113 @@
 # limitations under the License.
 
 import os
+import threading
+import timeit
 import textfsm
 
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'textfsm_temps')
+
+# template name -> [compiled TextFSM, lock], see get_template
+_TEMPLATES = {}
+_TEMPLATES_LOCK = threading.Lock()
+
+# template name -> path of templates registered outside TEMPLATE_DIR
+_REGISTERED = {}
+
+
+def register_template(template, path):
+    """Register a TextFSM template that doesn't ship with
+    pyhpecw7 so ``get_structured_data`` can use it by name.
+    """
+    with _TEMPLATES_LOCK:
+        _REGISTERED[template] = path
+        _TEMPLATES.pop(template, None)
+
+
+def get_template(template):
+    """Returns the compiled TextFSM object of a template.
+
+    Each template is read and compiled once per process.
+    Use the returned lock around ``Reset`` and ``ParseText``.
+    """
+    entry = _TEMPLATES.get(template)
+    if entry is None:
+        with _TEMPLATES_LOCK:
+            entry = _TEMPLATES.get(template)
+            if entry is None:
+                path = _REGISTERED.get(template,
+                                       os.path.join(TEMPLATE_DIR, template))
+                with open(path) as template_file:
+                    fsm = textfsm.TextFSM(template_file)
+                entry = _TEMPLATES[template] = (fsm, threading.Lock())
+
+    return entry
+
 
 def get_structured_data(template, rawtxt):
     """Returns structured data given raw text using
     TextFSM templates
     """
-
-    path = os.path.dirname(os.path.abspath(__file__)) \
-        + '/textfsm_temps/' + template
-
-    fsm = textfsm.TextFSM(open(path))
+    fsm, lock = get_template(template)
 
     # an object is what is being extracted
     # based on the template, it may be one objecst or multiple
     # as is the case with neighbors, interfaces, etc.
-    objects = fsm.ParseText(rawtxt)
+    with lock:
+        fsm.Reset()
+        objects = fsm.ParseText(rawtxt)
+        header = [name.lower() for name in fsm.header]
 
     structured_data = []
     for each in objects:
-        index = 0
-        temp = {}
-        for template_value in each:
-            temp[fsm.header[index].lower()] = str(template_value)
-            index += 1
-        structured_data.append(temp)
+        structured_data.append(
+            dict((key, str(value)) for key, value in zip(header, each)))
 
     return structured_data
+
+
+def get_key_values(rawtxt, key_map=None, sep=':'):
+    """Returns a dictionary from 'key : value' lines of
+    raw text, without the overhead of a TextFSM template.
+
+    Args:
+        rawtxt (str): CLI output
+        key_map (dict): OPTIONAL - dictionary keys to the keys shown
+            in the output, matched case insensitively. Only mapped keys
+            are returned if given, otherwise every key is returned
+            lower cased.
+        sep (str): OPTIONAL - separator of keys and values.
+            Defaults to ':'.
+
+    Returns:
+        A dictionary. When a key is shown more than once
+        the last value wins.
+    """
+    lookup = None
+    if key_map is not None:
+        lookup = dict((v.lower(), k) for k, v in key_map.items())
+
+    parsed = {}
+    for line in rawtxt.splitlines():
+        key, found, value = line.partition(sep)
+        if not found:
+            continue
+        key = key.strip().lower()
+        if lookup is not None:
+            key = lookup.get(key)
+            if key is None:
+                continue
+        parsed[key] = value.strip()
+
+    return parsed
+
+
+def benchmark(template, rawtxt, number=100):
+    """Returns the average seconds ``get_structured_data``
+    takes to parse ``rawtxt`` with a template.
+    """
+    get_template(template)
+    seconds = timeit.timeit(lambda: get_structured_data(template, rawtxt),
+                            number=number)
+    return seconds / number
@@ -2,6 +2,7 @@
 for dealing with XML text and ``etree.Element``
 XML objects.
 """
+from lxml import etree
 from lxml.builder import ElementMaker
 
 from pyhpecw7.utils.xml.namespaces import *
@@ -49,7 +50,9 @@ def operation_kwarg(operation=None):
 
 
 def _findall_with_ns(query, ele, ns=''):
-    return ele.findall('.//{%s}%s' % (ns, query))
+    if '/' in query:
+        return ele.findall('.//{%s}%s' % (ns, query))
+    return list(ele.iterdescendants('{%s}%s' % (ns, query)))
 
 
 def findall_in_data(query, ele):
@@ -57,7 +60,11 @@ def findall_in_data(query, ele):
 
 
 def _find_with_ns(query, ele, ns=''):
-    return ele.find('.//{%s}%s' % (ns, query))
+    if '/' in query:
+        return ele.find('.//{%s}%s' % (ns, query))
+    for found in ele.iterdescendants('{%s}%s' % (ns, query)):
+        return found
+    return None
 
 
 def find_in_data(query, ele):
@@ -76,6 +83,52 @@ def find_in_config(query, ele):
     return _find_with_ns(query, ele, ns=HPCONFIG)
 
 
+# (namespace, key map) -> compiled tag map, see _tag_map
+_TAG_MAPS = {}
+
+
+def _tag_map(ns, key_map):
+    """Return a dictionary of fully qualified XML tags to
+    (tag name, dictionary keys) for the given key map.
+
+    Compiled tag maps are cached, so repeated calls with the
+    same key map only pay for the lookup.
+    """
+    cache_key = (ns, tuple(key_map.items()))
+    tag_map = _TAG_MAPS.get(cache_key)
+    if tag_map is None:
+        tag_map = {}
+        for k, v in key_map.items():
+            tag_map.setdefault(ns + v, (v, []))[1].append(k)
+        _TAG_MAPS[cache_key] = tag_map
+
+    return tag_map
+
+
+def _extract(elem, tag_map, value_map):
+    """Fill a dictionary from a single walk over the descendants
+    of ``elem``. Only the first element with a given tag is used.
+    """
+    to_dict = {}
+    remaining = len(tag_map)
+    for field in elem.iterdescendants():
+        entry = tag_map.get(field.tag)
+        if entry is None:
+            continue
+        tag, keys = entry
+        if keys[0] in to_dict:
+            continue
+        text = field.text
+        value = value_map.get(tag, {}).get(text, text)
+        for k in keys:
+            to_dict[k] = value
+        remaining -= 1
+        if not remaining:
+            break
+
+    return to_dict
+
+
 def elem_to_dict(elem, ns, key_map, value_map={}):
     """Convert an XML etree.Element to a desired dictionary
     as specified by the key map and value map.
@@ -92,20 +145,42 @@ def elem_to_dict(elem, ns, key_map, value_map={}):
     Returns:
         The desired dictionary.
     """
-    to_dict = {}
-    for k, v in key_map.items():
-        field = elem.find('.//{0}{1}'.format(ns, v))
-        if field is not None:
-            text = field.text
-            to_dict[k] = value_map.get(v, {}).get(text, text)
-
-    return to_dict
+    return _extract(elem, _tag_map(ns, key_map), value_map)
 
 
 def data_elem_to_dict(elem, key_map, value_map={}):
     return elem_to_dict(elem, HPDATA_C, key_map, value_map=value_map)
 
 
+def rows_to_dicts(reply, row_tag, key_map, value_map={}, ns=HPDATA):
+    """Convert every row of a table to a dictionary,
+    as specified by the key map and value map.
+
+    The key map is compiled once for all rows and each row
+    is converted in a single walk over its columns.
+
+    Args:
+        reply: A get reply (anything with a ``data_ele``)
+            or an etree.Element containing the rows.
+        row_tag (string): The XML tag of a row, e.g. 'Interface'.
+        key_map (dict): A mapping from desired
+            dictionary keys to XML tag names.
+        value_map (dict): See ``elem_to_dict``.
+        ns (string): The namespace of the rows.
+            Defaults to the data namespace.
+    Returns:
+        A list of dictionaries, one per row, in document order.
+    """
+    ele = getattr(reply, 'data_ele', reply)
+    if ele is None:
+        return []
+
+    ns = '{' + ns + '}'
+    tag_map = _tag_map(ns, key_map)
+    return [_extract(row, tag_map, value_map)
+            for row in ele.iterdescendants(ns + row_tag)]
+
+
 def reverse_value_map(key_map, value_map):
     """Utility function for creating a
     "reverse" value map from a given key map and value map.
@@ -137,3 +212,46 @@ def get_text(xml, tag):
     elem = xml.find(tag)
     if elem is not None:
         return elem.text.strip()
+
+
+def iter_elements(xml, tags, chunk_size=65536):
+    """Incrementally parse XML text and yield every element
+    with one of the given tags as soon as its end tag is parsed.
+
+    Each yielded element, and every sibling before it, is cleared
+    once the caller moves on to the next one, so the parsed tree
+    never holds more than one row. Only use a yielded element, or
+    copy what you need from it, before advancing the iterator.
+
+    Args:
+        xml (str or bytes): The XML text, e.g. the raw NETCONF reply.
+        tags (list): Fully qualified tags to yield,
+            e.g. ['{http://www.hp.com/netconf/data:1.0}Unicast']
+        chunk_size (int): OPTIONAL - number of characters
+            fed to the parser at once. Defaults to 65536.
+
+    Returns:
+        A generator of ``etree.Element`` objects.
+    """
+    parser = etree.XMLPullParser(events=('end',), tag=list(tags),
+                                 huge_tree=True, remove_blank_text=True)
+
+    for start in range(0, len(xml), chunk_size):
+        parser.feed(xml[start:start + chunk_size])
+        for _, elem in parser.read_events():
+            yield elem
+            _clear_element(elem)
+
+    for _, elem in parser.read_events():
+        yield elem
+        _clear_element(elem)
+
+    parser.close()
+
+
+def _clear_element(elem):
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
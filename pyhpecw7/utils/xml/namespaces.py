@@ -9,3 +9,6 @@ HPCONFIG_C = '{' + HPCONFIG + '}'
 
 HPACTION = "http://www.hp.com/netconf/action:1.0"
 HPACTION_C = '{' + HPACTION + '}'
+
+HPBASE = "http://www.hp.com/netconf/base:1.0"
+HPBASE_C = '{' + HPBASE + '}'
@@ -29,7 +29,8 @@ setup(
     ],
   keywords='HPE Comware7 FlexFabric Netconf API ',
 
-  package_data={'pyhpecw7': ['utils/templates/textfsm_temps/*.tmpl']},
+  package_data={'pyhpecw7': ['utils/templates/textfsm_temps/*.tmpl',
+                            'standin/budgets.json']},
   install_requires=[
       'textfsm==1.1.0',
       'lxml',
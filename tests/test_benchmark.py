@@ -0,0 +1,35 @@
+"""Tests of the benchmark runner against the stand-in device.
+"""
+import sys
+import pytest
+from pyhpecw7.standin import benchmark
+
+
+@pytest.fixture
+def broken_benchmark():
+    @benchmark.benchmark('broken')
+    def _broken(device):
+        raise ValueError('broken on purpose')
+    yield 'broken'
+    del benchmark.BENCHMARKS['broken']
+
+
+def test_crash_is_a_failure(broken_benchmark, monkeypatch, tmpdir):
+    results = benchmark.run([broken_benchmark, 'interface_table'], ['48'])
+
+    assert [result['error'] for result in results] == ['broken on purpose', None]
+    assert benchmark.failed(results) == results[:1]
+
+    monkeypatch.setattr(sys, 'argv', [
+        'benchmark', broken_benchmark, '--scale', '48',
+        '--budgets', str(tmpdir.join('budgets.json'))])
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark.main()
+    assert exit_info.value.code == 1
+
+
+def test_skipped_is_not_a_failure():
+    results = [dict(name='comware_vlan', scale='48', error='skipped',
+                    skipped=True)]
+
+    assert benchmark.failed(results) == []
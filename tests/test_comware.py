@@ -0,0 +1,113 @@
+"""Tests of HPCOM7 staging that don't need a device.
+"""
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.utils.xml.lib import *
+
+
+def access_pvid(ifindex, pvid):
+    EN = nc_element_maker()
+    EC = config_element_maker()
+    return EN.config(
+        EC.top(
+            EC.VLAN(
+                EC.AccessInterfaces(
+                    EC.Interface(
+                        EC.IfIndex(ifindex),
+                        EC.PVID(pvid)
+                    )
+                )
+            )
+        )
+    )
+
+
+def link_type(ifindex, link):
+    EN = nc_element_maker()
+    EC = config_element_maker()
+    return EN.config(
+        EC.top(
+            EC.Ifmgr(
+                EC.Interfaces(
+                    EC.Interface(
+                        EC.IfIndex(ifindex),
+                        EC.LinkType(link)
+                    )
+                )
+            )
+        )
+    )
+
+
+def staged_order(device):
+    """Return the (module, IfIndex) of every row, in document order.
+    """
+    order = []
+    for command in device.staged:
+        for module in command['config'][0]:
+            for row in module.iter(tag=etree.Element):
+                if etree.QName(row).localname == 'Interface':
+                    order.append((etree.QName(module).localname,
+                                  row[0].text))
+    return order
+
+
+def test_coalesce_merges_same_module():
+    device = HPCOM7(host='switch')
+    device.stage_config(access_pvid('1', '3'), 'edit_config')
+    device.stage_config(access_pvid('2', '3'), 'edit_config')
+
+    assert device.coalesce_staged() == 1
+    assert staged_order(device) == [('VLAN', '1'), ('VLAN', '2')]
+    assert len(device.staged[0]['config'][0]) == 1
+
+
+def test_coalesce_keeps_order_across_modules():
+    device = HPCOM7(host='switch')
+    device.stage_config(access_pvid('1', '3'), 'edit_config')
+    device.stage_config(link_type('2', '1'), 'edit_config')
+    device.stage_config(access_pvid('2', '3'), 'edit_config')
+
+    assert device.coalesce_staged() == 2
+    assert staged_order(device) == [
+        ('VLAN', '1'), ('Ifmgr', '2'), ('VLAN', '2')]
+
+
+def test_coalesce_cli_config():
+    device = HPCOM7(host='switch')
+    device.stage_config(['interface Vlan-interface2'], 'cli_config')
+    device.stage_config(['interface Vlan-interface3'], 'cli_config')
+
+    assert device.coalesce_staged() == 1
+    assert device.staged[0]['config'] == [
+        'interface Vlan-interface2', 'return', 'system-view',
+        'interface Vlan-interface3']
+
+
+def loaded_table(device):
+    table = device.interface_table
+    table._by_name = table._by_lower_name = table._by_index = {}
+    return table
+
+
+def test_port_layer_edit_drops_interface_table():
+    device = HPCOM7(host='switch')
+    table = loaded_table(device)
+
+    device.invalidate_caches(link_type('2', '1'))
+    assert table.loaded
+
+    EN = nc_element_maker()
+    EC = config_element_maker()
+    device.invalidate_caches(EN.config(
+        EC.top(
+            EC.Ifmgr(
+                EC.Interfaces(
+                    EC.Interface(
+                        EC.IfIndex('2'),
+                        EC.PortLayer('2')
+                    )
+                )
+            )
+        )
+    ))
+    assert not table.loaded
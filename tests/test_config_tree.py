@@ -0,0 +1,176 @@
+"""Tests of the local config parser and diff.
+"""
+from pyhpecw7.utils.config_tree import parse_config, diff_configs, format_diff,\
+    remediation
+
+# display current-configuration of a 5940, trimmed
+RUNNING = '''<HPE>display current-configuration
+#
+ version 7.1.045, Release 2418P01
+#
+ sysname HPE
+#
+ clock timezone Berlin add 01:00:00
+#
+ irf mac-address persistent timer
+ irf auto-update enable
+ undo irf link-delay
+ irf member 1 priority 1
+#
+ lldp global enable
+#
+ system-working-mode standard
+ xbar load-single
+ password-recovery enable
+ lpu-type f-series
+#
+vlan 1
+#
+vlan 10
+ name servers
+#
+ stp global enable
+#
+interface NULL0
+#
+interface Vlan-interface1
+ ip address 192.168.1.1 255.255.255.0
+#
+interface FortyGigE1/0/1
+ port link-mode bridge
+ port access vlan 10
+#
+interface FortyGigE1/0/2
+ port link-mode bridge
+#
+bgp 100
+ group evpn internal
+ peer evpn connect-interface LoopBack0
+ peer 1.1.1.1 group evpn
+ #
+ address-family l2vpn evpn
+  peer evpn enable
+#
+ scheduler logfile size 16
+#
+line class aux
+ user-role network-admin
+#
+line vty 0 63
+ authentication-mode scheme
+ user-role network-operator
+#
+ ip route-static 0.0.0.0 0 10.0.0.1
+#
+ info-center logbuffer size 1024
+#
+ ssh server enable
+#
+domain system
+#
+ domain default enable system
+#
+local-user admin class manage
+ service-type ssh
+ authorization-attribute user-role network-admin
+#
+ netconf ssh server enable
+#
+return
+'''
+
+
+def top_level(blocks):
+    return [block.command for block in blocks]
+
+
+def test_parse_global_commands_after_blocks():
+    blocks = parse_config(RUNNING)
+    commands = top_level(blocks)
+
+    for command in ('stp global enable', 'scheduler logfile size 16',
+                    'ip route-static 0.0.0.0 0 10.0.0.1',
+                    'domain default enable system',
+                    'netconf ssh server enable'):
+        assert command in commands
+
+    iface = blocks[commands.index('interface FortyGigE1/0/2')]
+    assert [child.command for child in iface.children] == [
+        'port link-mode bridge']
+
+    vlan = blocks[commands.index('vlan 10')]
+    assert [child.command for child in vlan.children] == ['name servers']
+
+
+def test_parse_nested_separators():
+    blocks = parse_config(RUNNING)
+    bgp = blocks[top_level(blocks).index('bgp 100')]
+
+    assert [child.command for child in bgp.children] == [
+        'group evpn internal', 'peer evpn connect-interface LoopBack0',
+        'peer 1.1.1.1 group evpn', 'address-family l2vpn evpn']
+    assert bgp.children[-1].children[0].command == 'peer evpn enable'
+
+
+def test_remediation_of_global_command():
+    desired = RUNNING.replace(' scheduler logfile size 16\n#\n', '')
+
+    assert remediation(RUNNING, desired) == ['undo scheduler logfile size']
+
+
+def test_inserted_block_is_not_a_move():
+    desired = RUNNING.replace('#\n stp global enable\n',
+                              '#\nvlan 20\n name clients\n#\n stp global enable\n')
+
+    diff = diff_configs(RUNNING, desired)
+    assert [(entry['action'], entry['parents'], entry['command'])
+            for entry in diff] == [('add', [], 'vlan 20')]
+    assert remediation(RUNNING, desired) == ['vlan 20', 'name clients', 'quit']
+
+
+def test_changed_description_is_overwritten():
+    desired = RUNNING.replace('interface FortyGigE1/0/2\n port link-mode bridge\n',
+                              'interface FortyGigE1/0/2\n port link-mode bridge\n'
+                              ' description uplink\n')
+    changed = desired.replace('description uplink', 'description core')
+
+    assert remediation(desired, changed) == [
+        'interface FortyGigE1/0/2', 'description core', 'quit']
+    assert remediation(desired, RUNNING) == [
+        'interface FortyGigE1/0/2', 'undo description', 'quit']
+
+    diff = diff_configs(desired, changed)
+    assert [(entry['action'], entry['previous'], entry['command'])
+            for entry in diff] == [
+        ('change', 'description uplink', 'description core')]
+    assert format_diff(diff) == [
+        ' interface FortyGigE1/0/2', '- description uplink',
+        '+ description core']
+
+
+def test_changed_sysname_is_overwritten():
+    desired = RUNNING.replace(' sysname HPE\n', ' sysname core-1\n')
+
+    assert remediation(RUNNING, desired) == ['sysname core-1']
+    assert remediation(RUNNING, desired.replace(' sysname core-1\n#\n', '')) == [
+        'undo sysname']
+
+
+def test_changed_vlan_name_and_address():
+    desired = RUNNING.replace(' name servers', ' name storage').replace(
+        ' ip address 192.168.1.1 255.255.255.0',
+        ' ip address 192.168.2.1 255.255.255.0\n'
+        ' ip address 192.168.3.1 255.255.255.0 sub')
+
+    assert remediation(RUNNING, desired) == [
+        'vlan 10', 'name storage', 'quit',
+        'interface Vlan-interface1',
+        'ip address 192.168.2.1 255.255.255.0',
+        'ip address 192.168.3.1 255.255.255.0 sub', 'quit']
+
+
+def test_multi_value_commands_still_undone_in_full():
+    desired = RUNNING.replace(' ip route-static 0.0.0.0 0 10.0.0.1\n#\n', '')
+
+    assert remediation(RUNNING, desired) == [
+        'undo ip route-static 0.0.0.0 0 10.0.0.1']
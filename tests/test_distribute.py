@@ -0,0 +1,19 @@
+"""Tests of ImageDistributor error handling.
+"""
+import pytest
+
+pytest.importorskip('scp')
+
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.distribute import ImageDistributor
+
+
+def test_unexpected_error_is_recorded_per_device(monkeypatch, tmpdir):
+    monkeypatch.setattr(HPCOM7, 'open', lambda self, **kvargs: None)
+    monkeypatch.setattr(HPCOM7, 'close', lambda self: None)
+    distributor = ImageDistributor([str(tmpdir.join('missing.ipe'))])
+
+    result = distributor._stage(
+        dict(host='10.1.1.1', username='hp', password='hp123'), 'controller')
+
+    assert 'missing.ipe' in result['error']
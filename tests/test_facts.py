@@ -0,0 +1,23 @@
+"""Tests of the facts cache.
+"""
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.features.facts import FactsCache, FACTS_TTL
+
+
+def test_one_default_ttl():
+    assert FactsCache().ttl == FACTS_TTL
+    assert HPCOM7(host='switch').facts_cache.ttl == FACTS_TTL
+
+
+def test_cached_facts_are_copies(tmpdir):
+    for cache_dir in (None, str(tmpdir)):
+        cache = FactsCache(cache_dir=cache_dir)
+        facts = dict(hostname='HPE', interface_list=['FortyGigE1/0/1'])
+        cache.set('switch', 830, ('base', 'interfaces'), facts)
+        facts['interface_list'].append('changed')
+
+        first = cache.get('switch', 830, ('base', 'interfaces'))
+        first['interface_list'].append('changed')
+
+        assert cache.get('switch', 830, ('base', 'interfaces')) == dict(
+            hostname='HPE', interface_list=['FortyGigE1/0/1'])
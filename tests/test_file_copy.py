@@ -0,0 +1,66 @@
+"""Tests of device-side copies that don't need a device.
+"""
+import pytest
+
+pytest.importorskip('scp')
+
+from pyhpecw7.features.file_copy import FileCopy
+from pyhpecw7.utils.xml.lib import *
+
+
+class FakeDevice(object):
+    def __init__(self):
+        self.calls = []
+
+    def cli_display(self, command):
+        self.calls.append(command)
+        return ''
+
+    def action(self, top, read_only=False):
+        operation = top.find('.//{*}Operations')[0]
+        self.calls.append(etree.QName(operation).localname)
+
+
+def file_copy(tmpdir, remote_hashes):
+    image = tmpdir.join('image.ipe')
+    image.write('image')
+    device = FakeDevice()
+    fc = FileCopy(device, str(image))
+    fc._safety_checks = lambda: None
+    fc._get_local_md5 = lambda: 'local'
+    fc._get_remote_md5 = lambda path=None: remote_hashes.pop(0)
+    return fc, device
+
+
+def test_pull_file_with_identity_key(tmpdir):
+    fc, device = file_copy(tmpdir, [None, 'local'])
+    fc.pull_file('10.1.1.1', 'admin', 'secret', identity_key='rsa')
+
+    assert device.calls == [
+        'scp 10.1.1.1 get flash:/image.ipe flash:/image.ipe '
+        'identity-key rsa user admin']
+
+
+def test_pull_file_deletes_stale_file_first(tmpdir):
+    fc, device = file_copy(tmpdir, ['stale', 'local'])
+    fc.pull_file('10.1.1.1', 'admin', 'secret')
+
+    assert device.calls == [
+        'Delete',
+        'scp 10.1.1.1 get flash:/image.ipe flash:/image.ipe '
+        'user admin password simple secret']
+
+
+def test_pull_file_skips_matching_file(tmpdir):
+    fc, device = file_copy(tmpdir, ['local'])
+    fc.pull_file('10.1.1.1', 'admin', 'secret')
+
+    assert device.calls == []
+
+
+def test_copy_to_deletes_stale_file_first(tmpdir):
+    fc, device = file_copy(tmpdir, ['stale', 'local'])
+
+    assert fc.copy_to('slot2#flash:/')
+    assert device.calls == [
+        'Delete', 'copy flash:/image.ipe slot2#flash:/image.ipe']
@@ -0,0 +1,42 @@
+"""Tests of SessionPool bookkeeping, with stand-in sessions.
+"""
+import time
+from pyhpecw7.pool import SessionPool
+
+
+class FakeSession(object):
+    connected = True
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_during_keepalive_closes_checked_session():
+    pool = SessionPool(keepalive=0)
+    device = FakeSession()
+    key = pool._key('switch', 830, 'admin')
+    pool._idle[key] = [(device, time.time())]
+    pool._busy[key] = 0
+
+    def close_while_checking(session):
+        pool.close()
+        return True
+    pool._is_alive = close_while_checking
+
+    pool._keepalive()
+    assert device.closed
+    assert pool._idle == {}
+    assert pool._busy[key] == 0
+
+
+def test_close_stops_keepalive_thread():
+    pool = SessionPool(keepalive=3600)
+    start = time.time()
+    pool.close()
+    pool._timer.join(5)
+
+    assert not pool._timer.is_alive()
+    assert time.time() - start < 5
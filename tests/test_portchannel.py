@@ -0,0 +1,40 @@
+"""Tests of port-channel member decoding that don't need a device.
+"""
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.features.portchannel import Portchannel
+from pyhpecw7.utils.bitmap import indexes_to_bitmap
+
+
+def portchannel(names):
+    device = HPCOM7(host='switch')
+    table = device.interface_table
+    refreshes = []
+
+    def refresh():
+        refreshes.append(True)
+        table._by_index = dict(
+            (index, dict(index=index, name=name))
+            for index, name in names.items())
+    table.refresh = refresh
+    table._by_name = table._by_lower_name = {}
+    table._by_index = {'1': dict(index='1', name='FortyGigE1/0/1')}
+
+    pc = Portchannel.__new__(Portchannel)
+    pc.device = device
+    return pc, refreshes
+
+
+def test_members_refresh_stale_table():
+    pc, refreshes = portchannel({'1': 'FortyGigE1/0/1', '2': 'FortyGigE1/0/2'})
+
+    assert pc._get_members_from_bitmap(indexes_to_bitmap([1, 2])) == (
+        [1, 2], ['FortyGigE1/0/1', 'FortyGigE1/0/2'])
+    assert len(refreshes) == 1
+
+
+def test_members_skip_unknown_indexes():
+    pc, refreshes = portchannel({'1': 'FortyGigE1/0/1', '3': 'FortyGigE1/0/3'})
+
+    assert pc._get_members_from_bitmap(indexes_to_bitmap([1, 2, 3])) == (
+        [1, 3], ['FortyGigE1/0/1', 'FortyGigE1/0/3'])
+    assert len(refreshes) == 1
@@ -0,0 +1,79 @@
+"""Tests of the shared running config snapshot.
+"""
+from pyhpecw7.features.running_config import RunningConfig
+
+# display current-configuration of a 5940, trimmed
+RUNNING = '''#
+ version 7.1.045, Release 2418P01
+#
+ sysname HPE
+#
+vlan 10
+ name servers
+#
+ stp global enable
+#
+interface Bridge-Aggregation1
+ port link-type trunk
+ port trunk permit vlan all
+ link-aggregation mode dynamic
+#
+interface Vlan-interface10
+ ip address 10.1.1.1 255.255.255.0
+ vrrp vrid 1 virtual-ip 10.1.1.254
+#
+interface FortyGigE1/0/1
+ port link-mode bridge
+ port link-aggregation group 1
+#
+ scheduler logfile size 16
+#
+ospf 1 router-id 1.1.1.1
+ area 0.0.0.0
+  network 10.1.1.0 0.0.0.255
+#
+ ip route-static 0.0.0.0 0 10.0.0.1
+#
+return
+'''
+
+
+def snapshot():
+    running_config = RunningConfig(None)
+    running_config.load(RUNNING)
+    return running_config
+
+
+def test_interface_keeps_only_its_own_lines():
+    running_config = snapshot()
+
+    assert running_config.interface('FortyGigE1/0/1').lines() == [
+        'interface FortyGigE1/0/1',
+        ' port link-mode bridge',
+        ' port link-aggregation group 1']
+    assert running_config.interface('Vlan-interface10').lines() == [
+        'interface Vlan-interface10',
+        ' ip address 10.1.1.1 255.255.255.0',
+        ' vrrp vrid 1 virtual-ip 10.1.1.254']
+
+
+def test_interface_abbreviated_names():
+    running_config = snapshot()
+
+    assert running_config.interface('vlan 10').command == \
+        'interface Vlan-interface10'
+    assert running_config.interface('bridge-agg 1').command == \
+        'interface Bridge-Aggregation1'
+    assert running_config.interface('Fo1/0/1').command == \
+        'interface FortyGigE1/0/1'
+    assert running_config.interface('FortyGigE1/0/2') is None
+
+
+def test_block_and_global_commands():
+    running_config = snapshot()
+
+    assert running_config.block('vlan 10').lines() == ['vlan 10', ' name servers']
+    assert running_config.block('stp global enable') is not None
+    assert running_config.block('scheduler logfile size 16').children == []
+    assert running_config.block('ospf 1 router-id 1.1.1.1').include('network') == [
+        '  network 10.1.1.0 0.0.0.255']
@@ -0,0 +1,48 @@
+"""Tests of the CLI output parsers.
+"""
+from pyhpecw7.features.bgp_group import Bgp
+from pyhpecw7.features.running_config import RunningConfig
+
+
+class SnapshotDevice(object):
+    """A device whose running config is a fixed text.
+    """
+    def __init__(self, text):
+        self.running_config = RunningConfig(self)
+        self.running_config.load(text)
+
+
+def test_bgp_get_config():
+    device = SnapshotDevice('\n'.join([
+        '#',
+        'bgp 100',
+        ' group evpn internal',
+        ' peer 1.1.1.1 group evpn',
+        '#',
+        'bgp 200 instance abc',
+        '#',
+        'bgp-logging',
+        '#',
+        'return',
+    ]))
+
+    assert Bgp(device, '100').get_config() == ['100', '200 instance abc']
+
+
+def test_bgp_get_group_info():
+    device = SnapshotDevice('\n'.join([
+        '#',
+        'bgp 100',
+        ' group 10 internal',
+        ' group evpn.rr external',
+        ' peer 1.1.1.1 group 10',
+        '#',
+        'return',
+    ]))
+    bgp = Bgp(device, '100')
+
+    assert bgp.get_group_info('10')
+    assert not bgp.get_group_info('1')
+    assert bgp.get_group_info('evpn.rr')
+    assert not bgp.get_group_info('evpn-rr')
+    assert not bgp.get_group_info('evpn(')
@@ -0,0 +1,47 @@
+"""Tests of the bulk VLAN methods that don't need a device.
+"""
+from pyhpecw7.comware import HPCOM7
+from pyhpecw7.features.vlan import Vlan
+from pyhpecw7.utils.xml.lib import *
+
+TABLE = {'10': dict(vlanid='10', name='VLAN 0010', descr='VLAN 0010'),
+         '20': dict(vlanid='20', name='VLAN 0020', descr='VLAN 0020')}
+
+
+def operations(device):
+    return [command['config'][0][0].get(
+        '{urn:ietf:params:xml:ns:netconf:base:1.0}operation')
+        for command in device.staged]
+
+
+def test_absent_delta_removes_without_state():
+    device = HPCOM7(host='switch')
+    vlan = Vlan(device)
+    delta = vlan.get_bulk_delta([dict(vlanid='10'), dict(vlanid='30')],
+                                state='absent', existing=TABLE)
+
+    assert delta == [dict(vlanid='10', state='absent')]
+    vlan.build_bulk(delta, stage=True)
+    assert operations(device) == ['delete']
+
+
+def test_present_delta_merges():
+    device = HPCOM7(host='switch')
+    vlan = Vlan(device)
+    delta = vlan.get_bulk_delta([dict(vlanid='10', name='servers'),
+                                 dict(vlanid='30')], existing=TABLE)
+
+    assert delta == [dict(vlanid='10', name='servers'), dict(vlanid='30')]
+    vlan.build_bulk(delta, stage=True, chunk_size=1)
+    assert operations(device) == ['merge', 'merge']
+
+
+def test_mixed_delta_keeps_order():
+    device = HPCOM7(host='switch')
+    vlan = Vlan(device)
+    delta = vlan.get_bulk_delta([dict(vlanid='20')], state='absent',
+                                existing=TABLE)
+    delta += vlan.get_bulk_delta([dict(vlanid='30')], existing=TABLE)
+
+    vlan.build_bulk(delta, stage=True)
+    assert operations(device) == ['delete', 'merge']